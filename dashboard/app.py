@@ -1,17 +1,17 @@
 """Streamlit dashboard for ad testing"""
 
-import asyncio
 import sys
 from pathlib import Path
 
 import streamlit as st
 
-# Add src to path for imports
+# Add src and project root to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from ad_testing_agents.agents import test_offer
-from ad_testing_agents.models import AdOffer
-from ad_testing_agents.personas import load_all_personas
+from ad_testing_agents.models import AdOffer, AgentResponse
+from dashboard.components.cache import get_personas
+from dashboard.components.jobs import get_job_manager
 
 # Page config
 st.set_page_config(
@@ -42,6 +42,107 @@ DECISION_EMOJI = {
 }
 
 
+POLL_INTERVAL_SECONDS = 1.0
+
+
+def render_response(response: AgentResponse):
+    """Card with one agent response"""
+    with st.expander(
+        f"{response.persona_name} — {EMOTION_EMOJI.get(response.primary_emotion, '😐')} {response.primary_emotion.title()} | {DECISION_EMOJI.get(response.decision, '➖')} {response.decision.replace('_', ' ').title()}",
+        expanded=True,
+    ):
+        # Emotion
+        st.markdown(
+            f"**Эмоция:** {EMOTION_EMOJI.get(response.primary_emotion, '😐')} {response.primary_emotion.title()} (интенсивность: {response.emotion_intensity:.0%})"
+        )
+        st.markdown(f"*{response.emotional_reasoning}*")
+
+        # First impression
+        st.markdown(f"**Первое впечатление:** {response.first_impression}")
+
+        # Detailed reasoning
+        with st.container():
+            st.markdown("**Детальный анализ:**")
+            st.write(response.detailed_reasoning)
+
+        # Decision
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric(
+                "Решение",
+                response.decision.replace("_", " ").title(),
+                f"{response.confidence_score:.0%} уверенность",
+            )
+        with col2:
+            st.metric("Воспринимаемая ценность", f"{response.perceived_value}/10")
+
+        # Pain points & objections
+        if response.pain_points_addressed:
+            st.markdown("**✅ Решает боли:**")
+            for pp in response.pain_points_addressed:
+                st.markdown(f"- {pp}")
+
+        if response.objections:
+            st.markdown("**⚠️ Возражения:**")
+            for obj in response.objections:
+                st.markdown(f"- {obj}")
+
+        # What would convince
+        if response.what_would_convince:
+            st.info(f"💡 **Что убедит:** {response.what_would_convince}")
+
+
+def render_job(job_id: str, polling: bool):
+    """Progress, quick analytics and responses of a background test (partial while running)"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.warning("⚠️ Результаты теста больше недоступны, запустите тест заново")
+        return
+
+    if job.status == "error":
+        st.error(f"❌ Ошибка при тестировании: {job.error}")
+    elif job.finished:
+        if not job.responses:
+            st.error("❌ Не удалось получить ответы от агентов")
+            return
+        st.success(f"✅ Получено {len(job.responses)} ответов")
+        if job.failed:
+            st.warning(f"⚠️ {job.failed} агентов завершились с ошибкой")
+    else:
+        st.progress(
+            job.progress,
+            text=f"🔄 Тестируем оффер (режим: {job.agent_type}): "
+            f"{len(job.responses)}/{job.total} персон",
+        )
+
+    if job.responses:
+        # Quick analytics
+        st.header("📊 Быстрая аналитика")
+
+        summary = job.aggregate.overall()
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Средняя ценность", f"{summary['avg_value']:.1f}/10")
+
+        with col2:
+            st.metric("Конверсия", f"{summary['conversion_rate']:.0%}")
+
+        with col3:
+            st.metric("Ср. уверенность", f"{summary['avg_confidence']:.0%}")
+
+        # Agent responses
+        st.header("💬 Ответы агентов")
+
+        for response in job.responses:
+            render_response(response)
+
+    # Polling stops with a full rerun once the job is finished
+    if polling and job.finished:
+        st.rerun()
+
+
 def main():
     """Main dashboard"""
 
@@ -52,7 +153,7 @@ def main():
 
     # Load personas
     try:
-        personas = load_all_personas()
+        personas = get_personas()
         st.success(f"✅ Загружено {len(personas)} персон")
     except Exception as e:
         st.error(f"❌ Ошибка загрузки персон: {e}")
@@ -133,95 +234,18 @@ def main():
             discount=discount if discount else None,
         )
 
-        # Run test
-        with st.spinner(f"🔄 Тестируем оффер на {len(selected_personas)} персонах (режим: {agent_type})..."):
-            try:
-                # Run async test
-                responses = asyncio.run(
-                    test_offer(offer, selected_personas, agent_type=agent_type)
-                )
-
-                if not responses:
-                    st.error("❌ Не удалось получить ответы от агентов")
-                    return
-
-                # Show results
-                st.success(f"✅ Получено {len(responses)} ответов")
-
-                # Quick analytics
-                st.header("📊 Быстрая аналитика")
-
-                col1, col2, col3 = st.columns(3)
-
-                with col1:
-                    avg_value = sum(r.perceived_value for r in responses) / len(responses)
-                    st.metric("Средняя ценность", f"{avg_value:.1f}/10")
-
-                with col2:
-                    conversion = sum(
-                        1
-                        for r in responses
-                        if r.decision in ["strong_yes", "maybe_yes"]
-                    ) / len(responses)
-                    st.metric("Конверсия", f"{conversion:.0%}")
-
-                with col3:
-                    avg_confidence = sum(r.confidence_score for r in responses) / len(
-                        responses
-                    )
-                    st.metric("Ср. уверенность", f"{avg_confidence:.0%}")
-
-                # Agent responses
-                st.header("💬 Ответы агентов")
-
-                for response in responses:
-                    with st.expander(
-                        f"{response.persona_name} — {EMOTION_EMOJI.get(response.primary_emotion, '😐')} {response.primary_emotion.title()} | {DECISION_EMOJI.get(response.decision, '➖')} {response.decision.replace('_', ' ').title()}",
-                        expanded=True,
-                    ):
-                        # Emotion
-                        st.markdown(
-                            f"**Эмоция:** {EMOTION_EMOJI.get(response.primary_emotion, '😐')} {response.primary_emotion.title()} (интенсивность: {response.emotion_intensity:.0%})"
-                        )
-                        st.markdown(f"*{response.emotional_reasoning}*")
-
-                        # First impression
-                        st.markdown(f"**Первое впечатление:** {response.first_impression}")
-
-                        # Detailed reasoning
-                        with st.container():
-                            st.markdown("**Детальный анализ:**")
-                            st.write(response.detailed_reasoning)
-
-                        # Decision
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric(
-                                "Решение",
-                                response.decision.replace("_", " ").title(),
-                                f"{response.confidence_score:.0%} уверенность",
-                            )
-                        with col2:
-                            st.metric("Воспринимаемая ценность", f"{response.perceived_value}/10")
-
-                        # Pain points & objections
-                        if response.pain_points_addressed:
-                            st.markdown("**✅ Решает боли:**")
-                            for pp in response.pain_points_addressed:
-                                st.markdown(f"- {pp}")
-
-                        if response.objections:
-                            st.markdown("**⚠️ Возражения:**")
-                            for obj in response.objections:
-                                st.markdown(f"- {obj}")
-
-                        # What would convince
-                        if response.what_would_convince:
-                            st.info(f"💡 **Что убедит:** {response.what_would_convince}")
-
-            except Exception as e:
-                st.error(f"❌ Ошибка при тестировании: {e}")
-                st.exception(e)
+        # Run test in the background; results are streamed in below
+        st.session_state["job_id"] = get_job_manager().submit(
+            offer, selected_personas, agent_type=agent_type
+        )
+
+    job_id = st.session_state.get("job_id")
+    if job_id:
+        job = get_job_manager().get(job_id)
+        polling = job is not None and not job.finished
+        st.fragment(render_job, run_every=POLL_INTERVAL_SECONDS if polling else None)(
+            job_id, polling
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""Cached data loaders for the dashboard
+
+Runs are read from the results store and keyed by (results directory, run
+id, directory mtime, result count), so a rewritten results file or a run
+that gained results is reloaded while widget interactions reuse the
+DataFrame and aggregates from the cache. Runs without a results file
+(queue workers, JSONL imports, merged runs) load the same way.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from ad_testing_agents.analytics import (
+    SignatureCache,
+    cluster_field,
+    decision_distribution,
+    emotion_distribution,
+    offer_summary,
+    overall_summary,
+    persona_summary,
+)
+from ad_testing_agents.models import Persona
+from ad_testing_agents.personas import load_all_personas
+from ad_testing_agents.storage import ResultsStore
+
+RunKey = Tuple[str, str, int, int]
+
+
+def run_key(results_dir: str, run: Dict[str, Any], dir_mtime_ns: int) -> RunKey:
+    """Cache key of a run from its manifest row"""
+    return results_dir, run["run_id"], dir_mtime_ns, run["num_results"]
+
+
+@st.cache_resource(show_spinner=False)
+def get_personas() -> List[Persona]:
+    """Personas are loaded once per server process"""
+    return load_all_personas()
+
+
+@st.cache_resource(show_spinner=False)
+def get_results_store(results_dir: str) -> ResultsStore:
+    """Results store of a results directory, shared by all sessions"""
+    return ResultsStore.for_dir(Path(results_dir))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def sync_results_store(results_dir: str, dir_mtime_ns: int) -> List[str]:
+    """Import new results files into the store (re-runs when the directory changes)"""
+    return get_results_store(results_dir).sync_dir(Path(results_dir))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_manifest(results_dir: str, dir_mtime_ns: int) -> List[Dict[str, Any]]:
+    """Run manifest (one summary row per run, newest first)"""
+    sync_results_store(results_dir, dir_mtime_ns)
+    return get_results_store(results_dir).manifest()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_offer_history(results_dir: str, dir_mtime_ns: int) -> pd.DataFrame:
+    """Per-offer summary of every run, for cross-run trends"""
+    sync_results_store(results_dir, dir_mtime_ns)
+    return pd.DataFrame(get_results_store(results_dir).offer_history())
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_frame(key: RunKey) -> pd.DataFrame:
+    """Key and metric columns of a run (free text is read only where it is shown)"""
+    results_dir, run_id, _, _ = key
+    return get_results_store(results_dir).frame(run_id, columns=[])
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_summaries(key: RunKey) -> Dict[str, Any]:
+    """All aggregates the comparison page needs, computed once per run version"""
+    df = load_frame(key)
+    return {
+        "overall": overall_summary(df),
+        "offers": offer_summary(df),
+        "personas": persona_summary(df),
+        "emotions": emotion_distribution(df),
+        "decisions": decision_distribution(df),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_clusters(key: RunKey, offer_headline: str, column: str) -> pd.DataFrame:
+    """Clustered free-text feedback of one offer"""
+    results_dir, run_id, _, _ = key
+    df = get_results_store(results_dir).frame(run_id, columns=[column])
+    cache_path = Path(key[0]) / ".cache" / "text_signatures.npz"
+    return cluster_field(
+        df[df["offer_headline"] == offer_headline], column, cache=SignatureCache(cache_path)
+    )
@@ -0,0 +1,133 @@
+"""Memoised Plotly figure builders for the comparison page"""
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from .cache import RunKey, load_summaries
+
+DECISION_COLORS = {
+    "strong_yes": "#22c55e",
+    "maybe_yes": "#84cc16",
+    "neutral": "#94a3b8",
+    "probably_not": "#f97316",
+    "strong_no": "#ef4444",
+}
+
+
+def offer_table(offers: pd.DataFrame) -> pd.DataFrame:
+    """Offer ranking with Russian column labels, indexed by headline"""
+    offer_stats = offers.set_index("offer_headline")[
+        ["avg_value", "avg_confidence", "conversion_rate", "avg_emotion_intensity"]
+    ].round(2)
+    offer_stats.columns = ["Ср. ценность", "Ср. уверенность", "Конверсия", "Эмоции"]
+    return offer_stats
+
+
+def persona_table(personas: pd.DataFrame) -> pd.DataFrame:
+    """Persona metrics with Russian column labels, indexed by name"""
+    persona_stats = personas.set_index("persona_name")[["avg_value", "conversion_rate"]].round(2)
+    persona_stats.columns = ["Ср. ценность", "Конверсия"]
+    return persona_stats
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def offer_value_figure(key: RunKey) -> go.Figure:
+    fig = px.bar(
+        offer_table(load_summaries(key)["offers"]).reset_index(),
+        x="offer_headline",
+        y="Ср. ценность",
+        color="Конверсия",
+        color_continuous_scale="RdYlGn",
+        labels={"offer_headline": "Оффер", "Ср. ценность": "Средняя ценность (0-10)"},
+        height=500,
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def emotion_heatmap_figure(key: RunKey) -> go.Figure:
+    emotion_by_offer = load_summaries(key)["emotions"] * 100
+    fig = px.imshow(
+        emotion_by_offer.T,
+        labels=dict(x="Оффер", y="Эмоция", color="Процент (%)"),
+        color_continuous_scale="YlGnBu",
+        aspect="auto",
+        height=500,
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def decision_figure(key: RunKey) -> go.Figure:
+    fig = px.bar(
+        load_summaries(key)["decisions"],
+        x="offer_headline",
+        y="count",
+        color="decision",
+        labels={"offer_headline": "Оффер", "count": "Количество", "decision": "Решение"},
+        height=500,
+        color_discrete_map=DECISION_COLORS,
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def radar_figure(key: RunKey, top: int = 3) -> go.Figure:
+    fig = go.Figure()
+
+    for _, row in load_summaries(key)["offers"].head(top).iterrows():
+        fig.add_trace(
+            go.Scatterpolar(
+                r=[
+                    row["avg_value"],
+                    row["conversion_rate"] * 10,
+                    row["avg_confidence"] * 10,
+                    row["avg_emotion_intensity"] * 10,
+                ],
+                theta=["Ценность", "Конверсия x10", "Уверенность x10", "Эмоции x10"],
+                fill="toself",
+                name=row["offer_headline"][:40] + "...",
+            )
+        )
+
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
+        showlegend=True,
+        height=500,
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def persona_bar_figure(key: RunKey, column: str, color_scale: str) -> go.Figure:
+    fig = px.bar(
+        persona_table(load_summaries(key)["personas"]).reset_index(),
+        x="persona_name",
+        y=column,
+        color=column,
+        color_continuous_scale=color_scale,
+        height=400,
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+def offer_trend_figure(history: pd.DataFrame, metric: str, label: str) -> go.Figure:
+    """Metric of each offer across runs (history rows from load_offer_history)"""
+    fig = px.line(
+        history.sort_values("test_date"),
+        x="test_date",
+        y=metric,
+        color="offer_headline",
+        markers=True,
+        hover_data=["run_id", "count"],
+        labels={"test_date": "Дата запуска", metric: label, "offer_headline": "Оффер"},
+        height=450,
+    )
+    fig.update_layout(legend=dict(orientation="h", yanchor="top", y=-0.2))
+    return fig
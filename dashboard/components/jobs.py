@@ -0,0 +1,193 @@
+"""Background offer evaluations for the dashboard
+
+Evaluations run on a process-wide thread pool (one event loop per job), so
+the Streamlit script never blocks on agents and several sessions can test
+offers at the same time. Pages poll a job snapshot and render responses as
+each persona completes; each job folds its responses into an
+IncrementalAggregator as they arrive, so polls render metrics without
+recomputing them from all responses.
+
+With JOB_QUEUE_PATH set, evaluations are instead enqueued in the shared local
+job queue with the "interactive" priority, so they run ahead of queued bulk
+matrices on the same workers and API quota.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Literal
+
+import streamlit as st
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.analytics import IncrementalAggregator
+from ad_testing_agents.config import config
+from ad_testing_agents.models import AdOffer, AgentResponse, Persona
+from ad_testing_agents.queue import LocalJobQueue
+from ad_testing_agents.queue.base import DEFAULT_ATTEMPTS, backoff_delay
+
+JobStatus = Literal["queued", "running", "done", "error"]
+
+MAX_FINISHED_JOBS = 50
+QUEUE_POLL_SECONDS = 0.5
+QUEUE_TENANT = "dashboard"
+
+
+@dataclass
+class EvaluationJob:
+    """State of one background evaluation"""
+
+    id: str
+    total: int
+    agent_type: str
+    status: JobStatus = "queued"
+    responses: List[AgentResponse] = field(default_factory=list)
+    aggregate: IncrementalAggregator = field(default_factory=IncrementalAggregator)
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    @property
+    def progress(self) -> float:
+        return len(self.responses) / self.total if self.total else 1.0
+
+    @property
+    def failed(self) -> int:
+        return self.total - len(self.responses) if self.status == "done" else 0
+
+
+class JobManager:
+    """Runs evaluations in background threads and keeps their partial results"""
+
+    def __init__(self, max_workers: int | None = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.DASHBOARD_WORKERS,
+            thread_name_prefix="ad-testing-job",
+        )
+        self._jobs: Dict[str, EvaluationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, offer: AdOffer, personas: List[Persona], agent_type: str) -> str:
+        """Queue an evaluation and return its job id"""
+        job = EvaluationJob(id=uuid.uuid4().hex, total=len(personas), agent_type=agent_type)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, offer, personas)
+        return job.id
+
+    def get(self, job_id: str) -> EvaluationJob | None:
+        """Consistent snapshot of a job (None if unknown or pruned)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return EvaluationJob(
+                id=job.id,
+                total=job.total,
+                agent_type=job.agent_type,
+                status=job.status,
+                responses=list(job.responses),
+                aggregate=IncrementalAggregator().merge(job.aggregate),
+                error=job.error,
+                submitted_at=job.submitted_at,
+                finished_at=job.finished_at,
+            )
+
+    def _add(self, job: EvaluationJob, response: AgentResponse) -> None:
+        with self._lock:
+            job.responses.append(response)
+            job.aggregate.update(response)
+
+    def _run(self, job: EvaluationJob, offer: AdOffer, personas: List[Persona]) -> None:
+        with self._lock:
+            job.status = "running"
+        try:
+            asyncio.run(self._collect(job, offer, personas))
+            status, error = "done", None
+        except Exception as e:
+            status, error = "error", str(e)
+
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+
+    async def _collect(self, job: EvaluationJob, offer: AdOffer, personas: List[Persona]):
+        if config.JOB_QUEUE_PATH:
+            await self._collect_queued(job, offer, personas)
+            return
+
+        # Sessions testing the same offer at once share agent calls
+        orchestrator = AgentOrchestrator(agent_type=job.agent_type, coalesce=True)
+        try:
+            async for response in orchestrator.stream_offer_batch(offer, personas):
+                self._add(job, response)
+        finally:
+            await orchestrator.aclose()
+
+    async def _collect_queued(
+        self, job: EvaluationJob, offer: AdOffer, personas: List[Persona]
+    ) -> None:
+        # Workers evaluate with their own agent settings
+        queue = LocalJobQueue(Path(config.JOB_QUEUE_PATH))
+        offer_data = {
+            "id": offer.test_id,
+            "headline": offer.headline,
+            "body": offer.body,
+            "call_to_action": offer.call_to_action,
+            "price": offer.price,
+            "discount": offer.discount,
+        }
+        pending = set(
+            queue.add_many(
+                [{"personaId": persona.id, "offer": offer_data} for persona in personas],
+                priority="interactive",
+                tenant=QUEUE_TENANT,
+            )
+        )
+
+        # Every attempt may hold a full lease and wait out its backoff
+        timeout = sum(
+            queue.visibility_timeout + backoff_delay(attempt, queue.backoff_seconds)
+            for attempt in range(1, DEFAULT_ATTEMPTS + 1)
+        )
+        deadline = time.monotonic() + timeout
+
+        while pending:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"{len(pending)} of {job.total} queued evaluations did not finish "
+                    f"within {timeout:.0f}s; are queue workers running?"
+                )
+            await asyncio.sleep(QUEUE_POLL_SECONDS)
+            states = queue.results(list(pending))
+            for job_id in list(pending):
+                state = states.get(job_id)  # pruned jobs are gone: count them as failed
+                if state is not None and state["state"] == "completed":
+                    self._add(job, AgentResponse.model_validate(state["result"]))
+                elif state is not None and state["state"] != "failed":
+                    continue
+                pending.discard(job_id)
+
+    def _prune(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at or 0,
+        )
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager() -> JobManager:
+    """Job manager shared by all sessions of the server process"""
+    return JobManager()
@@ -4,13 +4,30 @@ import json
 import sys
 from pathlib import Path
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 
-# Add src to path
+# Add src and project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ad_testing_agents.storage import ResultFilter
+from dashboard.components.cache import (
+    get_results_store,
+    load_clusters,
+    load_manifest,
+    load_offer_history,
+    load_summaries,
+    run_key,
+)
+from dashboard.components.charts import (
+    decision_figure,
+    emotion_heatmap_figure,
+    offer_table,
+    offer_trend_figure,
+    offer_value_figure,
+    persona_bar_figure,
+    radar_figure,
+)
 
 st.set_page_config(page_title="Сравнение Офферов", page_icon="📊", layout="wide")
 
@@ -24,41 +41,46 @@ if not results_dir.exists():
     st.warning("📁 Нет результатов тестирования. Запустите `python scripts/run_batch_test.py`")
     st.stop()
 
-result_files = sorted(results_dir.glob("batch_test_*.json"), reverse=True)
+# Run manifest from the results store (refreshed when the directory changes)
+results_dir_mtime = results_dir.stat().st_mtime_ns
+manifest = load_manifest(str(results_dir), results_dir_mtime)
 
-if not result_files:
+if not manifest:
     st.warning("📁 Нет результатов тестирования. Запустите `python scripts/run_batch_test.py`")
     st.stop()
 
-# File selector
-selected_file = st.selectbox(
+runs = {run["run_id"]: run for run in manifest}
+
+# Run selector
+run_id = st.selectbox(
     "Выберите результаты теста",
-    options=result_files,
-    format_func=lambda x: f"{x.stem} ({x.stat().st_size // 1024} KB)"
+    options=list(runs),
+    format_func=lambda r: f"{r} ({runs[r]['num_results']} тестов, "
+    f"конверсия {runs[r]['conversion_rate']:.0%})",
 )
+run = runs[run_id]
 
-# Load data
-with open(selected_file) as f:
-    data = json.load(f)
-
-metadata = data["metadata"]
-results = data["results"]
+# Load data from the results store (cached per run version); runs written by
+# queue workers or merged from JSONL have no results file
+key = run_key(str(results_dir), run, results_dir_mtime)
 
 # Show metadata
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("Дата теста", metadata["test_date"][:10])
+    st.metric("Дата теста", (run["test_date"] or "")[:10])
 with col2:
-    st.metric("Офферов", metadata["num_offers"])
+    st.metric("Офферов", run["num_offers"])
 with col3:
-    st.metric("Персон", metadata["num_personas"])
+    st.metric("Персон", run["num_personas"])
 with col4:
-    st.metric("Всего тестов", metadata["num_results"])
+    st.metric("Всего тестов", run["num_results"])
 
 st.divider()
 
-# Convert to DataFrame
-df = pd.DataFrame(results)
+# Aggregates
+summaries = load_summaries(key)
+summary = summaries["overall"]
+offers = summaries["offers"]
 
 # Overall statistics
 st.header("📈 Общая статистика")
@@ -66,38 +88,24 @@ st.header("📈 Общая статистика")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    conversion_rate = (
-        df[df["decision"].isin(["strong_yes", "maybe_yes"])].shape[0] / len(df)
-    )
-    st.metric("Конверсия", f"{conversion_rate:.1%}")
+    st.metric("Конверсия", f"{summary['conversion_rate']:.1%}")
 
 with col2:
-    avg_value = df["perceived_value"].mean()
-    st.metric("Средняя ценность", f"{avg_value:.1f}/10")
+    st.metric("Средняя ценность", f"{summary['avg_value']:.1f}/10")
 
 with col3:
-    avg_confidence = df["confidence_score"].mean()
-    st.metric("Средняя уверенность", f"{avg_confidence:.0%}")
+    st.metric("Средняя уверенность", f"{summary['avg_confidence']:.0%}")
 
 with col4:
-    avg_emotion_intensity = df["emotion_intensity"].mean()
-    st.metric("Интенсивность эмоций", f"{avg_emotion_intensity:.0%}")
+    st.metric("Интенсивность эмоций", f"{summary['avg_emotion_intensity']:.0%}")
 
 st.divider()
 
 # Offer comparison
 st.header("🏆 Рейтинг офферов")
 
-# Aggregate by offer
-offer_stats = df.groupby("offer_headline").agg({
-    "perceived_value": "mean",
-    "confidence_score": "mean",
-    "decision": lambda x: (x.isin(["strong_yes", "maybe_yes"])).sum() / len(x),
-    "emotion_intensity": "mean"
-}).round(2)
-
-offer_stats.columns = ["Ср. ценность", "Ср. уверенность", "Конверсия", "Эмоции"]
-offer_stats = offer_stats.sort_values("Ср. ценность", ascending=False)
+# Aggregate by offer (already sorted by average value)
+offer_stats = offer_table(offers)
 
 # Display as table with ranking
 offer_stats_display = offer_stats.copy()
@@ -119,150 +127,169 @@ tab1, tab2, tab3, tab4 = st.tabs(["Ценность по офферам", "Эм
 
 with tab1:
     st.subheader("Средняя воспринимаемая ценность по офферам")
-
-    fig = px.bar(
-        offer_stats.reset_index(),
-        x="offer_headline",
-        y="Ср. ценность",
-        color="Конверсия",
-        color_continuous_scale="RdYlGn",
-        labels={"offer_headline": "Оффер", "Ср. ценность": "Средняя ценность (0-10)"},
-        height=500
-    )
-    fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(offer_value_figure(key), use_container_width=True)
 
 with tab2:
     st.subheader("Распределение эмоций по офферам")
-
-    emotion_by_offer = pd.crosstab(
-        df["offer_headline"],
-        df["primary_emotion"],
-        normalize="index"
-    ) * 100
-
-    fig = px.imshow(
-        emotion_by_offer.T,
-        labels=dict(x="Оффер", y="Эмоция", color="Процент (%)"),
-        color_continuous_scale="YlGnBu",
-        aspect="auto",
-        height=500
-    )
-    fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(emotion_heatmap_figure(key), use_container_width=True)
 
 with tab3:
     st.subheader("Распределение решений")
-
-    decision_counts = df.groupby(["offer_headline", "decision"]).size().reset_index(name="count")
-
-    fig = px.bar(
-        decision_counts,
-        x="offer_headline",
-        y="count",
-        color="decision",
-        labels={"offer_headline": "Оффер", "count": "Количество", "decision": "Решение"},
-        height=500,
-        color_discrete_map={
-            "strong_yes": "#22c55e",
-            "maybe_yes": "#84cc16",
-            "neutral": "#94a3b8",
-            "probably_not": "#f97316",
-            "strong_no": "#ef4444"
-        }
-    )
-    fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(decision_figure(key), use_container_width=True)
 
 with tab4:
     st.subheader("Детальное сравнение")
 
     # Radar chart for top 3 offers
-    top_3_offers = offer_stats.head(3).index.tolist()
-
-    top_3_data = []
-    for offer in top_3_offers:
-        offer_data = df[df["offer_headline"] == offer]
-        top_3_data.append({
-            "Оффер": offer[:40] + "...",
-            "Ценность": offer_data["perceived_value"].mean(),
-            "Конверсия": (offer_data["decision"].isin(["strong_yes", "maybe_yes"])).sum() / len(offer_data) * 10,
-            "Уверенность": offer_data["confidence_score"].mean() * 10,
-            "Эмоции": offer_data["emotion_intensity"].mean() * 10
-        })
-
-    fig = go.Figure()
-
-    for item in top_3_data:
-        fig.add_trace(go.Scatterpolar(
-            r=[item["Ценность"], item["Конверсия"], item["Уверенность"], item["Эмоции"]],
-            theta=["Ценность", "Конверсия x10", "Уверенность x10", "Эмоции x10"],
-            fill='toself',
-            name=item["Оффер"]
-        ))
-
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
-        showlegend=True,
-        height=500
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(radar_figure(key), use_container_width=True)
 
 st.divider()
 
 # Persona insights
 st.header("👥 Анализ по персонам")
 
-persona_stats = df.groupby("persona_name").agg({
-    "perceived_value": "mean",
-    "decision": lambda x: (x.isin(["strong_yes", "maybe_yes"])).sum() / len(x)
-}).round(2)
-
-persona_stats.columns = ["Ср. ценность", "Конверсия"]
-persona_stats = persona_stats.sort_values("Конверсия", ascending=False)
-
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Средняя ценность по персонам")
-    fig = px.bar(
-        persona_stats.reset_index(),
-        x="persona_name",
-        y="Ср. ценность",
-        color="Ср. ценность",
-        color_continuous_scale="Blues",
-        height=400
-    )
-    fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(persona_bar_figure(key, "Ср. ценность", "Blues"), use_container_width=True)
 
 with col2:
     st.subheader("Конверсия по персонам")
-    fig = px.bar(
-        persona_stats.reset_index(),
-        x="persona_name",
-        y="Конверсия",
-        color="Конверсия",
-        color_continuous_scale="Greens",
-        height=400
-    )
-    fig.update_xaxes(tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(persona_bar_figure(key, "Конверсия", "Greens"), use_container_width=True)
 
 st.divider()
 
+# Cross-run trends, drawn from per-run offer summaries only
+if len(manifest) > 1:
+    st.header("📈 Динамика по запускам")
+
+    history = load_offer_history(str(results_dir), results_dir_mtime)
+    trend_metrics = {
+        "avg_value": "Средняя ценность",
+        "conversion_rate": "Конверсия",
+        "avg_confidence": "Средняя уверенность",
+    }
+
+    col1, col2 = st.columns([3, 1])
+
+    with col1:
+        trend_offers = st.multiselect(
+            "Офферы",
+            options=history["offer_headline"].unique().tolist(),
+            default=offers["offer_headline"].head(3).tolist(),
+        )
+
+    with col2:
+        trend_metric = st.selectbox(
+            "Метрика", options=list(trend_metrics), format_func=trend_metrics.get
+        )
+
+    if trend_offers:
+        st.plotly_chart(
+            offer_trend_figure(
+                history[history["offer_headline"].isin(trend_offers)],
+                trend_metric,
+                trend_metrics[trend_metric],
+            ),
+            use_container_width=True,
+        )
+
+    st.divider()
+
 # Detailed results explorer
 st.header("🔍 Детальные результаты")
 
 selected_offer = st.selectbox(
     "Выберите оффер для детального просмотра",
-    options=df["offer_headline"].unique()
+    options=offers["offer_headline"].tolist()
 )
 
-offer_results = df[df["offer_headline"] == selected_offer]
+# Similar objections and suggestions grouped together
+cluster_columns = {
+    "label": "Формулировка",
+    "count": "Упоминаний",
+    "share": "Доля",
+    "variants": "Вариантов",
+}
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("⚠️ Частые возражения")
+    objection_clusters = load_clusters(key, selected_offer, "objections")
+    st.dataframe(objection_clusters.rename(columns=cluster_columns), hide_index=True)
+
+with col2:
+    st.subheader("💡 Что убедит")
+    convince_clusters = load_clusters(key, selected_offer, "what_would_convince")
+    st.dataframe(convince_clusters.rename(columns=cluster_columns), hide_index=True)
+
+# Results browser: filtering and paging run in the results store
+store = get_results_store(str(results_dir))
+offer_id = offers.index[offers["offer_headline"] == selected_offer][0]
+persona_names = summaries["personas"]["persona_name"].to_dict()
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    decision_filter = st.multiselect(
+        "Решение",
+        options=store.distinct(run_id, "decision", offer_id),
+        format_func=lambda d: d.replace("_", " ").title(),
+    )
+
+with col2:
+    persona_filter = st.multiselect(
+        "Персоны",
+        options=store.distinct(run_id, "persona_id", offer_id),
+        format_func=lambda p: persona_names.get(p, p),
+    )
+
+with col3:
+    search = st.text_input("Поиск по тексту", placeholder="дорого")
+
+result_filter = ResultFilter(
+    offer_id=offer_id,
+    decisions=decision_filter,
+    persona_ids=persona_filter,
+    search=search or None,
+)
+total = store.count(run_id, result_filter)
+
+# Keyset paging: cursors of the pages leading to the current one, reset when the view changes
+col1, col2, col3 = st.columns([2, 1, 1])
+
+with col1:
+    page_size = st.selectbox("На странице", options=[10, 20, 50], index=1)
+
+view = (run_id, result_filter, page_size)
+if st.session_state.get("results_view") != view:
+    st.session_state.results_view = view
+    st.session_state.result_cursors = [None]
+cursors = st.session_state.result_cursors
+
+result_page = store.page(run_id, result_filter, after=cursors[-1], limit=page_size)
+page_results = result_page.records
+
+with col2:
+    st.button("← Назад", disabled=len(cursors) == 1, on_click=cursors.pop)
+
+with col3:
+    st.button(
+        "Далее →",
+        disabled=result_page.cursor is None,
+        on_click=cursors.append,
+        args=(result_page.cursor,),
+    )
+
+offset = (len(cursors) - 1) * page_size
+if page_results:
+    st.caption(f"Показаны {offset + 1}–{offset + len(page_results)} из {total}")
+else:
+    st.info("Нет результатов по выбранным фильтрам")
 
-for _, result in offer_results.iterrows():
+for result in page_results:
     with st.expander(f"{result['persona_name']} — {result['primary_emotion'].title()} ({result['emotion_intensity']:.0%}) | {result['decision'].replace('_', ' ').title()}"):
         col1, col2 = st.columns([2, 1])
 
@@ -292,20 +319,20 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("📥 Скачать CSV"):
-        csv = df.to_csv(index=False)
+        csv = store.frame(run_id).to_csv(index=False)
         st.download_button(
             label="💾 Сохранить CSV",
             data=csv,
-            file_name=f"results_{selected_file.stem}.csv",
+            file_name=f"results_{run_id}.csv",
             mime="text/csv"
         )
 
 with col2:
     if st.button("📥 Скачать JSON"):
-        json_str = json.dumps(results, ensure_ascii=False, indent=2)
+        json_str = json.dumps(list(store.iter_records(run_id)), ensure_ascii=False, indent=2)
         st.download_button(
             label="💾 Сохранить JSON",
             data=json_str,
-            file_name=f"results_{selected_file.stem}.json",
+            file_name=f"results_{run_id}.json",
             mime="application/json"
         )
@@ -1,14 +1,48 @@
 """Agent simulation"""
 
+from .bandit import BanditScheduler, LeaderboardEntry
+from .cascade import CascadePolicy, CascadeStats
 from .claude_agent import ClaudeAgent
 from .claude_code_agent import ClaudeCodeAgent
+from .consensus import AgreementPolicy, ConsensusSampler, PairEstimate
+from .factorial import ComponentEffects, DesignResult, FactorialExperiment, OfferDesign
 from .mock_agent import MockAgent
 from .orchestrator import AgentOrchestrator, test_offer
+from .prescreen import HeuristicAgent, PrescreenScore, TriggerIndex
+from .rate_limit import RateLimiter
+from .sampling import SampledEstimate, StratifiedSampler
+from .sequential import ComparisonResult, OfferArm, SequentialComparison
+from .single_flight import FileSingleFlight, SingleFlight
+from .streaming import SCREENING_FIELDS, IncrementalJSONParser
 
 __all__ = [
     "ClaudeAgent",
     "ClaudeCodeAgent",
     "MockAgent",
+    "HeuristicAgent",
+    "TriggerIndex",
+    "PrescreenScore",
     "AgentOrchestrator",
     "test_offer",
+    "RateLimiter",
+    "CascadePolicy",
+    "CascadeStats",
+    "SingleFlight",
+    "FileSingleFlight",
+    "StratifiedSampler",
+    "SampledEstimate",
+    "SequentialComparison",
+    "ComparisonResult",
+    "OfferArm",
+    "BanditScheduler",
+    "LeaderboardEntry",
+    "OfferDesign",
+    "FactorialExperiment",
+    "DesignResult",
+    "ComponentEffects",
+    "ConsensusSampler",
+    "AgreementPolicy",
+    "PairEstimate",
+    "IncrementalJSONParser",
+    "SCREENING_FIELDS",
 ]
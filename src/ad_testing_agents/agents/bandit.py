@@ -0,0 +1,323 @@
+"""Multi-armed bandit scheduler for large offer pools"""
+
+import asyncio
+import json
+import math
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Literal, Tuple
+
+from ..analytics.stats import is_conversion, sample_variance, wilson_interval, z_value
+from ..models import AdOffer, AgentResponse, Persona
+from .orchestrator import AgentOrchestrator
+
+BanditStrategy = Literal["thompson", "ucb"]
+BanditReward = Literal["conversion", "perceived_value"]
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class ArmState:
+    """Statistics of one offer variant"""
+
+    offer_key: str
+    pulls: int = 0
+    failures: int = 0
+    conversions: int = 0
+    value_sum: float = 0.0
+    value_sq_sum: float = 0.0
+    cursor: int = 0  # next persona in this arm's persona order
+
+    @property
+    def conversion_rate(self) -> float:
+        return self.conversions / self.pulls if self.pulls else 0.0
+
+    @property
+    def avg_value(self) -> float:
+        return self.value_sum / self.pulls if self.pulls else 0.0
+
+    def reward_mean(self, reward: BanditReward) -> float:
+        """Mean reward scaled to [0, 1]"""
+        return self.conversion_rate if reward == "conversion" else self.avg_value / 10
+
+
+@dataclass
+class LeaderboardEntry:
+    """Ranked offer with uncertainty estimates"""
+
+    rank: int
+    offer: AdOffer
+    pulls: int
+    conversion_rate: float
+    conversion_ci: Tuple[float, float]
+    avg_value: float
+    value_ci: Tuple[float, float]
+    prob_best: float
+
+
+class BanditScheduler:
+    """
+    Allocates persona evaluations toward promising offers under a call budget.
+
+    Each batch, the strategy (Thompson sampling or UCB1) picks which offers get
+    the next evaluations; every offer walks through its own shuffled persona
+    order, so no persona sees the same offer twice. State can be checkpointed
+    to JSON after each batch and resumed later.
+    """
+
+    def __init__(
+        self,
+        orchestrator: AgentOrchestrator,
+        offers: List[AdOffer],
+        personas: List[Persona],
+        budget: int,
+        strategy: BanditStrategy = "thompson",
+        reward: BanditReward = "conversion",
+        batch_size: int = 8,
+        checkpoint_path: Path | None = None,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            orchestrator: Orchestrator used for the evaluations
+            offers: Offer variants (arms); test_id is used as the arm key if set
+            personas: Personas to evaluate the offers on
+            budget: Total number of evaluations (calls) to spend
+            strategy: "thompson" or "ucb"
+            reward: Reward the bandit optimises ("conversion" or "perceived_value")
+            batch_size: Evaluations scheduled per batch (run concurrently)
+            checkpoint_path: JSON file the state is saved to after every batch
+            seed: Seed for persona orders and posterior sampling
+        """
+        if not offers or not personas:
+            raise ValueError("Bandit needs at least one offer and one persona")
+
+        self.orchestrator = orchestrator
+        self.offers = offers
+        self.personas = personas
+        self.budget = budget
+        self.strategy = strategy
+        self.reward = reward
+        self.batch_size = batch_size
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.seed = seed
+
+        self.offer_keys = [offer.test_id or f"offer-{i}" for i, offer in enumerate(offers)]
+        if len(set(self.offer_keys)) != len(self.offer_keys):
+            raise ValueError("Offer test_id values must be unique")
+
+        self.arms = [ArmState(offer_key=key) for key in self.offer_keys]
+        self.spent = 0
+        self._rng = random.Random(seed)
+        self._orders = [self._persona_order(i) for i in range(len(offers))]
+
+    def _persona_order(self, arm_index: int) -> List[int]:
+        order = list(range(len(self.personas)))
+        random.Random(f"{self.seed}:{arm_index}").shuffle(order)
+        return order
+
+    # --- scheduling -------------------------------------------------------
+
+    def _available(self) -> List[int]:
+        return [i for i, arm in enumerate(self.arms) if arm.cursor < len(self.personas)]
+
+    def _score(self, arm: ArmState, total_pulls: int, planned: int = 0) -> float:
+        """
+        Selection score; `planned` evaluations already picked for this batch
+        count as virtual pulls at the current mean (virtual loss), so one
+        batch spreads over several promising arms instead of piling onto one.
+        """
+        pulls = arm.pulls + planned
+        if self.strategy == "ucb":
+            if pulls == 0:
+                return math.inf
+            bonus = math.sqrt(2 * math.log(max(total_pulls, 1)) / pulls)
+            return arm.reward_mean(self.reward) + bonus
+        return self._posterior_draw(arm, self._rng, planned)
+
+    def _posterior_draw(self, arm: ArmState, rng: random.Random, planned: int = 0) -> float:
+        mean = arm.reward_mean(self.reward)
+        if self.reward == "conversion":
+            successes = arm.conversions + planned * mean
+            return rng.betavariate(1 + successes, 1 + arm.pulls + planned - successes)
+
+        # Normal posterior on the scaled value, wide prior until there is data
+        if arm.pulls < 2:
+            return rng.gauss(0.5, 0.5 / math.sqrt(1 + planned))
+        variance = sample_variance(arm.value_sum / 10, arm.value_sq_sum / 100, arm.pulls)
+        return rng.gauss(mean, math.sqrt(max(variance, 1e-4) / (arm.pulls + planned)))
+
+    def _select(self, count: int) -> Dict[int, int]:
+        """Pick arms for the next `count` evaluations -> {arm_index: n}"""
+        picks: Dict[int, int] = {}
+        planned = {i: arm.cursor for i, arm in enumerate(self.arms)}
+        total_pulls = sum(arm.pulls for arm in self.arms)
+
+        for _ in range(count):
+            candidates = [i for i in self._available() if planned[i] < len(self.personas)]
+            if not candidates:
+                break
+            best = max(
+                candidates,
+                key=lambda i: self._score(self.arms[i], total_pulls, picks.get(i, 0)),
+            )
+            picks[best] = picks.get(best, 0) + 1
+            planned[best] += 1
+            total_pulls += 1
+        return picks
+
+    # --- running ----------------------------------------------------------
+
+    async def run(self) -> List[LeaderboardEntry]:
+        """
+        Spend the remaining budget and return the leaderboard.
+
+        Resumed schedulers continue where the checkpoint stopped.
+        """
+        while self.spent < self.budget:
+            picks = self._select(min(self.batch_size, self.budget - self.spent))
+            if not picks:
+                break
+
+            jobs = []
+            for arm_index, count in picks.items():
+                arm = self.arms[arm_index]
+                indices = self._orders[arm_index][arm.cursor : arm.cursor + count]
+                arm.cursor += count
+                personas = [self.personas[i] for i in indices]
+                jobs.append((arm_index, count, personas))
+
+            batches = await asyncio.gather(
+                *(
+                    self.orchestrator.test_offer_batch(self.offers[arm_index], personas)
+                    for arm_index, _, personas in jobs
+                )
+            )
+
+            for (arm_index, count, _), responses in zip(jobs, batches):
+                self._record(self.arms[arm_index], count, responses)
+                self.spent += count
+
+            if self.checkpoint_path:
+                self.save_checkpoint(self.checkpoint_path)
+
+        return self.leaderboard()
+
+    def _record(self, arm: ArmState, scheduled: int, responses: List[AgentResponse]) -> None:
+        arm.failures += scheduled - len(responses)
+        for response in responses:
+            arm.pulls += 1
+            arm.conversions += int(is_conversion(response.decision))
+            arm.value_sum += response.perceived_value
+            arm.value_sq_sum += response.perceived_value**2
+
+    # --- results ----------------------------------------------------------
+
+    def leaderboard(self, confidence: float = 0.95, draws: int = 1000) -> List[LeaderboardEntry]:
+        """
+        Rank offers by posterior mean reward.
+
+        Args:
+            confidence: Confidence level of the intervals
+            draws: Posterior draws used to estimate P(offer is best)
+        """
+        rng = random.Random(self.seed)
+        wins = [0] * len(self.arms)
+        for _ in range(draws):
+            samples = [self._posterior_draw(arm, rng) for arm in self.arms]
+            wins[max(range(len(samples)), key=samples.__getitem__)] += 1
+
+        z = z_value(confidence)
+        entries = []
+        for i, arm in enumerate(self.arms):
+            if arm.pulls >= 2:
+                variance = sample_variance(arm.value_sum, arm.value_sq_sum, arm.pulls)
+                half = z * math.sqrt(variance / arm.pulls)
+                value_ci = (max(0.0, arm.avg_value - half), min(10.0, arm.avg_value + half))
+            else:
+                value_ci = (0.0, 10.0)
+
+            entries.append(
+                LeaderboardEntry(
+                    rank=0,
+                    offer=self.offers[i],
+                    pulls=arm.pulls,
+                    conversion_rate=arm.conversion_rate,
+                    conversion_ci=wilson_interval(arm.conversions, arm.pulls, confidence),
+                    avg_value=arm.avg_value,
+                    value_ci=value_ci,
+                    prob_best=wins[i] / draws if draws else 0.0,
+                )
+            )
+
+        metric = (
+            (lambda e: e.conversion_rate) if self.reward == "conversion" else (lambda e: e.avg_value)
+        )
+        entries.sort(key=lambda e: (e.prob_best, metric(e)), reverse=True)
+        for rank, entry in enumerate(entries, 1):
+            entry.rank = rank
+        return entries
+
+    # --- checkpointing ----------------------------------------------------
+
+    def save_checkpoint(self, path: Path) -> None:
+        """Save scheduler state to JSON (written atomically)"""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "strategy": self.strategy,
+            "reward": self.reward,
+            "seed": self.seed,
+            "budget": self.budget,
+            "spent": self.spent,
+            "persona_ids": [p.id for p in self.personas],
+            "arms": [asdict(arm) for arm in self.arms],
+            "rng_state": _encode_rng_state(self._rng.getstate()),
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def load_checkpoint(self, path: Path) -> None:
+        """
+        Restore state saved by save_checkpoint().
+
+        Raises:
+            ValueError: If the checkpoint belongs to a different offer pool or persona set
+        """
+        state = json.loads(Path(path).read_text(encoding="utf-8"))
+
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported bandit checkpoint version: {state.get('version')}")
+        if [arm["offer_key"] for arm in state["arms"]] != self.offer_keys:
+            raise ValueError("Checkpoint was created for a different offer pool")
+        if state["persona_ids"] != [p.id for p in self.personas]:
+            raise ValueError("Checkpoint was created for a different persona set")
+        if state["seed"] != self.seed:
+            raise ValueError("Checkpoint was created with a different seed")
+
+        self.strategy = state["strategy"]
+        self.reward = state["reward"]
+        self.spent = state["spent"]
+        self.arms = [ArmState(**arm) for arm in state["arms"]]
+        self._rng.setstate(_decode_rng_state(state["rng_state"]))
+
+    def __repr__(self) -> str:
+        return (
+            f"BanditScheduler(arms={len(self.arms)}, strategy={self.strategy}, "
+            f"spent={self.spent}/{self.budget})"
+        )
+
+
+def _encode_rng_state(state: tuple) -> list:
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def _decode_rng_state(state: list) -> tuple:
+    version, internal, gauss_next = state
+    return version, tuple(internal), gauss_next
@@ -0,0 +1,145 @@
+"""Model cascade: a cheap model first, the strong model only when needed
+
+An evaluation is escalated from the cheap to the strong model when the cheap
+response is not confident enough, cannot be parsed, or sits on the decision
+boundary (the persona is indifferent, so a weaker model is most likely to tip
+the decision either way). CascadeStats reports the cost and latency saved
+against running every evaluation on the strong model.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+from ..config import config
+from ..models import AgentResponse, Decision
+
+# USD per million (input, output) tokens, list prices, for savings estimates
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "haiku": (1.0, 5.0),
+    "sonnet": (3.0, 15.0),
+    "opus": (15.0, 75.0),
+}
+
+CHEAP_TIER = "cheap"
+STRONG_TIER = "strong"
+
+
+def estimate_cost(model: str, input_tokens: int | None, output_tokens: int | None) -> float | None:
+    """Estimated USD cost of one call (None if usage or price is unknown)"""
+    if input_tokens is None or output_tokens is None:
+        return None
+    for family, (input_price, output_price) in MODEL_PRICES.items():
+        if family in model:
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return None
+
+
+@dataclass
+class CascadePolicy:
+    """When to escalate a cheap-model evaluation to the strong model"""
+
+    cheap_model: str = field(default_factory=lambda: config.CASCADE_MODEL)
+    strong_model: str | None = None  # None: the orchestrator's model
+    confidence_threshold: float = field(
+        default_factory=lambda: config.CASCADE_CONFIDENCE_THRESHOLD
+    )
+    boundary_decisions: Tuple[Decision, ...] = (Decision.NEUTRAL,)
+
+    def escalation_reason(self, response: AgentResponse) -> str | None:
+        """Why the response needs the strong model (None if it can be kept)"""
+        if response.confidence_score < self.confidence_threshold:
+            return "low_confidence"
+        if response.decision in self.boundary_decisions:
+            return "boundary_decision"
+        return None
+
+    @property
+    def key(self) -> str:
+        """Identifies the policy in single-flight keys"""
+        return f"{self.cheap_model}>{self.strong_model}@{self.confidence_threshold}"
+
+
+@dataclass
+class CascadeStats:
+    """Tier usage, cost and latency of cascaded evaluations"""
+
+    evaluations: int = 0
+    escalations: Dict[str, int] = field(default_factory=dict)
+    calls: Dict[str, int] = field(default_factory=lambda: {CHEAP_TIER: 0, STRONG_TIER: 0})
+    latency_ms: Dict[str, float] = field(default_factory=lambda: {CHEAP_TIER: 0, STRONG_TIER: 0})
+    cost_usd: float = 0.0
+    baseline_cost_usd: float = 0.0
+    cost_known: bool = True
+
+    def record_call(self, tier: str, latency_ms: float) -> None:
+        self.calls[tier] += 1
+        self.latency_ms[tier] += latency_ms
+
+    def record(
+        self,
+        policy: CascadePolicy,
+        cheap: AgentResponse | None,
+        strong: AgentResponse | None,
+        reason: str | None,
+    ) -> None:
+        """Account for one finished evaluation"""
+        self.evaluations += 1
+        if reason:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+        cheap_cost = (
+            estimate_cost(policy.cheap_model, cheap.input_tokens, cheap.output_tokens)
+            if cheap
+            else 0.0
+        )
+        if strong is not None:
+            strong_cost = estimate_cost(
+                policy.strong_model, strong.input_tokens, strong.output_tokens
+            )
+            actual, baseline = (
+                (cheap_cost + strong_cost, strong_cost)
+                if cheap_cost is not None and strong_cost is not None
+                else (None, None)
+            )
+        else:
+            # The strong model would have used about as many tokens as the cheap one
+            actual = cheap_cost
+            baseline = estimate_cost(policy.strong_model, cheap.input_tokens, cheap.output_tokens)
+
+        if actual is None or baseline is None:
+            self.cost_known = False
+        else:
+            self.cost_usd += actual
+            self.baseline_cost_usd += baseline
+
+    @property
+    def escalated(self) -> int:
+        return sum(self.escalations.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary for run metadata"""
+        strong_calls = self.calls[STRONG_TIER]
+        total_latency = self.latency_ms[CHEAP_TIER] + self.latency_ms[STRONG_TIER]
+        # All-strong latency, estimated from the escalated calls
+        baseline_latency = (
+            self.latency_ms[STRONG_TIER] / strong_calls * self.evaluations
+            if strong_calls
+            else None
+        )
+        known_cost = self.cost_known and self.baseline_cost_usd > 0
+
+        return {
+            "evaluations": self.evaluations,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.evaluations if self.evaluations else 0.0,
+            "escalations": dict(self.escalations),
+            "calls": dict(self.calls),
+            "latency_ms": round(total_latency),
+            "baseline_latency_ms": round(baseline_latency) if baseline_latency else None,
+            "latency_savings": (
+                1 - total_latency / baseline_latency if baseline_latency else None
+            ),
+            "cost_usd": round(self.cost_usd, 4) if known_cost else None,
+            "baseline_cost_usd": round(self.baseline_cost_usd, 4) if known_cost else None,
+            "cost_savings": 1 - self.cost_usd / self.baseline_cost_usd if known_cost else None,
+        }
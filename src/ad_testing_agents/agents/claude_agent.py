@@ -3,13 +3,18 @@
 import json
 import time
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
 
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 
 from ..config import config
 from ..models import AdOffer, AgentResponse, Persona
-from ..prompts import generate_evaluation_prompt, generate_system_prompt
+from ..prompts import (
+    generate_evaluation_prompt,
+    generate_listwise_prompt,
+    generate_system_prompt,
+)
+from .streaming import IncrementalJSONParser, fill_skipped, required_fields
 
 
 class ClaudeAgent:
@@ -20,22 +25,35 @@ class ClaudeAgent:
         persona: Persona,
         model: str | None = None,
         timeout: int | None = None,
+        stop_after: Sequence[str] | None = None,
+        client: AsyncAnthropic | None = None,
     ):
         """
         Args:
             persona: Persona to simulate
             model: Claude model to use (default from config)
             timeout: Timeout in seconds (default from config)
+            stop_after: Stream the response and stop generation as soon as
+                these fields (plus emotion_intensity and confidence_score)
+                are parsed; the fields not generated are left empty
+            client: Shared API client (default: a client of this agent's own);
+                the owner of a shared client closes it
         """
         self.persona = persona
         self.model = model or config.DEFAULT_MODEL
         self.timeout = timeout or config.AGENT_TIMEOUT_SECONDS
+        self.stop_after = required_fields(stop_after) if stop_after else None
+
+        if client is not None:
+            # with_options() copies the client but keeps its connection pool
+            self.client = client.with_options(timeout=timeout) if timeout else client
+            return
 
         # Validate API key
         if not config.ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY not set in environment")
 
-        self.client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
+        self.client = AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY, timeout=self.timeout)
 
     async def evaluate_offer(self, offer: AdOffer) -> AgentResponse:
         """
@@ -47,6 +65,9 @@ class ClaudeAgent:
         Returns:
             Structured agent response
         """
+        if self.stop_after:
+            return await self._evaluate_streaming(offer)
+
         # Generate prompts
         system_prompt = generate_system_prompt(self.persona)
         evaluation_prompt = generate_evaluation_prompt(offer, self.persona)
@@ -55,7 +76,7 @@ class ClaudeAgent:
         start_time = time.time()
 
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2048,
                 temperature=0.7,
@@ -72,6 +93,8 @@ class ClaudeAgent:
             agent_data = self._parse_response(response_text, offer)
             agent_data["response_time_ms"] = response_time_ms
             agent_data["model_used"] = self.model
+            agent_data["input_tokens"] = response.usage.input_tokens
+            agent_data["output_tokens"] = response.usage.output_tokens
 
             return AgentResponse(**agent_data)
 
@@ -80,6 +103,108 @@ class ClaudeAgent:
                 f"Failed to evaluate offer for persona {self.persona.id}: {e}"
             ) from e
 
+    async def _evaluate_streaming(self, offer: AdOffer) -> AgentResponse:
+        """
+        Stream the response and close the stream once the stop_after fields are parsed.
+
+        The prompt asks for those fields first. Closing the stream ends
+        generation, so the prose fields are neither waited for nor paid for.
+        The API reports output tokens only for finished messages, so
+        output_tokens is None when generation was stopped early.
+        """
+        system_prompt = generate_system_prompt(self.persona)
+        evaluation_prompt = generate_evaluation_prompt(
+            offer, self.persona, field_order=self.stop_after
+        )
+        parser = IncrementalJSONParser()
+        text, input_tokens, output_tokens, stopped = [], None, None, False
+
+        start_time = time.time()
+
+        try:
+            async with self.client.messages.stream(
+                model=self.model,
+                max_tokens=2048,
+                temperature=0.7,
+                system=system_prompt,
+                messages=[{"role": "user", "content": evaluation_prompt}],
+            ) as stream:
+                async for event in stream:
+                    if event.type == "message_start":
+                        input_tokens = event.message.usage.input_tokens
+                    elif event.type == "text":
+                        text.append(event.text)
+                        parser.feed(event.text)
+                        if parser.has(self.stop_after):
+                            stopped = True
+                            break
+                    elif event.type == "message_delta":
+                        output_tokens = event.usage.output_tokens
+
+            response_time_ms = int((time.time() - start_time) * 1000)
+
+            if stopped:
+                agent_data = fill_skipped(parser.fields)
+                agent_data.update(self._metadata(offer))
+            else:
+                agent_data = self._parse_response("".join(text), offer)
+            agent_data["response_time_ms"] = response_time_ms
+            agent_data["model_used"] = self.model
+            agent_data["input_tokens"] = input_tokens
+            agent_data["output_tokens"] = output_tokens
+
+            return AgentResponse(**agent_data)
+
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to evaluate offer for persona {self.persona.id}: {e}"
+            ) from e
+
+    async def evaluate_offers(self, offers: List[AdOffer]) -> List[AgentResponse]:
+        """
+        Evaluate and rank several ad offers as this persona in one call.
+
+        The system prompt and instructions are sent once for all offers. Token
+        usage is split evenly across the returned responses.
+
+        Args:
+            offers: Ad offers to compare (2 or more)
+
+        Returns:
+            One response per offer, in the given order, with `rank` set
+        """
+        system_prompt = generate_system_prompt(self.persona)
+        listwise_prompt = generate_listwise_prompt(offers, self.persona)
+
+        start_time = time.time()
+
+        try:
+            response = await self.client.messages.create(
+                model=self.model,
+                max_tokens=1024 + 1024 * len(offers),
+                temperature=0.7,
+                system=system_prompt,
+                messages=[{"role": "user", "content": listwise_prompt}],
+            )
+
+            response_time_ms = int((time.time() - start_time) * 1000)
+            items = self._parse_listwise(response.content[0].text, offers)
+
+            count = len(offers)
+            responses = []
+            for agent_data in items:
+                agent_data["response_time_ms"] = response_time_ms
+                agent_data["model_used"] = self.model
+                agent_data["input_tokens"] = response.usage.input_tokens // count
+                agent_data["output_tokens"] = response.usage.output_tokens // count
+                responses.append(AgentResponse(**agent_data))
+            return responses
+
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to rank offers for persona {self.persona.id}: {e}"
+            ) from e
+
     def _parse_response(self, response_text: str, offer: AdOffer) -> Dict[str, Any]:
         """
         Parse Claude's response into structured data.
@@ -91,6 +216,39 @@ class ClaudeAgent:
         Returns:
             Dict compatible with AgentResponse model
         """
+        data = self._load_json(response_text)
+        data.update(self._metadata(offer))
+        return data
+
+    def _parse_listwise(self, response_text: str, offers: List[AdOffer]) -> List[Dict[str, Any]]:
+        """
+        Parse a listwise response into one AgentResponse dict per offer.
+
+        Returns:
+            Dicts in the order of `offers`, with `rank` from the ranking
+        """
+        data = self._load_json(response_text)
+        numbers = list(range(1, len(offers) + 1))
+
+        evaluations = {int(item.get("offer", 0)): item for item in data.get("evaluations", [])}
+        if sorted(evaluations) != numbers:
+            raise ValueError(f"Expected evaluations of offers {numbers}, got {sorted(evaluations)}")
+
+        ranking = [int(number) for number in data.get("ranking") or []]
+        if sorted(ranking) != numbers:
+            # Fall back to the evaluations themselves if the ranking is malformed
+            ranking = sorted(numbers, key=lambda n: -evaluations[n]["perceived_value"])
+
+        results = []
+        for number, offer in zip(numbers, offers):
+            item = {key: value for key, value in evaluations[number].items() if key != "offer"}
+            item.update(self._metadata(offer))
+            item["rank"] = ranking.index(number) + 1
+            results.append(item)
+        return results
+
+    @staticmethod
+    def _load_json(response_text: str) -> Dict[str, Any]:
         # Extract JSON from response (might be wrapped in markdown code blocks)
         json_text = response_text.strip()
 
@@ -107,18 +265,20 @@ class ClaudeAgent:
 
         # Parse JSON
         try:
-            data = json.loads(json_text)
+            return json.loads(json_text)
         except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON response: {e}\n\nResponse: {response_text}") from e
-
-        # Add metadata
-        data["persona_id"] = self.persona.id
-        data["persona_name"] = f"{self.persona.name} ({self.persona.description})"
-        data["test_id"] = offer.test_id or f"test-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        data["offer_headline"] = offer.headline
-        data["timestamp"] = datetime.now()
+            raise ValueError(
+                f"Failed to parse JSON response: {e}\n\nResponse: {response_text}"
+            ) from e
 
-        return data
+    def _metadata(self, offer: AdOffer) -> Dict[str, Any]:
+        return {
+            "persona_id": self.persona.id,
+            "persona_name": f"{self.persona.name} ({self.persona.description})",
+            "test_id": offer.test_id or f"test-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+            "offer_headline": offer.headline,
+            "timestamp": datetime.now(),
+        }
 
     def __repr__(self) -> str:
         return f"ClaudeAgent(persona={self.persona.id}, model={self.model})"
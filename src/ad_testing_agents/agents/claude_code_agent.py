@@ -1,5 +1,6 @@
 """Claude Code Agent - uses Claude Code (CLI) instead of direct API"""
 
+import asyncio
 import json
 import subprocess
 import tempfile
@@ -53,7 +54,9 @@ class ClaudeCodeAgent:
         try:
             # Call Claude Code CLI
             # Note: This assumes claude CLI is available in PATH
-            result = subprocess.run(
+            # Run in a worker thread so concurrent agents don't block the event loop
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ['claude', '--message-file', prompt_file, '--format', 'json'],
                 capture_output=True,
                 text=True,
@@ -0,0 +1,164 @@
+"""Repeated sampling of noisy evaluations, stopped early on agreement
+
+At temperature 0.7 one evaluation of a (persona, offer) pair is a noisy
+sample. ConsensusSampler draws a few samples per pair and keeps drawing only
+while they disagree: the pair is settled once enough samples share the same
+decision and their perceived values are close. Clear-cut pairs cost
+`min_samples` calls; only genuinely ambiguous pairs use up to `max_samples`.
+"""
+
+import asyncio
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ..models import AdOffer, AgentResponse, Decision, Persona
+from .orchestrator import AgentOrchestrator
+
+
+@dataclass
+class AgreementPolicy:
+    """When repeated samples of one pair agree enough to stop"""
+
+    min_samples: int = 2
+    max_samples: int = 5
+    decision_agreement: float = 0.8  # share of samples with the modal decision
+    max_value_std: float = 1.0  # perceived value standard deviation (0-10 scale)
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.min_samples <= self.max_samples:
+            raise ValueError("Need 1 <= min_samples <= max_samples")
+
+
+@dataclass
+class PairEstimate:
+    """Samples of one (offer, persona) pair and their agreement"""
+
+    offer: AdOffer
+    persona_id: str
+    samples: List[AgentResponse] = field(default_factory=list)
+
+    @property
+    def decision_counts(self) -> Dict[Decision, int]:
+        return dict(Counter(sample.decision for sample in self.samples).most_common())
+
+    @property
+    def decision(self) -> Decision:
+        """Modal decision (ties: the earliest sample's)"""
+        return next(iter(self.decision_counts))
+
+    @property
+    def decision_agreement(self) -> float:
+        return self.decision_counts[self.decision] / len(self.samples)
+
+    @property
+    def value_mean(self) -> float:
+        return sum(sample.perceived_value for sample in self.samples) / len(self.samples)
+
+    @property
+    def value_std(self) -> float:
+        """Sample standard deviation of the perceived value (0 for one sample)"""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        mean = self.value_mean
+        return math.sqrt(sum((s.perceived_value - mean) ** 2 for s in self.samples) / (n - 1))
+
+    def agrees(self, policy: AgreementPolicy) -> bool:
+        return (
+            len(self.samples) >= policy.min_samples
+            and self.decision_agreement >= policy.decision_agreement
+            and self.value_std <= policy.max_value_std
+        )
+
+    def response(self) -> AgentResponse:
+        """
+        Consensus response: the modal-decision sample closest to the mean value,
+        with the mean value and the agreement statistics.
+        """
+        representative = min(
+            (sample for sample in self.samples if sample.decision == self.decision),
+            key=lambda sample: abs(sample.perceived_value - self.value_mean),
+        )
+        return representative.model_copy(
+            update={
+                "perceived_value": self.value_mean,
+                "samples": len(self.samples),
+                "decision_agreement": self.decision_agreement,
+                "value_std": self.value_std,
+            }
+        )
+
+
+@dataclass
+class ConsensusStats:
+    """Samples spent across pairs"""
+
+    pairs: int = 0
+    samples: int = 0
+    ambiguous: int = 0  # pairs that reached max_samples without agreement
+    value_std_sum: float = 0.0
+
+    def record(self, estimate: PairEstimate, policy: AgreementPolicy) -> None:
+        self.pairs += 1
+        self.samples += len(estimate.samples)
+        self.ambiguous += int(not estimate.agrees(policy))
+        self.value_std_sum += estimate.value_std
+
+    def to_dict(self, policy: AgreementPolicy) -> Dict[str, Any]:
+        """Summary for run metadata"""
+        fixed = self.pairs * policy.max_samples
+        return {
+            "pairs": self.pairs,
+            "samples": self.samples,
+            "samples_per_pair": self.samples / self.pairs if self.pairs else 0.0,
+            "ambiguous_pairs": self.ambiguous,
+            "mean_value_std": self.value_std_sum / self.pairs if self.pairs else 0.0,
+            "max_samples_per_pair": policy.max_samples,
+            "savings": 1 - self.samples / fixed if fixed else 0.0,
+        }
+
+
+class ConsensusSampler:
+    """Adaptive multi-sample evaluation of (offer, persona) pairs"""
+
+    def __init__(self, orchestrator: AgentOrchestrator, policy: AgreementPolicy | None = None):
+        """
+        Args:
+            orchestrator: Orchestrator used for the samples (identical calls
+                are not coalesced: every sample is a fresh agent call)
+            policy: Stopping rule (default: AgreementPolicy())
+        """
+        self.orchestrator = orchestrator
+        self.policy = policy or AgreementPolicy()
+        self.stats = ConsensusStats()
+
+    async def evaluate(self, offer: AdOffer, persona: Persona) -> PairEstimate:
+        """Sample one pair until its samples agree or max_samples is reached"""
+        estimate = PairEstimate(offer, persona.id)
+        while len(estimate.samples) < self.policy.max_samples:
+            draws = self.policy.min_samples if not estimate.samples else 1
+            estimate.samples.extend(
+                await asyncio.gather(
+                    *(self.orchestrator.sample(offer, persona) for _ in range(draws))
+                )
+            )
+            if estimate.agrees(self.policy):
+                break
+
+        self.stats.record(estimate, self.policy)
+        return estimate
+
+    async def evaluate_batch(self, offer: AdOffer, personas: List[Persona]) -> List[PairEstimate]:
+        """Sample all personas concurrently; failed personas are reported and skipped"""
+        results = await asyncio.gather(
+            *(self.evaluate(offer, persona) for persona in personas), return_exceptions=True
+        )
+        estimates = []
+        for persona, result in zip(personas, results):
+            if isinstance(result, Exception):
+                print(f"Warning: Agent for {persona.id} failed: {result}")
+            else:
+                estimates.append(result)
+        return estimates
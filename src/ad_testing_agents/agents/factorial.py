@@ -0,0 +1,315 @@
+"""Fractional-factorial offer design with per-component effect estimation
+
+A design varies a few offer components (headline, body, price, discount,
+call to action, ...) over given levels. Instead of the full grid of
+combinations, a D-optimal fraction is evaluated: the fewest combinations
+that still estimate every component's main effects well. For 2-level
+components and a power-of-two number of runs the search recovers a
+regular fractional factorial (orthogonal columns). An additive main-effects
+model fitted per persona segment then predicts the best combination,
+including combinations that were never evaluated.
+"""
+
+import asyncio
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from ..analytics.stats import is_conversion
+from ..models import AdOffer, AgentResponse, Persona
+from .orchestrator import AgentOrchestrator
+from .sequential import ComparisonMetric
+
+# Offer fields a design can vary; None as a level omits an optional field
+FACTOR_FIELDS = ("headline", "body", "call_to_action", "price", "discount", "image_description")
+_REQUIRED_FIELDS = ("headline", "body", "call_to_action")
+MAX_CANDIDATES = 20_000  # larger grids are searched on a random subset of combinations
+ALL_SEGMENTS = "all"
+
+Level = str | None
+
+
+def age_segment(persona: Persona) -> str:
+    """Default segment of a persona: its age group"""
+    return persona.age_group.value
+
+
+class OfferDesign:
+    """Offer components and their levels, on top of a base offer"""
+
+    def __init__(self, base: AdOffer, factors: Dict[str, Sequence[Level]]):
+        """
+        Args:
+            base: Offer supplying every field that is not varied
+            factors: Offer field -> levels to try (at least two per field)
+        """
+        if not factors:
+            raise ValueError("A design needs at least one factor")
+        for name, levels in factors.items():
+            if name not in FACTOR_FIELDS:
+                raise ValueError(f"Unknown offer field {name!r}; use one of {FACTOR_FIELDS}")
+            if len(levels) < 2 or len(set(levels)) != len(levels):
+                raise ValueError(f"Factor {name!r} needs at least two distinct levels")
+            if name in _REQUIRED_FIELDS and None in levels:
+                raise ValueError(f"Factor {name!r} is required and cannot be omitted")
+
+        self.base = base
+        self.factors = {name: list(levels) for name, levels in factors.items()}
+
+    @property
+    def full_size(self) -> int:
+        """Combinations in the full grid"""
+        return math.prod(len(levels) for levels in self.factors.values())
+
+    @property
+    def parameters(self) -> int:
+        """Coefficients of the main-effects model (intercept + levels - 1 per factor)"""
+        return 1 + sum(len(levels) - 1 for levels in self.factors.values())
+
+    def model_matrix(self, runs: np.ndarray) -> np.ndarray:
+        """
+        Effect-coded main-effects matrix of level-index rows.
+
+        Level k < L-1 of a factor is +1 in its own column; the last level is
+        -1 in all the factor's columns, so effects are deviations from the mean.
+        """
+        columns = [np.ones(len(runs))]
+        for position, levels in enumerate(self.factors.values()):
+            for level in range(len(levels) - 1):
+                column = (runs[:, position] == level).astype(float)
+                column[runs[:, position] == len(levels) - 1] = -1.0
+                columns.append(column)
+        return np.column_stack(columns)
+
+    def select(self, runs: int | None = None, seed: int = 42, starts: int = 10) -> np.ndarray:
+        """
+        D-optimal fraction of the grid (Fedorov exchange).
+
+        Args:
+            runs: Combinations to evaluate (default: twice the model size,
+                  capped at the full grid)
+            seed: Seed of the starting designs and candidate subset
+            starts: Random starting designs (the exchange finds local optima)
+
+        Returns:
+            (runs, factors) array of level indexes
+        """
+        sizes = [len(levels) for levels in self.factors.values()]
+        if runs is None:
+            runs = min(self.full_size, 2 * self.parameters)
+        if not self.parameters <= runs <= self.full_size:
+            raise ValueError(
+                f"Runs must be between {self.parameters} (model size) and {self.full_size}"
+            )
+
+        rng = np.random.default_rng(seed)
+        if self.full_size <= MAX_CANDIDATES:
+            candidates = np.array(list(itertools.product(*map(range, sizes))))
+        else:
+            candidates = np.unique(
+                np.column_stack([rng.integers(size, size=MAX_CANDIDATES) for size in sizes]),
+                axis=0,
+            )
+        if runs == len(candidates):
+            return candidates
+
+        x = self.model_matrix(candidates)
+        best, best_logdet = None, -np.inf
+        for _ in range(starts):
+            chosen = _exchange(x, rng.choice(len(candidates), size=runs, replace=False))
+            logdet = np.linalg.slogdet(x[chosen].T @ x[chosen])[1]
+            if logdet > best_logdet + 1e-9:
+                best, best_logdet = chosen, logdet
+        return candidates[np.sort(best)]
+
+    def levels(self, run: Sequence[int]) -> Dict[str, Level]:
+        """Field -> level of one level-index row"""
+        return {
+            name: levels[int(index)]
+            for (name, levels), index in zip(self.factors.items(), run)
+        }
+
+    def offer(self, run: Sequence[int], test_id: str) -> AdOffer:
+        """Base offer with the levels of one run"""
+        return self.base.model_copy(update={**self.levels(run), "test_id": test_id})
+
+    def efficiency(self, runs: np.ndarray) -> float:
+        """D-efficiency of a fraction (1.0 for an orthogonal design)"""
+        x = self.model_matrix(runs)
+        determinant = np.linalg.det(x.T @ x / len(runs))
+        return float(max(determinant, 0.0) ** (1 / x.shape[1]))
+
+
+def _exchange(x: np.ndarray, chosen: np.ndarray) -> np.ndarray:
+    """Swap design rows for candidate rows while det(X'X) grows"""
+    information = x[chosen].T @ x[chosen] + 1e-6 * np.eye(x.shape[1])
+    for _ in range(20 * len(chosen)):
+        inverse = np.linalg.inv(information)
+        variance = np.einsum("ij,jk,ik->i", x, inverse, x)  # d(x) for all candidates
+        available = np.ones(len(x), dtype=bool)
+        available[chosen] = False
+
+        best_gain, best_swap = 1e-9, None
+        for slot, index in enumerate(chosen):
+            cross = x @ (inverse @ x[index])
+            # Relative change of det(X'X) when swapping the run for each candidate
+            gain = variance - variance[index] - (variance * variance[index] - cross**2)
+            gain[~available] = -np.inf
+            candidate = int(np.argmax(gain))
+            if gain[candidate] > best_gain:
+                best_gain, best_swap = gain[candidate], (slot, candidate)
+
+        if best_swap is None:
+            break
+        slot, candidate = best_swap
+        removed, chosen[slot] = x[chosen[slot]], candidate
+        information += np.outer(x[candidate], x[candidate]) - np.outer(removed, removed)
+    return chosen
+
+
+@dataclass
+class ComponentEffects:
+    """Main effects of the offer components for one persona segment"""
+
+    segment: str
+    intercept: float
+    effects: Dict[str, List[float]]  # field -> effect per level (sums to 0)
+    observations: int
+
+    def predict(self, run: Sequence[int]) -> float:
+        return self.intercept + sum(
+            effects[int(index)] for effects, index in zip(self.effects.values(), run)
+        )
+
+    def best_run(self) -> Tuple[int, ...]:
+        """Best level of every component (the model is additive)"""
+        return tuple(int(np.argmax(effects)) for effects in self.effects.values())
+
+
+@dataclass
+class DesignResult:
+    """Evaluated fraction and the fitted component effects"""
+
+    design: OfferDesign
+    runs: np.ndarray
+    offers: List[AdOffer]
+    metric: ComparisonMetric
+    responses: List[List[AgentResponse]] = field(default_factory=list)  # per run
+    effects: Dict[str, ComponentEffects] = field(default_factory=dict)
+    personas: int = 0
+
+    @property
+    def evaluations(self) -> int:
+        return sum(len(responses) for responses in self.responses)
+
+    @property
+    def full_grid_evaluations(self) -> int:
+        return self.design.full_size * self.personas
+
+    def best(self, segment: str = ALL_SEGMENTS) -> Tuple[AdOffer, float]:
+        """Predicted best combination for a segment and its predicted metric"""
+        effects = self.effects[segment]
+        run = effects.best_run()
+        return self.design.offer(run, f"{self.design.base.test_id or 'design'}-best"), (
+            effects.predict(run)
+        )
+
+
+class FactorialExperiment:
+    """Runs an offer design through the orchestrator and fits main effects"""
+
+    def __init__(
+        self,
+        orchestrator: AgentOrchestrator,
+        personas: List[Persona],
+        segment_key: Callable[[Persona], Hashable] = age_segment,
+        metric: ComparisonMetric = "perceived_value",
+    ):
+        """
+        Args:
+            orchestrator: Orchestrator used for the evaluations
+            personas: Personas every combination is evaluated on
+            segment_key: Maps a persona to its segment (default: age group)
+            metric: Outcome modelled ("perceived_value" or "conversion")
+        """
+        if not personas:
+            raise ValueError("No personas to evaluate the design on")
+
+        self.orchestrator = orchestrator
+        self.personas = personas
+        self.segment_key = segment_key
+        self.metric = metric
+
+    async def run(
+        self,
+        design: OfferDesign,
+        runs: int | None = None,
+        seed: int = 42,
+        fraction: np.ndarray | None = None,
+    ) -> DesignResult:
+        """
+        Evaluate a D-optimal fraction of the design and fit the effects.
+
+        Args:
+            design: Components and levels to test
+            runs: Combinations to evaluate (default: see OfferDesign.select)
+            seed: Seed of the design search
+            fraction: Level-index rows to evaluate instead of a searched fraction
+
+        Returns:
+            Result with effects for every segment and for all personas
+        """
+        if fraction is None:
+            fraction = design.select(runs, seed)
+        prefix = design.base.test_id or "design"
+        offers = [design.offer(run, f"{prefix}-r{i + 1}") for i, run in enumerate(fraction)]
+        batches = await asyncio.gather(
+            *(self.orchestrator.test_offer_batch(offer, self.personas) for offer in offers)
+        )
+
+        result = DesignResult(
+            design, fraction, offers, self.metric, list(batches), personas=len(self.personas)
+        )
+        segments = {persona.id: str(self.segment_key(persona)) for persona in self.personas}
+        rows: Dict[str, List[Tuple[int, float]]] = {}
+        for index, responses in enumerate(batches):
+            for response in responses:
+                outcome = (
+                    float(is_conversion(response.decision))
+                    if self.metric == "conversion"
+                    else response.perceived_value
+                )
+                for segment in (ALL_SEGMENTS, segments[response.persona_id]):
+                    rows.setdefault(segment, []).append((index, outcome))
+
+        for segment, observations in rows.items():
+            result.effects[segment] = fit_effects(design, fraction, observations, segment)
+        return result
+
+
+def fit_effects(
+    design: OfferDesign,
+    runs: np.ndarray,
+    observations: List[Tuple[int, float]],
+    segment: str = ALL_SEGMENTS,
+) -> ComponentEffects:
+    """
+    Least-squares main effects from (run index, outcome) observations.
+
+    Effects a segment's data cannot identify (failed evaluations) come out as
+    the minimum-norm solution, i.e. shrunk towards zero.
+    """
+    indexes = np.array([index for index, _ in observations])
+    outcomes = np.array([outcome for _, outcome in observations])
+    x = design.model_matrix(runs[indexes])
+    coefficients = np.linalg.lstsq(x, outcomes, rcond=None)[0]
+
+    effects, column = {}, 1
+    for name, levels in design.factors.items():
+        free = coefficients[column : column + len(levels) - 1].tolist()
+        effects[name] = free + [-sum(free)]
+        column += len(levels) - 1
+    return ComponentEffects(segment, float(coefficients[0]), effects, len(observations))
@@ -9,8 +9,14 @@ from ..models import AdOffer, AgentResponse, Decision, EmotionType, Persona
 class MockAgent:
     """Mock agent that generates realistic fake responses for testing"""
 
-    def __init__(self, persona: Persona):
+    def __init__(self, persona: Persona, model: str | None = None):
+        """
+        Args:
+            persona: Persona to simulate
+            model: Model name to report in model_used (e.g. for cascade tests)
+        """
         self.persona = persona
+        self.model = model
 
     async def evaluate_offer(self, offer: AdOffer) -> AgentResponse:
         """Generate mock response based on persona characteristics"""
@@ -65,10 +71,18 @@ class MockAgent:
             objections=objections,
             what_would_convince=what_would_convince,
             timestamp=datetime.now(),
-            model_used="mock",
+            model_used=self.model or "mock",
             response_time_ms=random.randint(100, 300),
         )
 
+    async def evaluate_offers(self, offers: list[AdOffer]) -> list[AgentResponse]:
+        """Generate mock responses for several offers, ranked by perceived value"""
+        responses = [await self.evaluate_offer(offer) for offer in offers]
+        order = sorted(range(len(offers)), key=lambda i: -responses[i].perceived_value)
+        for rank, index in enumerate(order, start=1):
+            responses[index].rank = rank
+        return responses
+
     def _determine_emotion(self, offer: AdOffer) -> EmotionType:
         """Determine emotion based on persona and offer"""
         # Price-sensitive personas (students) get excited by discounts
@@ -1,16 +1,65 @@
 """Agent orchestrator for batch testing"""
 
 import asyncio
-from typing import List, Literal
+import hashlib
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import AsyncIterator, List, Literal, Sequence, Tuple
 
+from anthropic import AsyncAnthropic
+
+from ..analytics.surrogate import DEFAULT_THRESHOLD, SurrogateModel
 from ..config import config
 from ..models import AdOffer, AgentResponse, Persona
+from .cascade import CHEAP_TIER, STRONG_TIER, CascadePolicy, CascadeStats
 from .claude_agent import ClaudeAgent
 from .claude_code_agent import ClaudeCodeAgent
 from .mock_agent import MockAgent
+from .prescreen import DEFAULT_REJECT_BELOW, HeuristicAgent, TriggerIndex
+from .rate_limit import RateLimiter
+from .single_flight import FileSingleFlight, SingleFlight
+from .streaming import required_fields
+
+
+AgentType = Literal["api", "claude-code", "mock", "heuristic"]
+
+_single_flight: SingleFlight[AgentResponse] | None = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight[AgentResponse]:
+    """
+    Process-wide coalescing of identical agent calls.
+
+    Shared across processes through lock files when SINGLE_FLIGHT_DIR is set.
+    """
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            if config.SINGLE_FLIGHT_DIR:
+                _single_flight = FileSingleFlight(
+                    Path(config.SINGLE_FLIGHT_DIR),
+                    encode=lambda response: response.model_dump_json(),
+                    decode=AgentResponse.model_validate_json,
+                )
+            else:
+                _single_flight = SingleFlight()
+        return _single_flight
 
 
-AgentType = Literal["api", "claude-code", "mock"]
+def _latency_ms(response: AgentResponse | None, start: float) -> float:
+    # The agent's own timing excludes rate-limit waits
+    if response is not None and response.response_time_ms is not None:
+        return response.response_time_ms
+    return (time.monotonic() - start) * 1000
+
+
+def offer_fingerprint(offer: AdOffer) -> str:
+    """Hash of the offer content an agent sees (ignores test_id and created_at)"""
+    content = offer.model_dump_json(exclude={"test_id", "created_at"})
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
 
 
 class AgentOrchestrator:
@@ -20,14 +69,79 @@ class AgentOrchestrator:
         self,
         model: str | None = None,
         agent_type: AgentType = "mock",
+        max_concurrency: int | None = None,
+        rate_limiter: RateLimiter | None = None,
+        coalesce: bool = False,
+        cascade: CascadePolicy | None = None,
+        surrogate: SurrogateModel | None = None,
+        surrogate_threshold: float = DEFAULT_THRESHOLD,
+        prescreen: TriggerIndex | None = None,
+        prescreen_reject_below: float = DEFAULT_REJECT_BELOW,
+        stop_after: Sequence[str] | None = None,
     ):
         """
         Args:
             model: Claude model to use for all agents (default from config)
-            agent_type: Type of agent to use ("api", "claude-code", or "mock")
+            agent_type: Type of agent to use ("api", "claude-code", "mock" or "heuristic")
+            max_concurrency: Maximum agent calls in flight (default: unlimited)
+            rate_limiter: Shared request rate limit (default: none)
+            coalesce: Share one call between concurrent identical requests
+                (same persona, offer content, model and agent type); off by
+                default, since every caller then gets the same sample
+            cascade: Evaluate with a cheap model first and escalate to `model`
+                per this policy ("api" and "mock" agents)
+            surrogate: Local model answering pairs it predicts confidently,
+                without an agent call
+            surrogate_threshold: Minimum predicted decision probability to
+                accept a surrogate answer
+            prescreen: Persona keyword index; personas it rejects outright get a
+                heuristic answer instead of an agent call (also the index of
+                "heuristic" agents)
+            prescreen_reject_below: Keyword score at or below which a persona
+                without positive trigger matches is rejected
+            stop_after: Stream "api" responses and stop generation once these
+                fields are parsed (screening runs that skip the prose fields)
         """
+        if cascade is not None and agent_type == "claude-code":
+            raise ValueError("Model cascade is not supported for the claude-code agent")
+        if stop_after and agent_type != "api":
+            raise ValueError("Early-stopping streaming is only supported for the api agent")
+
         self.model = model or config.DEFAULT_MODEL
         self.agent_type = agent_type
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.single_flight = get_single_flight() if coalesce else None
+        self.cascade = (
+            replace(cascade, strong_model=cascade.strong_model or self.model) if cascade else None
+        )
+        self.cascade_stats = CascadeStats() if cascade else None
+        self.surrogate = surrogate
+        self.surrogate_threshold = surrogate_threshold
+        self.surrogate_stats = {"surrogate": 0, "agent": 0}
+        self.prescreen = prescreen
+        self.prescreen_reject_below = prescreen_reject_below
+        self.prescreen_stats = {"rejected": 0, "evaluated": 0}
+        self.listwise_stats = {"calls": 0, "evaluations": 0}
+        self.stop_after = required_fields(stop_after) if stop_after else None
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._client: AsyncAnthropic | None = None  # shared by all "api" agents
+
+    def _api_client(self) -> AsyncAnthropic:
+        # Created on first use, inside the event loop that runs the evaluations
+        if self._client is None:
+            if not config.ANTHROPIC_API_KEY:
+                raise ValueError("ANTHROPIC_API_KEY not set in environment")
+            self._client = AsyncAnthropic(
+                api_key=config.ANTHROPIC_API_KEY, timeout=config.AGENT_TIMEOUT_SECONDS
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared API client (a later evaluation opens a new one)"""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
 
     async def test_offer_batch(
         self,
@@ -49,13 +163,15 @@ class AgentOrchestrator:
         if parallel is None:
             parallel = config.BATCH_PARALLEL
 
+        personas, screened = self._prescreen(offer, personas)
+
         if parallel:
             # Parallel execution using asyncio.gather
             tasks = [self._simulate_agent(offer, persona) for persona in personas]
             responses = await asyncio.gather(*tasks, return_exceptions=True)
 
             # Filter out exceptions and return successful responses
-            successful_responses = []
+            successful_responses = screened
             for i, response in enumerate(responses):
                 if isinstance(response, Exception):
                     print(f"Warning: Agent for {personas[i].id} failed: {response}")
@@ -65,7 +181,7 @@ class AgentOrchestrator:
             return successful_responses
         else:
             # Sequential execution
-            responses = []
+            responses = screened
             for persona in personas:
                 try:
                     response = await self._simulate_agent(offer, persona)
@@ -75,6 +191,146 @@ class AgentOrchestrator:
 
             return responses
 
+    async def stream_offer_batch(
+        self,
+        offer: AdOffer,
+        personas: List[Persona],
+    ) -> AsyncIterator[AgentResponse]:
+        """
+        Test offer against multiple personas, yielding responses as they complete.
+
+        All agents run concurrently; failed agents are reported and skipped.
+
+        Args:
+            offer: Ad offer to test
+            personas: List of personas to simulate
+
+        Yields:
+            Agent responses in completion order
+        """
+        personas, screened = self._prescreen(offer, personas)
+        for response in screened:
+            yield response
+
+        tasks = {
+            asyncio.ensure_future(self._simulate_agent(offer, persona)): persona
+            for persona in personas
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        print(f"Warning: Agent for {tasks[task].id} failed: {task.exception()}")
+                    else:
+                        yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def evaluate(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        """
+        Evaluate one (offer, persona) pair under the concurrency and rate limits.
+
+        Unlike test_offer_batch(), agent errors are raised to the caller.
+        """
+        _, screened = self._prescreen(offer, [persona])
+        if screened:
+            return screened[0]
+        return await self._simulate_agent(offer, persona)
+
+    async def sample(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        """
+        One fresh evaluation under the concurrency and rate limits.
+
+        Unlike evaluate(), the call is never coalesced with identical
+        in-flight calls nor answered by the surrogate or pre-screen, so
+        repeated calls give independent samples.
+        """
+        return await self._limited_call(offer, persona)
+
+    async def rank_offers(
+        self, offers: List[AdOffer], personas: List[Persona]
+    ) -> List[AgentResponse]:
+        """
+        Listwise comparison: each persona ranks all offers in one agent call.
+
+        The system prompt and instructions are sent once per persona instead
+        of once per offer. Offers are shown to each persona in a different
+        rotation to balance position bias. Agents without a listwise mode
+        (claude-code, heuristic) evaluate the offers one by one and are
+        ranked by perceived value. Cascade, surrogate and pre-screen only
+        apply to single-offer evaluations.
+
+        Args:
+            offers: Offers to compare (2 or more)
+            personas: Personas ranking them
+
+        Returns:
+            One response per (offer, persona) with `rank` set; failed
+            personas are reported and skipped
+        """
+        if len(offers) < 2:
+            raise ValueError("Listwise comparison needs at least two offers")
+
+        results = await asyncio.gather(
+            *(self._rank_for(offers, persona) for persona in personas), return_exceptions=True
+        )
+        responses = []
+        for persona, result in zip(personas, results):
+            if isinstance(result, Exception):
+                print(f"Warning: Agent for {persona.id} failed: {result}")
+            else:
+                responses.extend(result)
+        return responses
+
+    async def _rank_for(self, offers: List[AdOffer], persona: Persona) -> List[AgentResponse]:
+        shift = int(hashlib.sha1(persona.id.encode("utf-8")).hexdigest(), 16) % len(offers)
+        shown = offers[shift:] + offers[:shift]
+
+        if self._semaphore is None:
+            responses = await self._run_listwise(shown, persona)
+        else:
+            async with self._semaphore:
+                responses = await self._run_listwise(shown, persona)
+
+        # Back to the caller's offer order
+        ordered = [responses[(i - shift) % len(offers)] for i in range(len(offers))]
+        return [
+            response.model_copy(update={"test_id": offer.test_id}) if offer.test_id else response
+            for offer, response in zip(offers, ordered)
+        ]
+
+    async def _run_listwise(self, offers: List[AdOffer], persona: Persona) -> List[AgentResponse]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        agent = self._make_agent(persona)
+        if hasattr(agent, "evaluate_offers"):
+            self.listwise_stats["calls"] += 1
+            responses = await agent.evaluate_offers(offers)
+        else:
+            self.listwise_stats["calls"] += len(offers)
+            responses = [await agent.evaluate_offer(offer) for offer in offers]
+            order = sorted(range(len(offers)), key=lambda i: -responses[i].perceived_value)
+            for rank, index in enumerate(order, start=1):
+                responses[index].rank = rank
+
+        self.listwise_stats["evaluations"] += len(offers)
+        return responses
+
+    def _prescreen(
+        self, offer: AdOffer, personas: List[Persona]
+    ) -> Tuple[List[Persona], List[AgentResponse]]:
+        """Personas still to evaluate, and heuristic answers for obvious rejects"""
+        if self.prescreen is None or self.agent_type == "heuristic":
+            return list(personas), []
+        keep, rejected = self.prescreen.screen(offer, personas, self.prescreen_reject_below)
+        self.prescreen_stats["rejected"] += len(rejected)
+        self.prescreen_stats["evaluated"] += len(keep)
+        return keep, [self.prescreen.response(offer, result) for result in rejected]
+
     async def _simulate_agent(self, offer: AdOffer, persona: Persona) -> AgentResponse:
         """
         Simulate single agent response.
@@ -86,16 +342,87 @@ class AgentOrchestrator:
         Returns:
             Agent response
         """
+        if self.surrogate is not None:
+            prediction = self.surrogate.predict(offer, persona)
+            if prediction.confident(self.surrogate_threshold):
+                self.surrogate_stats["surrogate"] += 1
+                return self.surrogate.to_response(offer, persona, prediction)
+            self.surrogate_stats["agent"] += 1
+
+        if self.single_flight is None:
+            return await self._limited_call(offer, persona)
+
+        model = self.cascade.key if self.cascade else self.model
+        model = model if self.agent_type != "claude-code" else ""
+        if self.stop_after:
+            model += "|" + ",".join(self.stop_after)
+        key = f"{self.agent_type}\x00{model}\x00{persona.id}\x00{offer_fingerprint(offer)}"
+        response = await self.single_flight.do(key, lambda: self._limited_call(offer, persona))
+
+        # Callers may share one response object: give each its own copy
+        update = {"test_id": offer.test_id} if offer.test_id else {}
+        return response.model_copy(update=update, deep=True)
+
+    async def _limited_call(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        # Waiting callers hold neither a concurrency slot nor a rate-limit token
+        if self._semaphore is None:
+            return await self._call_agent(offer, persona)
+        async with self._semaphore:
+            return await self._call_agent(offer, persona)
+
+    async def _call_agent(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        if self.cascade is not None:
+            return await self._cascade_call(offer, persona)
+        return await self._run_agent(offer, persona)
+
+    async def _run_agent(
+        self, offer: AdOffer, persona: Persona, model: str | None = None
+    ) -> AgentResponse:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        agent = self._make_agent(persona, model)
+        response = await agent.evaluate_offer(offer)
+        return response
+
+    def _make_agent(self, persona: Persona, model: str | None = None):
         # Select agent type
         if self.agent_type == "api":
-            agent = ClaudeAgent(persona=persona, model=self.model)
+            return ClaudeAgent(
+                persona=persona,
+                model=model or self.model,
+                stop_after=self.stop_after,
+                client=self._api_client(),
+            )
         elif self.agent_type == "claude-code":
-            agent = ClaudeCodeAgent(persona=persona)
+            return ClaudeCodeAgent(persona=persona)
+        elif self.agent_type == "heuristic":
+            return HeuristicAgent(persona=persona, index=self.prescreen)
         else:  # mock
-            agent = MockAgent(persona=persona)
+            return MockAgent(persona=persona, model=model)
 
-        response = await agent.evaluate_offer(offer)
-        return response
+    async def _cascade_call(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        policy, stats = self.cascade, self.cascade_stats
+
+        cheap = None
+        start = time.monotonic()
+        try:
+            cheap = await self._run_agent(offer, persona, policy.cheap_model)
+            reason = policy.escalation_reason(cheap)
+        except RuntimeError as e:
+            # Agents wrap parse and validation errors (ValueError) in RuntimeError
+            reason = "parse_failure" if isinstance(e.__cause__, ValueError) else "cheap_error"
+        stats.record_call(CHEAP_TIER, _latency_ms(cheap, start))
+
+        if reason is None:
+            stats.record(policy, cheap, None, None)
+            return cheap.model_copy(update={"model_tier": CHEAP_TIER})
+
+        start = time.monotonic()
+        strong = await self._run_agent(offer, persona, policy.strong_model)
+        stats.record_call(STRONG_TIER, _latency_ms(strong, start))
+        stats.record(policy, cheap, strong, reason)
+        return strong.model_copy(update={"model_tier": STRONG_TIER})
 
     def __repr__(self) -> str:
         return f"AgentOrchestrator(model={self.model})"
@@ -117,10 +444,13 @@ async def test_offer(
         personas: List of personas
         model: Claude model to use
         parallel: Run in parallel
-        agent_type: Type of agent ("api", "claude-code", or "mock")
+        agent_type: Type of agent ("api", "claude-code", "mock" or "heuristic")
 
     Returns:
         List of agent responses
     """
     orchestrator = AgentOrchestrator(model=model, agent_type=agent_type)
-    return await orchestrator.test_offer_batch(offer, personas, parallel=parallel)
+    try:
+        return await orchestrator.test_offer_batch(offer, personas, parallel=parallel)
+    finally:
+        await orchestrator.aclose()
@@ -0,0 +1,295 @@
+"""Keyword pre-screen of offers against the whole persona population
+
+Persona triggers, values, pain points, goals and decision factors are split
+into short phrases; each phrase becomes a set of word stems. One
+Aho-Corasick automaton over the stems of all personas finds every stem in
+a single pass over the offer text. A stem matches any word starting with it,
+so "скидк" matches "скидка", "скидкой" and "скидки". A phrase counts when
+most of its stems occur, and each persona's score is the weighted sum of
+its matched phrases.
+
+TriggerIndex.screen() splits personas into those worth a paid evaluation
+and obvious rejects (strong negative triggers, no positive ones).
+HeuristicAgent turns the score into an AgentResponse for free.
+"""
+
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Sequence, Set, Tuple
+
+from ..analytics.text_clusters import normalize_text
+from ..models import AdOffer, AgentResponse, Decision, EmotionType, Persona
+from ..models.response import HEURISTIC_MODEL
+
+STEM_LENGTH = 5
+MIN_COVERAGE = 0.5  # share of a phrase's stems that must occur in the offer
+DEFAULT_REJECT_BELOW = -2.0
+
+# Phrase weight by persona field; negative triggers weigh most
+WEIGHTS = {
+    "positive": 1.0,
+    "negative": -1.5,
+    "decision_factors": 0.5,
+    "pain_points": 0.5,
+    "values": 0.3,
+    "goals": 0.3,
+}
+
+# A trigger starting with a negation names what the persona wants to see ("нет медлицензии")
+_NEGATIONS = {"без", "не", "нет"}
+_OPPOSITE = {"positive": "negative", "negative": "positive"}
+
+_PHRASE_SEPARATORS = re.compile(r"[,;:()!?.—–/]+|\s-\s")
+_STOPWORDS = {
+    "без", "все", "для", "если", "еще", "или", "как", "когда", "нет", "она", "они", "очень",
+    "при", "раз", "так", "там", "тоже", "только", "что", "это", "этот", "уже", "чтобы",
+}  # fmt: skip
+
+
+def phrase_stems(phrase: str) -> Tuple[str, ...]:
+    """Distinct word stems of a phrase (numbers kept whole, stopwords dropped)"""
+    stems = []
+    for word in normalize_text(phrase).split():
+        if word.isdigit():
+            stem = word if len(word) >= 3 else ""
+        elif len(word) >= 3 and word not in _STOPWORDS:
+            stem = word[:STEM_LENGTH]
+        else:
+            stem = ""
+        if stem and stem not in stems:
+            stems.append(stem)
+    return tuple(stems)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton matching patterns at word starts"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(index)
+
+        # Breadth-first failure links; outputs include those of the fallback state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        """Indexes of the patterns occurring at the start of a word of normalised `text`"""
+        found: Set[int] = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                start = position - len(self.patterns[index]) + 1
+                if start == 0 or text[start - 1] == " ":
+                    found.add(index)
+        return found
+
+
+@dataclass
+class _Phrase:
+    persona: int
+    kind: str
+    text: str
+    stems: Tuple[int, ...]
+
+
+@dataclass
+class PrescreenScore:
+    """Keyword evidence of one persona for one offer"""
+
+    persona_id: str
+    score: float = 0.0
+    matches: Dict[str, List[str]] = field(default_factory=dict)  # kind -> phrases
+
+    @property
+    def positive_hits(self) -> int:
+        return len(self.matches.get("positive", []))
+
+    @property
+    def negative_hits(self) -> int:
+        return len(self.matches.get("negative", []))
+
+    def rejects(self, reject_below: float = DEFAULT_REJECT_BELOW) -> bool:
+        """Obvious reject: strongly negative and no positive trigger"""
+        return self.score <= reject_below and not self.positive_hits
+
+
+class TriggerIndex:
+    """Compiled keywords of a persona population"""
+
+    def __init__(self, personas: Sequence[Persona]):
+        self.personas = list(personas)
+        self._position = {persona.id: i for i, persona in enumerate(self.personas)}
+        stem_ids: Dict[str, int] = {}
+        self._phrases: List[_Phrase] = []
+
+        for index, persona in enumerate(self.personas):
+            sources = {
+                "positive": [persona.triggers.get("positive", "")],
+                "negative": [persona.triggers.get("negative", "")],
+                "decision_factors": persona.decision_factors,
+                "pain_points": persona.pain_points,
+                "values": persona.values,
+                "goals": persona.goals,
+            }
+            for source, texts in sources.items():
+                for text in texts:
+                    for phrase in _PHRASE_SEPARATORS.split(text):
+                        stems = phrase_stems(phrase)
+                        kind = source
+                        if normalize_text(phrase).split(" ", 1)[0] in _NEGATIONS:
+                            kind = _OPPOSITE.get(source)  # other fields: "нет времени" etc.
+                        if stems and kind:
+                            ids = tuple(stem_ids.setdefault(stem, len(stem_ids)) for stem in stems)
+                            self._phrases.append(_Phrase(index, kind, phrase.strip(), ids))
+
+        self._stem_phrases: List[List[int]] = [[] for _ in stem_ids]
+        for phrase_index, phrase in enumerate(self._phrases):
+            for stem in phrase.stems:
+                self._stem_phrases[stem].append(phrase_index)
+        self.automaton = KeywordAutomaton(list(stem_ids))
+
+    def __contains__(self, persona_id: str) -> bool:
+        return persona_id in self._position
+
+    def score(self, offer: AdOffer) -> Dict[str, PrescreenScore]:
+        """Scores of all indexed personas from one pass over the offer text"""
+        text = " ".join(
+            part or "" for part in (offer.headline, offer.body, offer.call_to_action, offer.price)
+        )
+        hits = Counter(
+            phrase
+            for stem in self.automaton.find(normalize_text(text))
+            for phrase in self._stem_phrases[stem]
+        )
+
+        scores = {persona.id: PrescreenScore(persona.id) for persona in self.personas}
+        for phrase_index, count in hits.items():
+            phrase = self._phrases[phrase_index]
+            coverage = count / len(phrase.stems)
+            if coverage < MIN_COVERAGE:
+                continue
+            result = scores[self.personas[phrase.persona].id]
+            result.score += WEIGHTS[phrase.kind] * coverage
+            result.matches.setdefault(phrase.kind, []).append(phrase.text)
+        return scores
+
+    def screen(
+        self,
+        offer: AdOffer,
+        personas: Sequence[Persona],
+        reject_below: float = DEFAULT_REJECT_BELOW,
+    ) -> Tuple[List[Persona], List[PrescreenScore]]:
+        """
+        Split personas into those to evaluate and obvious rejects.
+
+        Personas missing from the index are always evaluated.
+
+        Returns:
+            (personas to evaluate, scores of rejected personas)
+        """
+        scores = self.score(offer)
+        keep, rejected = [], []
+        for persona in personas:
+            result = scores.get(persona.id)
+            if result is not None and result.rejects(reject_below):
+                rejected.append(result)
+            else:
+                keep.append(persona)
+        return keep, rejected
+
+    def response(self, offer: AdOffer, result: PrescreenScore) -> AgentResponse:
+        """Heuristic AgentResponse from a keyword score"""
+        persona = self.personas[self._position[result.persona_id]]
+        score = result.score
+
+        if score >= 2.5:
+            decision, emotion = Decision.STRONG_YES, EmotionType.EXCITED
+        elif score >= 1.0:
+            decision, emotion = Decision.MAYBE_YES, EmotionType.INTERESTED
+        elif score > -1.0:
+            decision, emotion = Decision.NEUTRAL, EmotionType.NEUTRAL
+        elif score > -2.5:
+            decision, emotion = Decision.PROBABLY_NOT, EmotionType.SKEPTICAL
+        else:
+            decision, emotion = Decision.STRONG_NO, EmotionType.ANNOYED
+
+        positive = result.matches.get("positive", [])
+        negative = result.matches.get("negative", [])
+        summary = (
+            f"Совпадения с триггерами: +{len(positive)} / -{len(negative)} "
+            f"(оценка {score:+.1f})"
+        )
+        return AgentResponse(
+            persona_id=persona.id,
+            persona_name=f"{persona.name} ({persona.description})",
+            test_id=offer.test_id or f"test-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+            offer_headline=offer.headline,
+            primary_emotion=emotion,
+            emotion_intensity=min(1.0, 0.3 + 0.15 * abs(score)),
+            emotional_reasoning=summary,
+            first_impression=summary,
+            detailed_reasoning="; ".join(positive + negative) or summary,
+            perceived_value=min(10.0, max(0.0, 5.0 + score)),
+            decision=decision,
+            confidence_score=min(0.9, 0.3 + 0.1 * abs(score)),
+            alignment_with_values={
+                value: 1.0 for value in result.matches.get("values", [])
+            },
+            pain_points_addressed=result.matches.get("pain_points", []),
+            objections=negative,
+            model_used=HEURISTIC_MODEL,
+            model_tier=HEURISTIC_MODEL,
+        )
+
+
+class HeuristicAgent:
+    """Instant, free agent scoring offers by persona keyword matches"""
+
+    def __init__(self, persona: Persona, index: TriggerIndex | None = None):
+        """
+        Args:
+            persona: Persona to simulate
+            index: Shared index containing the persona (default: built for it alone)
+        """
+        self.persona = persona
+        self.index = index if index is not None and persona.id in index else TriggerIndex(
+            [persona]
+        )
+
+    async def evaluate_offer(self, offer: AdOffer) -> AgentResponse:
+        start = time.perf_counter()
+        result = self.index.score(offer)[self.persona.id]
+        response = self.index.response(offer, result)
+        response.response_time_ms = int((time.perf_counter() - start) * 1000)
+        return response
+
+    def __repr__(self) -> str:
+        return f"HeuristicAgent(persona={self.persona.id})"
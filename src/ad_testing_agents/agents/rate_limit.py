@@ -0,0 +1,47 @@
+"""Request rate limiting for agent backends"""
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Async token bucket: at most `rate` requests per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        """
+        Args:
+            rate: Sustained requests per second
+            burst: Bucket size (default: one second worth of requests, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def __repr__(self) -> str:
+        return f"RateLimiter(rate={self.rate}/s, burst={self.burst})"
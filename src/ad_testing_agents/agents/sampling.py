@@ -0,0 +1,288 @@
+"""Stratified persona sampling for large persona populations"""
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from ..analytics.stats import is_conversion, z_value
+from ..models import AdOffer, AgentResponse, Persona
+from ..personas import persona_stratum
+from .orchestrator import AgentOrchestrator
+
+
+@dataclass
+class StratumState:
+    """Sampling state of one stratum"""
+
+    key: Hashable
+    weight: float
+    pending: List[Persona]
+    population: int
+    sampled: int = 0
+    conversions: int = 0
+    value_sum: float = 0.0
+    value_sq_sum: float = 0.0
+
+    def conversion_rate(self) -> float:
+        # Laplace smoothing keeps the variance non-zero for tiny samples
+        return (self.conversions + 0.5) / (self.sampled + 1)
+
+    def fpc(self) -> float:
+        """Finite population correction"""
+        if self.population <= 1:
+            return 0.0
+        return max(0.0, 1 - self.sampled / self.population)
+
+
+@dataclass
+class SampledEstimate:
+    """Reweighted metrics estimated from a stratified persona sample"""
+
+    conversion_rate: float
+    conversion_ci: Tuple[float, float]
+    avg_value: float
+    value_ci: Tuple[float, float]
+    personas_evaluated: int
+    population_size: int
+    responses: List[AgentResponse] = field(default_factory=list)
+    strata: Dict[Hashable, StratumState] = field(default_factory=dict)
+
+    @property
+    def conversion_half_width(self) -> float:
+        return (self.conversion_ci[1] - self.conversion_ci[0]) / 2
+
+
+class StratifiedSampler:
+    """
+    Evaluates a stratified subset of personas and reweights the aggregate.
+
+    Personas are grouped into strata (by default age group, income level and
+    primary trait). Every stratum gets an initial sample, then further
+    personas are added in batches where they reduce the variance of the
+    conversion estimate the most (Neyman-style allocation), until the
+    confidence interval is tight enough.
+    """
+
+    def __init__(
+        self,
+        orchestrator: AgentOrchestrator,
+        personas: List[Persona],
+        stratum_key: Callable[[Persona], Hashable] = persona_stratum,
+        weights: Dict[str, float] | None = None,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            orchestrator: Orchestrator used for the evaluations
+            personas: Full persona population
+            stratum_key: Maps a persona to its stratum
+            weights: Optional persona weights (e.g. projection_weights() onto a
+                     target audience); by default each persona counts once
+            seed: Seed for the order personas are drawn within a stratum
+        """
+        if not personas:
+            raise ValueError("Persona population is empty")
+
+        self.orchestrator = orchestrator
+        self.personas = personas
+        self.stratum_key = stratum_key
+        self.weights = weights
+        self.seed = seed
+
+    def _build_strata(self) -> Dict[Hashable, StratumState]:
+        rng = random.Random(self.seed)
+        groups: Dict[Hashable, List[Persona]] = {}
+        for persona in self.personas:
+            groups.setdefault(self.stratum_key(persona), []).append(persona)
+
+        if self.weights is None:
+            masses = {key: float(len(members)) for key, members in groups.items()}
+        else:
+            masses = {
+                key: sum(self.weights.get(p.id, 0.0) for p in members)
+                for key, members in groups.items()
+            }
+
+        total = sum(masses.values())
+        if total <= 0:
+            raise ValueError("Persona weights must sum to a positive number")
+
+        strata = {}
+        for key, members in groups.items():
+            if masses[key] <= 0:
+                continue
+            pending = list(members)
+            rng.shuffle(pending)
+            strata[key] = StratumState(
+                key=key, weight=masses[key] / total, pending=pending, population=len(members)
+            )
+        return strata
+
+    async def estimate(
+        self,
+        offer: AdOffer,
+        target_half_width: float = 0.05,
+        confidence: float = 0.95,
+        initial_per_stratum: int = 1,
+        batch_size: int = 20,
+        max_evaluations: int | None = None,
+    ) -> SampledEstimate:
+        """
+        Adaptively sample personas until the conversion estimate is tight enough.
+
+        Args:
+            offer: Ad offer to test
+            target_half_width: Stop once the conversion CI half-width is below this
+            confidence: Confidence level of the intervals
+            initial_per_stratum: Personas evaluated per stratum before adapting
+            batch_size: Personas added per adaptive round
+            max_evaluations: Hard cap on evaluated personas (default: no cap)
+
+        Returns:
+            Reweighted estimate with confidence intervals and raw responses
+        """
+        strata = self._build_strata()
+        by_id: Dict[str, StratumState] = {}
+        responses: List[AgentResponse] = []
+        budget = max_evaluations if max_evaluations is not None else len(self.personas)
+
+        batch = []
+        for state in strata.values():
+            batch.extend(self._take(state, initial_per_stratum, by_id))
+        batch = self._trim(batch, budget, by_id)
+
+        while batch:
+            for response in await self.orchestrator.test_offer_batch(offer, batch):
+                self._record(by_id[response.persona_id], response)
+                responses.append(response)
+            budget -= len(batch)
+
+            estimate = self._estimate(strata, responses, confidence)
+            if estimate.conversion_half_width <= target_half_width or budget <= 0:
+                return estimate
+
+            batch = self._allocate(strata, min(batch_size, budget), by_id)
+
+        return self._estimate(strata, responses, confidence)
+
+    def _take(
+        self, state: StratumState, count: int, by_id: Dict[str, StratumState]
+    ) -> List[Persona]:
+        taken, state.pending = state.pending[:count], state.pending[count:]
+        for persona in taken:
+            by_id[persona.id] = state
+        return taken
+
+    def _trim(
+        self, batch: List[Persona], budget: int, by_id: Dict[str, StratumState]
+    ) -> List[Persona]:
+        # Personas beyond the budget go back to their strata
+        for persona in batch[budget:]:
+            by_id[persona.id].pending.insert(0, persona)
+        return batch[:budget]
+
+    def _allocate(
+        self, strata: Dict[Hashable, StratumState], count: int, by_id: Dict[str, StratumState]
+    ) -> List[Persona]:
+        """Greedy Neyman allocation: next persona goes where variance drops most"""
+        planned = {key: state.sampled for key, state in strata.items()}
+        remaining = {key: len(state.pending) for key, state in strata.items()}
+        picks: Dict[Hashable, int] = {}
+
+        for _ in range(count):
+            best_key, best_gain = None, 0.0
+            for key, state in strata.items():
+                if remaining[key] <= 0:
+                    continue
+                p = state.conversion_rate()
+                n = max(planned[key], 1)
+                gain = state.weight**2 * p * (1 - p) / (n * (n + 1))
+                if gain > best_gain:
+                    best_key, best_gain = key, gain
+            if best_key is None:
+                break
+            planned[best_key] += 1
+            remaining[best_key] -= 1
+            picks[best_key] = picks.get(best_key, 0) + 1
+
+        batch = []
+        for key, count_for_key in picks.items():
+            batch.extend(self._take(strata[key], count_for_key, by_id))
+        return batch
+
+    @staticmethod
+    def _record(state: StratumState, response: AgentResponse) -> None:
+        state.sampled += 1
+        state.conversions += int(is_conversion(response.decision))
+        state.value_sum += response.perceived_value
+        state.value_sq_sum += response.perceived_value**2
+
+    @staticmethod
+    def _estimate(
+        strata: Dict[Hashable, StratumState],
+        responses: List[AgentResponse],
+        confidence: float,
+    ) -> SampledEstimate:
+        sampled = [s for s in strata.values() if s.sampled > 0]
+        covered = sum(s.weight for s in sampled)
+        z = z_value(confidence)
+
+        if not sampled or covered <= 0:
+            return SampledEstimate(
+                conversion_rate=0.0,
+                conversion_ci=(0.0, 1.0),
+                avg_value=0.0,
+                value_ci=(0.0, 10.0),
+                personas_evaluated=0,
+                population_size=sum(s.population for s in strata.values()),
+                responses=responses,
+                strata=strata,
+            )
+
+        # Pooled value variance is the fallback for strata with a single response
+        n_total = sum(s.sampled for s in sampled)
+        value_total = sum(s.value_sum for s in sampled)
+        pooled_var = (
+            (sum(s.value_sq_sum for s in sampled) - value_total**2 / n_total) / (n_total - 1)
+            if n_total > 1
+            else 25.0
+        )
+
+        conversion = value = conversion_var = value_var = 0.0
+        for s in sampled:
+            w = s.weight / covered
+            p = s.conversions / s.sampled
+            mean = s.value_sum / s.sampled
+            conversion += w * p
+            value += w * mean
+
+            p_smooth = s.conversion_rate()
+            conversion_var += w**2 * p_smooth * (1 - p_smooth) / s.sampled * s.fpc()
+
+            if s.sampled > 1:
+                var = (s.value_sq_sum - s.value_sum**2 / s.sampled) / (s.sampled - 1)
+            else:
+                var = pooled_var
+            value_var += w**2 * max(var, 0.0) / s.sampled * s.fpc()
+
+        conversion = min(1.0, conversion)
+
+        # Unsampled strata add uncertainty: their share could convert at any rate
+        missing = 1 - covered
+        conversion_half = z * math.sqrt(conversion_var) + missing
+        value_half = z * math.sqrt(value_var) + missing * 10
+
+        return SampledEstimate(
+            conversion_rate=conversion,
+            conversion_ci=(
+                max(0.0, conversion - conversion_half),
+                min(1.0, conversion + conversion_half),
+            ),
+            avg_value=value,
+            value_ci=(max(0.0, value - value_half), min(10.0, value + value_half)),
+            personas_evaluated=n_total,
+            population_size=sum(s.population for s in strata.values()),
+            responses=responses,
+            strata=strata,
+        )
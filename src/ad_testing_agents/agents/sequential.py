@@ -0,0 +1,224 @@
+"""Sequential offer comparison with early stopping of dominated offers"""
+
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+from typing import List, Literal, Tuple
+
+from ..analytics.stats import is_conversion, sample_variance, wilson_interval, z_value
+from ..models import AdOffer, AgentResponse, Persona
+from .orchestrator import AgentOrchestrator
+
+ComparisonMetric = Literal["perceived_value", "conversion"]
+COMPARISON_METRICS: Tuple[ComparisonMetric, ...] = ("conversion", "perceived_value")
+
+TARGET_ROUNDS = 8
+# Fewest evaluations per offer at which 95% conversion bounds can separate
+# (Wilson: 4/4 converting vs 0/4)
+MIN_EVALUATIONS = 4
+
+
+def default_schedule(population: int) -> Tuple[int, int]:
+    """
+    Round size and minimum rounds for a persona population.
+
+    About TARGET_ROUNDS rounds cover the population, and the first
+    elimination check comes after MIN_EVALUATIONS personas, or after half of
+    a smaller population.
+    """
+    round_size = max(1, math.ceil(population / TARGET_ROUNDS))
+    first_check = min(MIN_EVALUATIONS, math.ceil(population / 2))
+    return round_size, max(1, math.ceil(first_check / round_size))
+
+
+@dataclass
+class OfferArm:
+    """Running statistics of one offer in a sequential comparison"""
+
+    offer: AdOffer
+    evaluations: int = 0
+    conversions: int = 0
+    value_sum: float = 0.0
+    value_sq_sum: float = 0.0
+    eliminated_round: int | None = None
+    responses: List[AgentResponse] = field(default_factory=list)
+
+    @property
+    def active(self) -> bool:
+        return self.eliminated_round is None
+
+    @property
+    def conversion_rate(self) -> float:
+        return self.conversions / self.evaluations if self.evaluations else 0.0
+
+    @property
+    def avg_value(self) -> float:
+        return self.value_sum / self.evaluations if self.evaluations else 0.0
+
+    def conversion_interval(self, confidence: float) -> Tuple[float, float]:
+        return wilson_interval(self.conversions, self.evaluations, confidence)
+
+    def value_interval(self, confidence: float) -> Tuple[float, float]:
+        if self.evaluations < 2:
+            return 0.0, 10.0
+        variance = sample_variance(self.value_sum, self.value_sq_sum, self.evaluations)
+        half = z_value(confidence) * math.sqrt(variance / self.evaluations)
+        return max(0.0, self.avg_value - half), min(10.0, self.avg_value + half)
+
+    def interval(self, metric: ComparisonMetric, confidence: float) -> Tuple[float, float]:
+        if metric == "conversion":
+            return self.conversion_interval(confidence)
+        return self.value_interval(confidence)
+
+    def record(self, response: AgentResponse) -> None:
+        self.evaluations += 1
+        self.conversions += int(is_conversion(response.decision))
+        self.value_sum += response.perceived_value
+        self.value_sq_sum += response.perceived_value**2
+        self.responses.append(response)
+
+
+@dataclass
+class ComparisonResult:
+    """Outcome of a sequential comparison"""
+
+    arms: List[OfferArm]
+    metric: ComparisonMetric
+    rounds: int
+    evaluations: int
+    full_grid_evaluations: int
+
+    @property
+    def winner(self) -> OfferArm:
+        return self.arms[0]
+
+    @property
+    def savings(self) -> float:
+        """Share of the full offer x persona grid that was not evaluated"""
+        if not self.full_grid_evaluations:
+            return 0.0
+        return 1 - self.evaluations / self.full_grid_evaluations
+
+    @property
+    def responses(self) -> List[AgentResponse]:
+        return [r for arm in self.arms for r in arm.responses]
+
+
+class SequentialComparison:
+    """
+    Compares offers in rounds and stops spending on dominated offers.
+
+    Each round evaluates every still-active offer on the next few personas
+    (the same personas for all offers, so rounds are paired). After a round,
+    an offer is eliminated when another active offer dominates it on both
+    conversion and perceived value: on each metric, the offer's upper
+    confidence bound is below the other offer's lower bound. An offer that
+    converts worse but is valued higher (or the reverse) keeps running. The
+    run ends when a single offer is left or personas run out.
+
+    Bounds are re-checked after every round, so the nominal confidence level
+    is approximate; raise it for stricter elimination.
+    """
+
+    def __init__(
+        self,
+        orchestrator: AgentOrchestrator,
+        personas: List[Persona],
+        metric: ComparisonMetric = "perceived_value",
+        confidence: float = 0.95,
+        round_size: int | None = None,
+        min_rounds: int | None = None,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            orchestrator: Orchestrator used for the evaluations
+            personas: Personas to draw from (each is used at most once per offer)
+            metric: Metric the result is ranked by ("perceived_value" or "conversion")
+            confidence: Confidence level of the bounds
+            round_size: Personas evaluated per offer per round (default:
+                from the population size, see default_schedule())
+            min_rounds: Rounds before any offer can be eliminated (default:
+                from the population size)
+            seed: Seed for the persona order
+        """
+        if not personas:
+            raise ValueError("No personas to compare offers on")
+
+        self.orchestrator = orchestrator
+        self.personas = personas
+        self.metric = metric
+        self.confidence = confidence
+        default_round_size, default_min_rounds = default_schedule(len(personas))
+        self.round_size = round_size or default_round_size
+        self.min_rounds = min_rounds or default_min_rounds
+        self.seed = seed
+
+    async def run(self, offers: List[AdOffer]) -> ComparisonResult:
+        """
+        Run the comparison.
+
+        Args:
+            offers: Offers to compare
+
+        Returns:
+            Result with arms ranked best-first (eliminated offers last)
+        """
+        arms = [OfferArm(offer=offer) for offer in offers]
+        order = list(self.personas)
+        random.Random(self.seed).shuffle(order)
+
+        rounds = 0
+        for start in range(0, len(order), self.round_size):
+            active = [arm for arm in arms if arm.active]
+            if len(active) <= 1:
+                break
+
+            chunk = order[start : start + self.round_size]
+            batches = await asyncio.gather(
+                *(self.orchestrator.test_offer_batch(arm.offer, chunk) for arm in active)
+            )
+            for arm, responses in zip(active, batches):
+                for response in responses:
+                    arm.record(response)
+
+            rounds += 1
+            if rounds >= self.min_rounds:
+                self._eliminate(active, rounds)
+
+        return ComparisonResult(
+            arms=self._rank(arms),
+            metric=self.metric,
+            rounds=rounds,
+            evaluations=sum(arm.evaluations for arm in arms),
+            full_grid_evaluations=len(offers) * len(self.personas),
+        )
+
+    def _eliminate(self, active: List[OfferArm], round_no: int) -> None:
+        intervals = [
+            [arm.interval(metric, self.confidence) for metric in COMPARISON_METRICS]
+            for arm in active
+        ]
+        for arm, bounds in zip(active, intervals):
+            if any(
+                all(upper < lower for (_, upper), (lower, _) in zip(bounds, other))
+                for other in intervals
+                if other is not bounds
+            ):
+                arm.eliminated_round = round_no
+
+    def _score(self, arm: OfferArm) -> float:
+        return arm.conversion_rate if self.metric == "conversion" else arm.avg_value
+
+    def _rank(self, arms: List[OfferArm]) -> List[OfferArm]:
+        # Active offers first, then offers that survived longer, then by metric
+        return sorted(
+            arms,
+            key=lambda arm: (
+                arm.active,
+                arm.eliminated_round or 0,
+                self._score(arm),
+            ),
+            reverse=True,
+        )
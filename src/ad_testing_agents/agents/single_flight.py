@@ -0,0 +1,181 @@
+"""Coalescing of identical in-flight agent calls
+
+Concurrent requests with the same key share one call: the first caller (the
+leader) runs it, the others await its result. SingleFlight does this within
+a process, across threads and event loops (the dashboard runs one loop per
+job). FileSingleFlight adds lock files so processes sharing a directory
+(dashboard, MCP server, batch runs, workers) also share calls.
+
+Results are only shared between overlapping requests; nothing is cached
+beyond the lifetime of the call.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+T = TypeVar("T")
+
+POLL_SECONDS = 0.1
+RESULT_TTL_SECONDS = 60.0
+
+
+class _LeaderCancelled(Exception):
+    """The leader was cancelled; waiting callers elect a new leader"""
+
+
+class SingleFlight(Generic[T]):
+    """In-process single-flight, shared by all threads and event loops"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn` unless a call with the same key is in flight, then await that one.
+
+        Errors of the shared call are raised to every caller.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = concurrent.futures.Future()
+                    self.calls += 1
+                else:
+                    self.coalesced += 1
+
+            if not leader:
+                try:
+                    # shield: a cancelled waiter must not cancel the shared call
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await self._lead(key, fn)
+            except asyncio.CancelledError:
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is future:
+                        del self._calls[key]
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        return await fn()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class FileSingleFlight(SingleFlight[T]):
+    """
+    Single-flight across processes through lock files in a shared directory.
+
+    The leader holds an flock on `<key hash>.lock` while it calls; waiting
+    processes poll the lock and read the result file the leader wrote. If the
+    leader dies without a result, the next waiter to get the lock calls
+    itself. Without fcntl (Windows) only in-process coalescing applies.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        encode: Callable[[T], str],
+        decode: Callable[[str], T],
+        result_ttl: float = RESULT_TTL_SECONDS,
+    ):
+        """
+        Args:
+            directory: Directory shared by the cooperating processes
+            encode: Serialise a result for other processes
+            decode: Inverse of `encode`
+            result_ttl: Seconds after which leftover result files are removed
+        """
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.encode = encode
+        self.decode = decode
+        self.result_ttl = result_ttl
+        self._cleaned_at = 0.0
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        if fcntl is None:
+            return await fn()
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        lock_path = self.directory / f"{digest}.lock"
+        result_path = self.directory / f"{digest}.result"
+        waiting_since = None
+
+        with open(lock_path, "a") as lock_file:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    waiting_since = waiting_since or time.time()
+                    await asyncio.sleep(POLL_SECONDS)
+                    continue
+
+                try:
+                    # Another process finished the call while we were waiting
+                    if waiting_since is not None:
+                        try:
+                            if result_path.stat().st_mtime >= waiting_since:
+                                self.coalesced += 1
+                                return self.decode(result_path.read_text(encoding="utf-8"))
+                        except FileNotFoundError:
+                            pass
+
+                    result = await fn()
+                    tmp_path = result_path.with_name(f"{result_path.name}.{os.getpid()}.tmp")
+                    tmp_path.write_text(self.encode(result), encoding="utf-8")
+                    tmp_path.replace(result_path)
+                    return result
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    self._cleanup()
+
+    def _cleanup(self) -> None:
+        now = time.time()
+        if now - self._cleaned_at < self.result_ttl:
+            return
+        self._cleaned_at = now
+
+        for path in self.directory.iterdir():
+            try:
+                if now - path.stat().st_mtime < self.result_ttl:
+                    continue
+                if path.suffix != ".lock":
+                    path.unlink()
+                    continue
+                # Only remove lock files nobody holds
+                with open(path, "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    path.unlink()
+            except (OSError, BlockingIOError):
+                pass
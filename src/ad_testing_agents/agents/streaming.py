@@ -0,0 +1,134 @@
+"""Incremental parsing of a streamed JSON object
+
+The model's answer arrives as text deltas. IncrementalJSONParser tracks the
+top-level object of the answer and decodes each top-level field as soon as
+its value is complete, so the caller can stop generation once the fields it
+needs have arrived instead of waiting for the long prose fields.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+from ..prompts.evaluation_prompts import RESPONSE_FIELDS
+
+# Enough for high-volume screening: the prose fields are never generated
+SCREENING_FIELDS = ("decision", "perceived_value", "primary_emotion")
+# AgentResponse fields without a default, always awaited
+_REQUIRED_NUMBERS = ("emotion_intensity", "confidence_score")
+# Placeholders for the fields generation was stopped before
+_SKIPPED_DEFAULTS = {
+    "emotional_reasoning": "",
+    "first_impression": "",
+    "detailed_reasoning": "",
+    "alignment_with_values": {},
+}
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def required_fields(fields: Sequence[str]) -> Tuple[str, ...]:
+    """Fields to wait for: the requested ones plus AgentResponse's required numbers"""
+    unknown = set(fields) - set(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown response fields: {', '.join(sorted(unknown))}")
+    return tuple(fields) + tuple(name for name in _REQUIRED_NUMBERS if name not in fields)
+
+
+def fill_skipped(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Parsed fields with placeholders for the required fields that were not generated"""
+    return {**_SKIPPED_DEFAULTS, **fields}
+
+
+class IncrementalJSONParser:
+    """Top-level fields of a JSON object, decoded while the text streams in"""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False  # the top-level object is closed
+        self._text: list[str] = []
+        self._length = 0
+        self._stack: list[str] = []  # expected closing brackets
+        self._in_string = False
+        self._escape = False
+        self._key: str | None = None
+        self._token_start: int | None = None  # start of the current key or value
+        self._expect = "key"  # at depth 1: "key", "colon", "value" or "comma"
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Consume more text; returns the fields decoded so far"""
+        for char in chunk:
+            if self.complete:
+                break
+            self._text.append(char)
+            self._step(char, self._length)
+            self._length += 1
+        return self.fields
+
+    def has(self, names: Iterable[str]) -> bool:
+        return all(name in self.fields for name in names)
+
+    def _step(self, char: str, position: int) -> None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if len(self._stack) == 1:
+                    self._finish_token(position + 1)
+            return
+
+        if not self._stack:
+            if char == "{":  # anything before the object (``` fences, prose) is skipped
+                self._stack.append("}")
+            return
+
+        depth = len(self._stack)
+        if char == '"':
+            self._in_string = True
+            if depth == 1:
+                self._start_token(position)
+        elif char in _CLOSERS:
+            if depth == 1:
+                self._start_token(position)
+            self._stack.append(_CLOSERS[char])
+        elif char in "}]":
+            if depth == 1 and self._expect == "value" and self._token_start is not None:
+                self._finish_token(position)  # scalar ended by the closing brace
+            self._stack.pop()
+            if not self._stack:
+                self.complete = True
+            elif len(self._stack) == 1:
+                self._finish_token(position + 1)
+        elif depth == 1:
+            if char == ":" and self._expect == "colon":
+                self._expect = "value"
+            elif char == ",":
+                if self._expect == "value" and self._token_start is not None:
+                    self._finish_token(position)
+                self._expect = "key"
+            elif not char.isspace() and self._expect == "value" and self._token_start is None:
+                self._token_start = position  # number, true, false or null
+
+    def _start_token(self, position: int) -> None:
+        if self._expect in ("key", "value"):
+            self._token_start = position
+
+    def _finish_token(self, end: int) -> None:
+        if self._token_start is None:
+            return
+        raw = "".join(self._text[self._token_start : end]).strip()
+        self._token_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = None
+            if self._expect == "value":
+                self._expect = "comma"
+                return
+        if self._expect == "key":
+            self._key, self._expect = value, "colon"
+        elif self._expect == "value":
+            self.fields[self._key] = value
+            self._expect = "comma"
@@ -0,0 +1,56 @@
+"""Analytics & metrics"""
+
+from .engine import (
+    best_offer,
+    bootstrap_ci,
+    decision_distribution,
+    emotion_distribution,
+    group_summary,
+    offer_summary,
+    overall_summary,
+    persona_offer_matrix,
+    persona_summary,
+    results_frame,
+)
+from .incremental import AggregateCell, IncrementalAggregator
+from .parallel import PipelineResult, process_results_files, validate_record
+from .stats import POSITIVE_DECISIONS, is_conversion, mean_interval, wilson_interval
+from .surrogate import SurrogateModel, SurrogatePrediction, SurrogateReport, training_rows
+from .text_clusters import (
+    SignatureCache,
+    TextCluster,
+    cluster_field,
+    cluster_texts,
+    normalize_text,
+)
+
+__all__ = [
+    "results_frame",
+    "overall_summary",
+    "group_summary",
+    "offer_summary",
+    "persona_summary",
+    "best_offer",
+    "emotion_distribution",
+    "decision_distribution",
+    "persona_offer_matrix",
+    "bootstrap_ci",
+    "IncrementalAggregator",
+    "AggregateCell",
+    "process_results_files",
+    "PipelineResult",
+    "validate_record",
+    "cluster_texts",
+    "cluster_field",
+    "normalize_text",
+    "SignatureCache",
+    "TextCluster",
+    "POSITIVE_DECISIONS",
+    "is_conversion",
+    "wilson_interval",
+    "mean_interval",
+    "SurrogateModel",
+    "SurrogatePrediction",
+    "SurrogateReport",
+    "training_rows",
+]
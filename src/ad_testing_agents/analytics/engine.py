@@ -0,0 +1,226 @@
+"""Vectorised analytics over columnar result sets
+
+Every caller (batch script, dashboard, comparison page) builds one DataFrame
+with results_frame() and derives all metrics from it with pandas/NumPy, so
+conversion, value and confidence are computed the same way everywhere.
+"""
+
+from enum import Enum
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from ..models import AgentResponse
+from .stats import POSITIVE_DECISIONS, z_value
+
+NUMERIC_COLUMNS = ["emotion_intensity", "perceived_value", "confidence_score"]
+CATEGORY_COLUMNS = [
+    "offer_id",
+    "offer_headline",
+    "persona_id",
+    "persona_name",
+    "primary_emotion",
+    "decision",
+]
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _record(result: Dict[str, Any] | AgentResponse) -> Dict[str, Any]:
+    if isinstance(result, AgentResponse):
+        record = result.model_dump(mode="json")
+        record.setdefault("offer_id", result.test_id)
+        return record
+    return {key: _plain(value) for key, value in result.items()}
+
+
+def results_frame(
+    results: Iterable[Dict[str, Any] | AgentResponse] | pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Build the columnar result set used by all analytics functions.
+
+    Args:
+        results: Result records (as saved by the batch runner), AgentResponse
+            objects, or a DataFrame of records (e.g. read from the results store)
+
+    Returns:
+        DataFrame with one row per evaluation and a boolean "converted" column
+    """
+    if isinstance(results, pd.DataFrame):
+        df = results.copy()
+    else:
+        df = pd.DataFrame.from_records([_record(r) for r in results])
+
+    if df.empty:
+        df = pd.DataFrame(columns=CATEGORY_COLUMNS + NUMERIC_COLUMNS)
+
+    if "offer_id" not in df.columns:
+        df["offer_id"] = df["test_id"] if "test_id" in df.columns else df["offer_headline"]
+    df["offer_id"] = df["offer_id"].fillna(df["offer_headline"])
+
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+
+    # Categorical keys make groupby/crosstab on large result sets much cheaper
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+
+    df["converted"] = df["decision"].isin(POSITIVE_DECISIONS)
+    return df
+
+
+def overall_summary(df: pd.DataFrame) -> Dict[str, float]:
+    """Headline metrics over the whole result set"""
+    if df.empty:
+        return {
+            "count": 0,
+            "conversion_rate": 0.0,
+            "avg_value": 0.0,
+            "avg_confidence": 0.0,
+            "avg_emotion_intensity": 0.0,
+        }
+
+    return {
+        "count": int(len(df)),
+        "conversion_rate": float(df["converted"].mean()),
+        "avg_value": float(df["perceived_value"].mean()),
+        "avg_confidence": float(df["confidence_score"].mean()),
+        "avg_emotion_intensity": float(df["emotion_intensity"].mean()),
+    }
+
+
+def _wilson(successes: np.ndarray, n: np.ndarray, z: float) -> tuple[np.ndarray, np.ndarray]:
+    n = np.maximum(n, 1)
+    p = successes / n
+    denom = 1 + z**2 / n
+    center = (p + z**2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def group_summary(df: pd.DataFrame, by: str, confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Per-group conversion, value and confidence with intervals.
+
+    Columns: count, conversion_rate, conversion_low/high (Wilson),
+    avg_value, value_low/high (normal), avg_confidence, avg_emotion_intensity.
+    """
+    grouped = df.groupby(by, sort=False, observed=True)
+    summary = grouped.agg(
+        count=("converted", "size"),
+        conversions=("converted", "sum"),
+        conversion_rate=("converted", "mean"),
+        avg_value=("perceived_value", "mean"),
+        value_std=("perceived_value", "std"),
+        avg_confidence=("confidence_score", "mean"),
+        avg_emotion_intensity=("emotion_intensity", "mean"),
+    )
+
+    z = z_value(confidence)
+    counts = summary["count"].to_numpy(dtype=float)
+    low, high = _wilson(summary["conversions"].to_numpy(dtype=float), counts, z)
+    summary["conversion_low"] = low
+    summary["conversion_high"] = high
+
+    half = z * summary["value_std"].fillna(np.inf).to_numpy() / np.sqrt(counts)
+    summary["value_low"] = np.clip(summary["avg_value"].to_numpy() - half, 0, 10)
+    summary["value_high"] = np.clip(summary["avg_value"].to_numpy() + half, 0, 10)
+
+    return summary.drop(columns=["conversions", "value_std"])
+
+
+def offer_summary(df: pd.DataFrame, confidence: float = 0.95) -> pd.DataFrame:
+    """Per-offer metrics, best offer (by average perceived value) first"""
+    summary = group_summary(df, "offer_id", confidence)
+    headlines = df.drop_duplicates("offer_id").set_index("offer_id")["offer_headline"]
+    summary.insert(0, "offer_headline", headlines.reindex(summary.index).astype(str))
+    return summary.sort_values("avg_value", ascending=False)
+
+
+def persona_summary(df: pd.DataFrame, confidence: float = 0.95) -> pd.DataFrame:
+    """Per-persona metrics, highest conversion first"""
+    summary = group_summary(df, "persona_id", confidence)
+    names = df.drop_duplicates("persona_id").set_index("persona_id")["persona_name"]
+    summary.insert(0, "persona_name", names.reindex(summary.index).astype(str))
+    return summary.sort_values("conversion_rate", ascending=False)
+
+
+def best_offer(df: pd.DataFrame) -> pd.Series | None:
+    """Row of offer_summary() for the best offer (None for empty results)"""
+    if df.empty:
+        return None
+    return offer_summary(df).iloc[0]
+
+
+def emotion_distribution(
+    df: pd.DataFrame, by: str = "offer_headline", normalize: bool = True
+) -> pd.DataFrame:
+    """Share (or count) of each primary emotion per group"""
+    return pd.crosstab(df[by], df["primary_emotion"], normalize="index" if normalize else False)
+
+
+def decision_distribution(df: pd.DataFrame, by: str = "offer_headline") -> pd.DataFrame:
+    """Decision counts per group in long format (columns: by, decision, count)"""
+    return df.groupby([by, "decision"], observed=True).size().reset_index(name="count")
+
+
+def persona_offer_matrix(
+    df: pd.DataFrame, value: str = "perceived_value", index: str = "persona_name"
+) -> pd.DataFrame:
+    """Persona x offer pivot of a metric (mean), e.g. for heatmaps"""
+    return df.pivot_table(
+        index=index, columns="offer_headline", values=value, aggfunc="mean", observed=True
+    )
+
+
+def bootstrap_ci(
+    df: pd.DataFrame,
+    by: str,
+    column: str = "perceived_value",
+    n_boot: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 42,
+    max_cells: int = 5_000_000,
+) -> pd.DataFrame:
+    """
+    Percentile bootstrap interval of a group mean, vectorised per group.
+
+    Groups with few distinct values (scores, booleans) are resampled as
+    multinomial counts over the distinct values, which costs O(n_boot x k)
+    instead of O(n_boot x n). Other groups use a (n_boot x n) index matrix,
+    processed in chunks of at most max_cells elements to bound memory.
+
+    Returns:
+        DataFrame indexed by group with columns mean, low, high
+    """
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    rows: List[Dict[str, Any]] = []
+
+    values = df[column].to_numpy(dtype=float)
+    for key, positions in df.groupby(by, sort=False, observed=True).indices.items():
+        sample = values[positions]
+        n = len(sample)
+        distinct, counts = np.unique(sample, return_counts=True)
+
+        if len(distinct) * 4 <= n:
+            draws = rng.multinomial(n, counts / n, size=n_boot)
+            means = draws @ distinct / n
+        else:
+            chunk = max(1, max_cells // max(n, 1))
+            means = np.empty(n_boot)
+            for start in range(0, n_boot, chunk):
+                stop = min(start + chunk, n_boot)
+                idx = rng.integers(0, n, size=(stop - start, n))
+                means[start:stop] = sample[idx].mean(axis=1)
+
+        low, high = np.quantile(means, [alpha, 1 - alpha])
+        rows.append({by: key, "mean": sample.mean(), "low": low, "high": high})
+
+    if not rows:
+        return pd.DataFrame(columns=["mean", "low", "high"])
+    return pd.DataFrame(rows).set_index(by)
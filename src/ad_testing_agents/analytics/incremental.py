@@ -0,0 +1,289 @@
+"""Incremental aggregate maintenance for live and historical results
+
+IncrementalAggregator keeps running sums, counts, histograms and decision
+tallies per (offer, persona, segment). It is updated one response at a
+time, merged across workers and saved to JSON, so metrics stay current
+without rescanning raw results.
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterable, Literal, Tuple
+
+import pandas as pd
+
+from ..models import AgentResponse
+from .stats import is_conversion, sample_variance, wilson_interval, z_value
+
+AGGREGATE_VERSION = 1
+VALUE_BINS = 11  # perceived_value histogram: [0,1), [1,2), ..., [9,10), [10]
+
+CellKey = Tuple[str, str, str]
+RollupLevel = Literal["offer", "persona", "segment"]
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+@dataclass
+class AggregateCell:
+    """Running statistics for one (offer, persona, segment) cell"""
+
+    count: int = 0
+    conversions: int = 0
+    value_sum: float = 0.0
+    value_sq_sum: float = 0.0
+    confidence_sum: float = 0.0
+    intensity_sum: float = 0.0
+    decisions: Dict[str, int] = field(default_factory=dict)
+    emotions: Dict[str, int] = field(default_factory=dict)
+    value_hist: list = field(default_factory=lambda: [0] * VALUE_BINS)
+
+    def add(
+        self,
+        decision: str,
+        emotion: str,
+        value: float,
+        confidence: float,
+        intensity: float,
+    ) -> None:
+        self.count += 1
+        self.conversions += int(is_conversion(decision))
+        self.value_sum += value
+        self.value_sq_sum += value**2
+        self.confidence_sum += confidence
+        self.intensity_sum += intensity
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+        self.emotions[emotion] = self.emotions.get(emotion, 0) + 1
+        self.value_hist[min(int(value), VALUE_BINS - 1)] += 1
+
+    def merge(self, other: "AggregateCell") -> None:
+        self.count += other.count
+        self.conversions += other.conversions
+        self.value_sum += other.value_sum
+        self.value_sq_sum += other.value_sq_sum
+        self.confidence_sum += other.confidence_sum
+        self.intensity_sum += other.intensity_sum
+        for key, n in other.decisions.items():
+            self.decisions[key] = self.decisions.get(key, 0) + n
+        for key, n in other.emotions.items():
+            self.emotions[key] = self.emotions.get(key, 0) + n
+        self.value_hist = [a + b for a, b in zip(self.value_hist, other.value_hist)]
+
+    def metrics(self, confidence: float = 0.95) -> Dict[str, float]:
+        """Metrics with the same names as analytics.engine.group_summary()"""
+        if self.count == 0:
+            return {"count": 0}
+
+        avg_value = self.value_sum / self.count
+        conversion_low, conversion_high = wilson_interval(self.conversions, self.count, confidence)
+
+        if self.count > 1:
+            variance = sample_variance(self.value_sum, self.value_sq_sum, self.count)
+            half = z_value(confidence) * math.sqrt(variance / self.count)
+        else:
+            half = math.inf
+
+        return {
+            "count": self.count,
+            "conversion_rate": self.conversions / self.count,
+            "avg_value": avg_value,
+            "avg_confidence": self.confidence_sum / self.count,
+            "avg_emotion_intensity": self.intensity_sum / self.count,
+            "conversion_low": conversion_low,
+            "conversion_high": conversion_high,
+            "value_low": max(0.0, avg_value - half),
+            "value_high": min(10.0, avg_value + half),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data["decisions"] = dict(self.decisions)
+        data["emotions"] = dict(self.emotions)
+        data["value_hist"] = list(self.value_hist)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AggregateCell":
+        return cls(**data)
+
+
+class IncrementalAggregator:
+    """Mergeable, serialisable aggregates keyed by (offer, persona, segment)"""
+
+    def __init__(self):
+        self.cells: Dict[CellKey, AggregateCell] = {}
+        self.offer_headlines: Dict[str, str] = {}
+        self.persona_names: Dict[str, str] = {}
+
+    def update(
+        self,
+        result: AgentResponse | Dict[str, Any],
+        offer_id: str | None = None,
+        segment: str = "all",
+    ) -> None:
+        """
+        Add one result.
+
+        Args:
+            result: AgentResponse or a results-file record
+            offer_id: Offer key (default: record "offer_id", else response test_id)
+            segment: Segment label (e.g. age group or audience name)
+        """
+        if isinstance(result, AgentResponse):
+            record = {
+                "offer_id": offer_id or result.test_id,
+                "offer_headline": result.offer_headline,
+                "persona_id": result.persona_id,
+                "persona_name": result.persona_name,
+                "decision": result.decision,
+                "primary_emotion": result.primary_emotion,
+                "perceived_value": result.perceived_value,
+                "confidence_score": result.confidence_score,
+                "emotion_intensity": result.emotion_intensity,
+            }
+        else:
+            record = result
+
+        offer_key = offer_id or record.get("offer_id") or record["offer_headline"]
+        persona_id = record["persona_id"]
+        self.offer_headlines.setdefault(offer_key, record.get("offer_headline", offer_key))
+        self.persona_names.setdefault(persona_id, record.get("persona_name", persona_id))
+
+        key = (offer_key, persona_id, segment)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = AggregateCell()
+
+        cell.add(
+            decision=_plain(record["decision"]),
+            emotion=_plain(record["primary_emotion"]),
+            value=float(record["perceived_value"]),
+            confidence=float(record["confidence_score"]),
+            intensity=float(record["emotion_intensity"]),
+        )
+
+    def update_many(
+        self, results: Iterable[AgentResponse | Dict[str, Any]], segment: str = "all"
+    ) -> None:
+        for result in results:
+            self.update(result, segment=segment)
+
+    def merge(self, other: "IncrementalAggregator") -> "IncrementalAggregator":
+        """Merge another aggregator (e.g. from another worker) into this one"""
+        for key, cell in other.cells.items():
+            if key in self.cells:
+                self.cells[key].merge(cell)
+            else:
+                self.cells[key] = AggregateCell.from_dict(cell.to_dict())
+        for offer_key, headline in other.offer_headlines.items():
+            self.offer_headlines.setdefault(offer_key, headline)
+        for persona_id, name in other.persona_names.items():
+            self.persona_names.setdefault(persona_id, name)
+        return self
+
+    def rollup(self, by: RollupLevel) -> Dict[str, AggregateCell]:
+        """Combine cells by offer, persona or segment"""
+        position = {"offer": 0, "persona": 1, "segment": 2}[by]
+        result: Dict[str, AggregateCell] = {}
+        for key, cell in self.cells.items():
+            result.setdefault(key[position], AggregateCell()).merge(cell)
+        return result
+
+    def total(self) -> AggregateCell:
+        total = AggregateCell()
+        for cell in self.cells.values():
+            total.merge(cell)
+        return total
+
+    def overall(self) -> Dict[str, float]:
+        """Headline metrics, same keys as analytics.engine.overall_summary()"""
+        metrics = self.total().metrics()
+        if not metrics["count"]:
+            return {
+                "count": 0,
+                "conversion_rate": 0.0,
+                "avg_value": 0.0,
+                "avg_confidence": 0.0,
+                "avg_emotion_intensity": 0.0,
+            }
+        keys = ("count", "conversion_rate", "avg_value", "avg_confidence", "avg_emotion_intensity")
+        return {key: metrics[key] for key in keys}
+
+    def summary(self, by: RollupLevel = "offer", confidence: float = 0.95) -> pd.DataFrame:
+        """
+        Per-group metrics as a DataFrame shaped like offer_summary()/persona_summary().
+        """
+        rows = []
+        for key, cell in self.rollup(by).items():
+            row: Dict[str, Any] = {"key": key}
+            if by == "offer":
+                row["offer_headline"] = self.offer_headlines.get(key, key)
+            elif by == "persona":
+                row["persona_name"] = self.persona_names.get(key, key)
+            row.update(cell.metrics(confidence))
+            rows.append(row)
+
+        if not rows:
+            return pd.DataFrame()
+
+        index = {"offer": "offer_id", "persona": "persona_id", "segment": "segment"}[by]
+        df = pd.DataFrame(rows).set_index("key").rename_axis(index)
+        sort_by = "conversion_rate" if by == "persona" else "avg_value"
+        return df.sort_values(sort_by, ascending=False)
+
+    def emotion_counts(self, by: RollupLevel = "offer") -> pd.DataFrame:
+        """Emotion tallies per group"""
+        return pd.DataFrame(
+            {key: cell.emotions for key, cell in self.rollup(by).items()}
+        ).T.fillna(0).astype(int)
+
+    def decision_counts(self, by: RollupLevel = "offer") -> pd.DataFrame:
+        """Decision tallies per group"""
+        return pd.DataFrame(
+            {key: cell.decisions for key, cell in self.rollup(by).items()}
+        ).T.fillna(0).astype(int)
+
+    # --- serialisation ----------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": AGGREGATE_VERSION,
+            "cells": [[*key, cell.to_dict()] for key, cell in self.cells.items()],
+            "offer_headlines": self.offer_headlines,
+            "persona_names": self.persona_names,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IncrementalAggregator":
+        if data.get("version") != AGGREGATE_VERSION:
+            raise ValueError(f"Unsupported aggregate version: {data.get('version')}")
+
+        aggregator = cls()
+        for offer_key, persona_id, segment, cell in data["cells"]:
+            aggregator.cells[(offer_key, persona_id, segment)] = AggregateCell.from_dict(cell)
+        aggregator.offer_headlines = dict(data["offer_headlines"])
+        aggregator.persona_names = dict(data["persona_names"])
+        return aggregator
+
+    def save(self, path: Path) -> None:
+        """Save to JSON (written atomically)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IncrementalAggregator":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def __len__(self) -> int:
+        return sum(cell.count for cell in self.cells.values())
+
+    def __repr__(self) -> str:
+        return f"IncrementalAggregator({len(self)} results, {len(self.cells)} cells)"
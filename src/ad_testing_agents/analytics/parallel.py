@@ -0,0 +1,228 @@
+"""Multiprocess parsing, validation and aggregation of large result sets
+
+Results files are split into tasks (a whole .json batch file, or a byte
+range of a .jsonl file aligned to line boundaries). Each worker process
+parses, validates and aggregates its task on its own. Only compact data goes
+back to the parent: the IncrementalAggregator as a plain dict and,
+optionally, the valid records as columns (lists per field). Partial
+aggregates are merged in the parent. There are no pydantic objects and no
+per-record pickling, so throughput grows almost linearly with the number of
+worker processes.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+
+from ..models import Decision, EmotionType
+from .engine import results_frame
+from .incremental import IncrementalAggregator
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+_DECISIONS = {d.value for d in Decision}
+_EMOTIONS = {e.value for e in EmotionType}
+_RANGES = {
+    "perceived_value": (0.0, 10.0),
+    "confidence_score": (0.0, 1.0),
+    "emotion_intensity": (0.0, 1.0),
+}
+
+# (path, start byte, end byte); end = -1 reads a whole .json batch file
+Task = Tuple[str, int, int]
+
+
+def validate_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check a results-file record against the AgentResponse constraints.
+
+    Cheaper than building AgentResponse objects: only the fields analytics
+    relies on are checked, and the record is returned as a plain dict.
+
+    Raises:
+        ValueError: If a field is missing or out of range
+    """
+    for key in ("offer_headline", "persona_id"):
+        if not record.get(key):
+            raise ValueError(f"missing {key}")
+    if record.get("decision") not in _DECISIONS:
+        raise ValueError(f"invalid decision: {record.get('decision')!r}")
+    if record.get("primary_emotion") not in _EMOTIONS:
+        raise ValueError(f"invalid primary_emotion: {record.get('primary_emotion')!r}")
+
+    for key, (low, high) in _RANGES.items():
+        value = record.get(key)
+        if not isinstance(value, (int, float)) or not low <= value <= high:
+            raise ValueError(f"{key} out of range: {value!r}")
+
+    record.setdefault("offer_id", record.get("test_id") or record["offer_headline"])
+    return record
+
+
+@dataclass
+class PipelineResult:
+    """Output of process_results_files()"""
+
+    aggregator: IncrementalAggregator
+    columns: Dict[str, List[Any]] | None = None
+    metadata: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # per file
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> int:
+        return len(self.aggregator)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Valid records as dicts (requires keep_records=True)"""
+        if self.columns is None:
+            raise ValueError("Records were not kept: use keep_records=True")
+        keys = list(self.columns)
+        return [dict(zip(keys, row)) for row in zip(*self.columns.values())]
+
+    def frame(self) -> pd.DataFrame:
+        """Valid records as the analytics result set (requires keep_records=True)"""
+        if self.columns is None:
+            raise ValueError("Records were not kept: use keep_records=True")
+        return results_frame(pd.DataFrame(self.columns))
+
+
+def plan_tasks(paths: Iterable[Path], chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Task]:
+    """Split results files into worker tasks"""
+    tasks: List[Task] = []
+    for path in paths:
+        path = Path(path)
+        if path.suffix != ".jsonl":
+            tasks.append((str(path), 0, -1))
+            continue
+
+        size = path.stat().st_size
+        tasks.extend(
+            (str(path), start, min(start + chunk_bytes, size))
+            for start in range(0, max(size, 1), chunk_bytes)
+        )
+    return tasks
+
+
+def _iter_task_records(task: Task, metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    path, start, end = task
+    if end < 0:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        metadata.update(data["metadata"])
+        yield from data["results"]
+        return
+
+    # A line belongs to the chunk its first byte falls into
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                data = json.loads(line)
+                if "metadata" in data:
+                    metadata.update(data["metadata"])
+                else:
+                    yield data
+
+
+def process_task(task: Task, keep_records: bool = False) -> Dict[str, Any]:
+    """
+    Parse, validate and aggregate one task (runs in a worker process).
+
+    Returns:
+        Compact, picklable result: aggregator dict, optional columns, file
+        metadata (if in this task), invalid count and the first error messages
+    """
+    aggregator = IncrementalAggregator()
+    columns: Dict[str, List[Any]] = {}
+    metadata: Dict[str, Any] = {}
+    rows = invalid = 0
+    errors: List[str] = []
+
+    for index, record in enumerate(_iter_task_records(task, metadata)):
+        try:
+            record = validate_record(record)
+        except (ValueError, TypeError, AttributeError) as e:
+            invalid += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"{Path(task[0]).name}[{task[1]}:{index}]: {e}")
+            continue
+
+        aggregator.update(record)
+        if keep_records:
+            for key in record.keys() - columns.keys():
+                columns[key] = [None] * rows
+            for key, values in columns.items():
+                values.append(record.get(key))
+        rows += 1
+
+    return {
+        "aggregate": aggregator.to_dict(),
+        "columns": columns if keep_records else None,
+        "metadata": metadata,
+        "invalid": invalid,
+        "errors": errors,
+    }
+
+
+def process_results_files(
+    paths: Iterable[Path],
+    workers: int | None = None,
+    keep_records: bool = False,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> PipelineResult:
+    """
+    Parse, validate and aggregate results files across worker processes.
+
+    Args:
+        paths: Results files (.json batch files or .jsonl record streams)
+        workers: Worker processes (default: CPU count; 1 runs in-process)
+        keep_records: Also return the valid records (column-oriented)
+        chunk_bytes: Target task size for .jsonl files
+
+    Returns:
+        Merged aggregates, optional records and validation errors
+    """
+    tasks = plan_tasks(paths, chunk_bytes)
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    if workers == 1:
+        outputs = [process_task(task, keep_records) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(process_task, tasks, [keep_records] * len(tasks)))
+
+    result = PipelineResult(
+        aggregator=IncrementalAggregator(), columns={} if keep_records else None
+    )
+    for task, output in zip(tasks, outputs):
+        if output["metadata"]:
+            result.metadata[task[0]] = output["metadata"]
+        result.aggregator.merge(IncrementalAggregator.from_dict(output["aggregate"]))
+        result.invalid += output["invalid"]
+        result.errors.extend(output["errors"][: MAX_REPORTED_ERRORS - len(result.errors)])
+
+        if keep_records:
+            _extend_columns(result.columns, output["columns"])
+
+    return result
+
+
+def _extend_columns(target: Dict[str, List[Any]], chunk: Dict[str, List[Any]]) -> None:
+    length = len(next(iter(target.values()), []))
+    chunk_length = len(next(iter(chunk.values()), []))
+    for key in chunk.keys() - target.keys():
+        target[key] = [None] * length
+    for key, values in target.items():
+        values.extend(chunk.get(key) or [None] * chunk_length)
@@ -0,0 +1,67 @@
+"""Statistical helpers shared by adaptive runners and analytics"""
+
+import math
+from statistics import NormalDist
+from typing import Sequence, Tuple
+
+# Decisions counted as a conversion (same rule as the dashboard and batch script)
+POSITIVE_DECISIONS = ("strong_yes", "maybe_yes")
+
+
+def is_conversion(decision: str) -> bool:
+    """True if the decision counts as a conversion (accepts Decision or str)"""
+    return decision in POSITIVE_DECISIONS
+
+
+def z_value(confidence: float) -> float:
+    """Two-sided normal quantile for a confidence level (0.95 -> 1.96)"""
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: float, n: float, confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion.
+
+    Returns:
+        (low, high); (0.0, 1.0) when there are no observations
+    """
+    if n <= 0:
+        return 0.0, 1.0
+
+    z = z_value(confidence)
+    p = successes / n
+    denom = 1 + z**2 / n
+    center = (p + z**2 / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(
+    values: Sequence[float], confidence: float = 0.95
+) -> Tuple[float, float, float]:
+    """
+    Normal-approximation interval for a mean.
+
+    Returns:
+        (mean, low, high); the interval is infinite for fewer than 2 values
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, -math.inf, math.inf
+
+    mean = sum(values) / n
+    if n < 2:
+        return mean, -math.inf, math.inf
+
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half = z_value(confidence) * math.sqrt(variance / n)
+    return mean, mean - half, mean + half
+
+
+def sample_variance(total: float, total_sq: float, n: float) -> float:
+    """Unbiased variance from running sums (0.0 for fewer than 2 observations)"""
+    if n < 2:
+        return 0.0
+    return max(0.0, (total_sq - total**2 / n) / (n - 1))
@@ -0,0 +1,436 @@
+"""Local surrogate model of persona decisions
+
+Predicts `decision`, `perceived_value` and `primary_emotion` for an (offer,
+persona) pair from cheap features, so the orchestrator can skip the LLM when
+the prediction is confident. Features:
+- offer: price, discount, text lengths, digits and exclamation marks, and
+  hashed word stems of headline, body and call to action;
+- persona: age group, income level, personality traits and persona id;
+- pair: persona trigger words found in the offer, and price/discount
+  weighted by the persona's income and price sensitivity.
+
+Decisions and emotions use multinomial logistic regression, perceived value
+uses ridge regression; both are plain numpy, CPU-only and train in seconds
+on tens of thousands of results.
+"""
+
+import json
+import re
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from ..models import AdOffer, AgentResponse, Decision, EmotionType, Persona
+from ..models.persona import AgeGroup, IncomeLevel, PersonalityTrait
+from ..models.response import NON_LLM_MODELS, SURROGATE_MODEL
+from .text_clusters import normalize_text
+
+HASH_BUCKETS = 128
+STEM_LENGTH = 6
+DEFAULT_THRESHOLD = 0.9
+
+_NUMBER = re.compile(r"\d[\d\s]*")
+_PRICE_WORDS = ("цен", "эконом", "дешев", "скидк", "бюджет")
+_INCOME_ORDER = {level: i / 3 for i, level in enumerate(IncomeLevel)}
+
+DECISIONS = [decision.value for decision in Decision]
+EMOTIONS = [emotion.value for emotion in EmotionType]
+
+# (offer fields, persona, results-file record)
+TrainingRow = Tuple[Dict[str, Any], Persona, Dict[str, Any]]
+
+
+def offer_fields(offer: AdOffer) -> Dict[str, Any]:
+    """Offer fields the features are built from"""
+    return {
+        "headline": offer.headline,
+        "body": offer.body,
+        "call_to_action": offer.call_to_action,
+        "price": offer.price,
+        "discount": offer.discount,
+    }
+
+
+def _number(text: str | None) -> float | None:
+    match = _NUMBER.search(text or "")
+    return float(re.sub(r"\s", "", match.group())) if match else None
+
+
+def _discount_fraction(discount: str | None, price: float | None) -> float:
+    if not discount:
+        return 0.0
+    amount = _number(discount)
+    if amount is None:
+        return 0.0
+    if "%" in discount:
+        return min(amount / 100, 1.0)
+    if price:
+        # "Обычная цена 3500₽" (old price) or "-3000₽" (amount off)
+        return 1 - price / amount if amount > price else amount / (price + amount)
+    return 0.0
+
+
+def _stems(text: str) -> List[str]:
+    return [word[:STEM_LENGTH] for word in normalize_text(text).split() if len(word) > 2]
+
+
+@dataclass
+class FeatureSpace:
+    """Column layout of the feature matrix"""
+
+    persona_ids: List[str]
+
+    @property
+    def size(self) -> int:
+        fixed = 10 + len(AgeGroup) + len(IncomeLevel) + len(PersonalityTrait)
+        return fixed + len(self.persona_ids) + HASH_BUCKETS
+
+    def vector(self, offer: Mapping[str, Any], persona: Persona) -> np.ndarray:
+        """Features of one (offer, persona) pair"""
+        x = np.zeros(self.size)
+        text = " ".join(
+            str(offer.get(key) or "") for key in ("headline", "body", "call_to_action")
+        )
+        normalized = normalize_text(text)
+
+        price = _number(offer.get("price"))
+        discount = _discount_fraction(offer.get("discount"), price)
+        log_price = np.log1p(price) / 10 if price else 0.0
+        income = _INCOME_ORDER[persona.income_level]
+        price_sensitive = any(
+            word in normalize_text(factor)
+            for factor in [*persona.decision_factors, *persona.values]
+            for word in _PRICE_WORDS
+        )
+
+        positive = _stems(persona.triggers.get("positive", ""))
+        negative = _stems(persona.triggers.get("negative", ""))
+        offer_stems = set(_stems(text))
+
+        x[0:10] = [
+            price is not None,
+            log_price,
+            discount,
+            np.log1p(len(text)) / 6,
+            sum(char.isdigit() for char in text) / 10,
+            text.count("!"),
+            sum(stem in offer_stems for stem in positive),
+            sum(stem in offer_stems for stem in negative),
+            log_price * (1 - income) + discount * price_sensitive,
+            "бесплат" in normalized,
+        ]
+
+        i = 10
+        x[i + list(AgeGroup).index(persona.age_group)] = 1
+        i += len(AgeGroup)
+        x[i + list(IncomeLevel).index(persona.income_level)] = 1
+        i += len(IncomeLevel)
+        for trait in persona.personality_traits:
+            x[i + list(PersonalityTrait).index(trait)] = 1
+        i += len(PersonalityTrait)
+        if persona.id in self.persona_ids:
+            x[i + self.persona_ids.index(persona.id)] = 1
+        i += len(self.persona_ids)
+        for stem in offer_stems:
+            x[i + zlib.crc32(stem.encode("utf-8")) % HASH_BUCKETS] = 1
+        return x
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def fit_softmax(
+    X: np.ndarray, y: np.ndarray, classes: int, l2: float = 1e-3, iterations: int = 300
+) -> np.ndarray:
+    """Multinomial logistic regression by gradient descent (X has a bias column)"""
+    W = np.zeros((X.shape[1], classes))
+    Y = np.eye(classes)[y]
+    # Step size from the curvature bound of the softmax loss
+    curvature = np.linalg.eigvalsh(X.T @ X / len(X))[-1] / 2 + l2
+    lr, velocity = 1 / curvature, np.zeros_like(W)
+    for _ in range(iterations):
+        gradient = X.T @ (_softmax(X @ W) - Y) / len(X) + l2 * W
+        velocity = 0.9 * velocity - lr * gradient
+        W += velocity
+    return W
+
+
+def fit_ridge(X: np.ndarray, y: np.ndarray, l2: float = 1.0) -> np.ndarray:
+    """Ridge regression in closed form (X has a bias column)"""
+    penalty = l2 * np.eye(X.shape[1])
+    penalty[-1, -1] = 0  # don't shrink the bias
+    return np.linalg.solve(X.T @ X + penalty, X.T @ y)
+
+
+@dataclass
+class SurrogatePrediction:
+    """Surrogate output for one pair"""
+
+    decision: Decision
+    probability: float  # of the predicted decision
+    probabilities: Dict[str, float]
+    perceived_value: float
+    emotion: EmotionType
+    emotion_intensity: float
+
+    def confident(self, threshold: float = DEFAULT_THRESHOLD) -> bool:
+        return self.probability >= threshold
+
+
+@dataclass
+class SurrogateReport:
+    """Hold-out quality of a trained surrogate"""
+
+    train_size: int
+    test_size: int
+    accuracy: float
+    value_mae: float
+    coverage: Dict[str, float] = field(default_factory=dict)  # threshold -> share confident
+    confident_accuracy: Dict[str, float] = field(default_factory=dict)
+
+
+class SurrogateModel:
+    """Decision, value and emotion predictor over FeatureSpace features"""
+
+    def __init__(
+        self,
+        space: FeatureSpace,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        decision_weights: np.ndarray,
+        emotion_weights: np.ndarray,
+        value_weights: np.ndarray,
+        emotion_intensity: float,
+    ):
+        self.space = space
+        self.mean = mean
+        self.scale = scale
+        self.decision_weights = decision_weights
+        self.emotion_weights = emotion_weights
+        self.value_weights = value_weights
+        self.emotion_intensity = emotion_intensity
+
+    # --- training -----------------------------------------------------------
+
+    @classmethod
+    def fit(cls, rows: Sequence[TrainingRow]) -> "SurrogateModel":
+        """
+        Train on past results.
+
+        Raises:
+            ValueError: If there are no usable rows
+        """
+        rows = [row for row in rows if row[2].get("decision") in DECISIONS]
+        if not rows:
+            raise ValueError("No results to train the surrogate on")
+
+        space = FeatureSpace(sorted({persona.id for _, persona, _ in rows}))
+        X = np.array([space.vector(offer, persona) for offer, persona, _ in rows])
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1
+        Xb = cls._with_bias((X - mean) / scale)
+
+        records = [record for _, _, record in rows]
+        decisions = np.array([DECISIONS.index(r["decision"]) for r in records])
+        emotions = np.array(
+            [
+                EMOTIONS.index(r["primary_emotion"]) if r.get("primary_emotion") in EMOTIONS else 2
+                for r in records
+            ]
+        )
+        values = np.array([float(r.get("perceived_value") or 0) for r in records])
+        intensity = float(np.mean([r.get("emotion_intensity") or 0.5 for r in records]))
+
+        return cls(
+            space,
+            mean,
+            scale,
+            fit_softmax(Xb, decisions, len(DECISIONS)),
+            fit_softmax(Xb, emotions, len(EMOTIONS)),
+            fit_ridge(Xb, values),
+            intensity,
+        )
+
+    @classmethod
+    def fit_with_report(
+        cls,
+        rows: Sequence[TrainingRow],
+        test_share: float = 0.2,
+        thresholds: Iterable[float] = (0.7, 0.8, 0.9, 0.95),
+        seed: int = 0,
+    ) -> Tuple["SurrogateModel", SurrogateReport]:
+        """Train on a random split, report hold-out quality, then refit on all rows"""
+        rows = list(rows)
+        order = np.random.default_rng(seed).permutation(len(rows))
+        cut = int(len(rows) * (1 - test_share))
+        train = [rows[i] for i in order[:cut]]
+        test = [rows[i] for i in order[cut:]]
+
+        model = cls.fit(train)
+        predictions = model.predict_many([(offer, persona) for offer, persona, _ in test])
+        correct = np.array(
+            [p.decision.value == record["decision"] for p, (_, _, record) in zip(predictions, test)]
+        )
+        errors = [
+            abs(p.perceived_value - float(record.get("perceived_value") or 0))
+            for p, (_, _, record) in zip(predictions, test)
+        ]
+        probabilities = np.array([p.probability for p in predictions])
+
+        report = SurrogateReport(
+            train_size=len(train),
+            test_size=len(test),
+            accuracy=float(correct.mean()) if len(test) else 0.0,
+            value_mae=float(np.mean(errors)) if errors else 0.0,
+        )
+        for threshold in thresholds:
+            confident = probabilities >= threshold
+            report.coverage[str(threshold)] = float(confident.mean()) if len(test) else 0.0
+            report.confident_accuracy[str(threshold)] = (
+                float(correct[confident].mean()) if confident.any() else 0.0
+            )
+        return cls.fit(rows), report
+
+    # --- prediction ---------------------------------------------------------
+
+    @staticmethod
+    def _with_bias(X: np.ndarray) -> np.ndarray:
+        return np.hstack([X, np.ones((len(X), 1))])
+
+    def predict_many(
+        self, pairs: Sequence[Tuple[Mapping[str, Any] | AdOffer, Persona]]
+    ) -> List[SurrogatePrediction]:
+        """Predictions for (offer, persona) pairs (offer as AdOffer or offer_fields())"""
+        if not pairs:
+            return []
+        X = np.array(
+            [
+                self.space.vector(
+                    offer_fields(offer) if isinstance(offer, AdOffer) else offer, persona
+                )
+                for offer, persona in pairs
+            ]
+        )
+        Xb = self._with_bias((X - self.mean) / self.scale)
+        decision_p = _softmax(Xb @ self.decision_weights)
+        emotion_p = _softmax(Xb @ self.emotion_weights)
+        values = np.clip(Xb @ self.value_weights, 0, 10)
+
+        predictions = []
+        for dp, ep, value in zip(decision_p, emotion_p, values):
+            best = int(dp.argmax())
+            predictions.append(
+                SurrogatePrediction(
+                    decision=Decision(DECISIONS[best]),
+                    probability=float(dp[best]),
+                    probabilities={d: float(p) for d, p in zip(DECISIONS, dp)},
+                    perceived_value=float(value),
+                    emotion=EmotionType(EMOTIONS[int(ep.argmax())]),
+                    emotion_intensity=self.emotion_intensity,
+                )
+            )
+        return predictions
+
+    def predict(self, offer: AdOffer, persona: Persona) -> SurrogatePrediction:
+        return self.predict_many([(offer, persona)])[0]
+
+    def to_response(
+        self, offer: AdOffer, persona: Persona, prediction: SurrogatePrediction
+    ) -> AgentResponse:
+        """AgentResponse for a confident prediction (no reasoning texts)"""
+        note = "Прогноз локальной модели по прошлым ответам, без вызова LLM"
+        return AgentResponse(
+            persona_id=persona.id,
+            persona_name=f"{persona.name} ({persona.description})",
+            test_id=offer.test_id or "surrogate",
+            offer_headline=offer.headline,
+            primary_emotion=prediction.emotion,
+            emotion_intensity=prediction.emotion_intensity,
+            emotional_reasoning=note,
+            first_impression=note,
+            detailed_reasoning=note,
+            perceived_value=prediction.perceived_value,
+            decision=prediction.decision,
+            confidence_score=prediction.probability,
+            alignment_with_values={},
+            model_used=SURROGATE_MODEL,
+            model_tier=SURROGATE_MODEL,
+        )
+
+    # --- persistence --------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Save as .npz (arrays plus JSON metadata, no pickle)"""
+        meta = {
+            "persona_ids": self.space.persona_ids,
+            "hash_buckets": HASH_BUCKETS,
+            "decisions": DECISIONS,
+            "emotions": EMOTIONS,
+            "emotion_intensity": self.emotion_intensity,
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                mean=self.mean,
+                scale=self.scale,
+                decision_weights=self.decision_weights,
+                emotion_weights=self.emotion_weights,
+                value_weights=self.value_weights,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "SurrogateModel":
+        """
+        Raises:
+            ValueError: If the file was saved with a different feature layout
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if (
+                meta["hash_buckets"] != HASH_BUCKETS
+                or meta["decisions"] != DECISIONS
+                or meta["emotions"] != EMOTIONS
+            ):
+                raise ValueError(f"{path} was trained with another feature layout; retrain it")
+            return cls(
+                FeatureSpace(meta["persona_ids"]),
+                data["mean"],
+                data["scale"],
+                data["decision_weights"],
+                data["emotion_weights"],
+                data["value_weights"],
+                meta["emotion_intensity"],
+            )
+
+
+def training_rows(
+    records: Iterable[Dict[str, Any]],
+    offers: Mapping[str, AdOffer],
+    personas: Mapping[str, Persona],
+) -> List[TrainingRow]:
+    """
+    Join results-file records with the offer and persona catalogs.
+
+    Records of unknown personas are skipped; offers missing from the catalog
+    contribute their headline only. Surrogate and heuristic predictions are
+    skipped so the model only learns from LLM answers, never from its own
+    output or the keyword pre-screen.
+    """
+    rows = []
+    for record in records:
+        persona = personas.get(record.get("persona_id"))
+        if persona is None or record.get("model_used") in NON_LLM_MODELS:
+            continue
+        offer = offers.get(record.get("offer_id"))
+        fields = offer_fields(offer) if offer else {"headline": record.get("offer_headline")}
+        rows.append((fields, persona, record))
+    return rows
@@ -0,0 +1,250 @@
+"""Clustering of free-text feedback (objections, "what would convince")
+
+Strings are normalised and deduplicated, turned into MinHash signatures over
+character 3-grams (robust to Russian inflection) and grouped with LSH
+banding + union-find. Everything runs locally with NumPy. Signatures depend
+only on the string itself, so they are cached per string hash and
+re-analysis only computes signatures for new strings.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, ё -> е, drop punctuation, collapse whitespace"""
+    text = text.lower().replace("ё", "е")
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def text_key(normalized: str) -> str:
+    """Stable cache key of a normalised string"""
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class MinHasher:
+    """MinHash signatures over character shingles"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.seed = seed
+        # a, b < 2^31 keep a * x + b (x < 2^32) inside uint64 without wrap-around
+        self._a = rng.integers(1, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, normalized: str) -> np.ndarray:
+        padded = f" {normalized} "
+        shingles = {padded[i : i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)}
+        if not shingles:
+            shingles = {padded}
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        permuted = ((self._a * hashes + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class SignatureCache:
+    """Signature cache keyed by normalised-string hash, persisted as .npz"""
+
+    def __init__(self, path: Path | None = None, hasher: MinHasher | None = None):
+        self.path = Path(path) if path else None
+        self.hasher = hasher or MinHasher()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._dirty = False
+
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        data = np.load(self.path, allow_pickle=False)
+        params = data["params"]
+        # A cache built with other MinHash parameters is useless: start over
+        if params.tolist() != [self.hasher.num_perm, self.hasher.seed]:
+            return
+        for key, signature in zip(data["keys"].tolist(), data["signatures"]):
+            self._signatures[key] = signature
+
+    def get_many(self, normalized: Iterable[str]) -> np.ndarray:
+        """Signatures for normalised strings (computes only the missing ones)"""
+        rows = []
+        for text in normalized:
+            key = text_key(text)
+            signature = self._signatures.get(key)
+            if signature is None:
+                signature = self._signatures[key] = self.hasher.signature(text)
+                self._dirty = True
+            rows.append(signature)
+
+        if not rows:
+            return np.empty((0, self.hasher.num_perm), dtype=np.uint32)
+        return np.vstack(rows)
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = list(self._signatures)
+        tmp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            keys=np.array(keys),
+            signatures=np.vstack([self._signatures[k] for k in keys]),
+            params=np.array([self.hasher.num_perm, self.hasher.seed]),
+        )
+        tmp_path.replace(self.path)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+@dataclass
+class TextCluster:
+    """Group of similar feedback strings"""
+
+    label: str  # most frequent original string
+    count: int  # total occurrences, duplicates included
+    variants: List[str] = field(default_factory=list)  # distinct original strings
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_texts(
+    texts: Iterable[str],
+    threshold: float = 0.5,
+    bands: int = 16,
+    cache: SignatureCache | None = None,
+) -> List[TextCluster]:
+    """
+    Deduplicate and cluster free-text strings.
+
+    Args:
+        texts: Raw strings (duplicates allowed, empty values skipped)
+        threshold: Minimum estimated Jaccard similarity of 3-gram sets to merge
+        bands: LSH bands (must divide the signature length)
+        cache: Signature cache; a throwaway in-memory cache is used if omitted
+
+    Returns:
+        Clusters, largest first
+    """
+    if cache is None:
+        cache = SignatureCache()
+    num_perm = cache.hasher.num_perm
+    if num_perm % bands:
+        raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+
+    occurrences: Counter = Counter()
+    originals: Dict[str, Counter] = {}
+    for text in texts:
+        if not text or not isinstance(text, str):
+            continue
+        normalized = normalize_text(text)
+        if not normalized:
+            continue
+        occurrences[normalized] += 1
+        originals.setdefault(normalized, Counter())[text.strip()] += 1
+
+    distinct = list(occurrences)
+    if not distinct:
+        return []
+
+    signatures = cache.get_many(distinct)
+
+    # LSH: strings sharing any band become candidate pairs
+    parent = list(range(len(distinct)))
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        chunk = signatures[:, band * rows : (band + 1) * rows]
+        for i, row in enumerate(chunk):
+            buckets.setdefault(row.tobytes(), []).append(i)
+
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = _find(parent, first), _find(parent, other)
+                if root_a == root_b:
+                    continue
+                similarity = float(np.mean(signatures[first] == signatures[other]))
+                if similarity >= threshold:
+                    parent[root_b] = root_a
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(distinct)):
+        groups.setdefault(_find(parent, i), []).append(i)
+
+    clusters = []
+    for members in groups.values():
+        variants: Counter = Counter()
+        for i in members:
+            variants.update(originals[distinct[i]])
+        # Most frequent wording wins, shorter wording breaks ties
+        ranked = sorted(variants.items(), key=lambda item: (-item[1], len(item[0])))
+        clusters.append(
+            TextCluster(
+                label=ranked[0][0],
+                count=sum(occurrences[distinct[i]] for i in members),
+                variants=[text for text, _ in ranked],
+            )
+        )
+
+    cache.save()
+    return sorted(clusters, key=lambda c: c.count, reverse=True)
+
+
+def cluster_field(
+    df: pd.DataFrame,
+    column: str = "objections",
+    threshold: float = 0.5,
+    cache: SignatureCache | None = None,
+) -> pd.DataFrame:
+    """
+    Cluster a text column of a result set (list columns are exploded).
+
+    Returns:
+        DataFrame with columns label, count, share, variants (largest cluster first)
+    """
+    if column not in df.columns or df.empty:
+        return pd.DataFrame(columns=["label", "count", "share", "variants"])
+
+    values = df[column].explode().dropna()
+    clusters = cluster_texts(values.tolist(), threshold=threshold, cache=cache)
+    total = sum(c.count for c in clusters) or 1
+
+    return pd.DataFrame(
+        [
+            {
+                "label": c.label,
+                "count": c.count,
+                "share": c.count / total,
+                "variants": len(c.variants),
+            }
+            for c in clusters
+        ],
+        columns=["label", "count", "share", "variants"],
+    )
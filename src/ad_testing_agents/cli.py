@@ -0,0 +1,1003 @@
+"""Command-line batch runner
+
+    ad-testing run [--agent mock|api|claude-code|heuristic] [--concurrency N] [--rate-limit R]
+                   [--cascade] [--prescreen [--reject-below S]] [--adaptive | --listwise]
+                   [--samples N [--agreement A]] [--screen [FIELDS]]
+                   [--offer ID ...] [--persona ID ...] [--shard I/N] [--format json|jsonl]
+    ad-testing design SPEC_FILE [--runs N] [--metric perceived_value|conversion]
+    ad-testing merge SHARD_FILE [SHARD_FILE ...] [--output PATH] [--workers N]
+    ad-testing summarize RESULTS_FILE [...] [--workers N]
+    ad-testing surrogate [--results-dir DIR] [--output PATH]
+    ad-testing worker [--redis-url URL | --local DB] [--batch-size N] [--concurrency N] [--coalesce]
+    ad-testing enqueue [--local DB] [--priority interactive|bulk] [--tenant NAME] [--run-id ID]
+
+Sharding assigns every (offer, persona) cell to exactly one of N shards by a
+stable hash, so shards can run on different machines or processes and be
+merged into one results file afterwards.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Dict, List, Tuple, TypeVar
+
+from .agents import (
+    SCREENING_FIELDS,
+    AgentOrchestrator,
+    AgreementPolicy,
+    CascadePolicy,
+    ConsensusSampler,
+    DesignResult,
+    FactorialExperiment,
+    OfferDesign,
+    RateLimiter,
+    SequentialComparison,
+    TriggerIndex,
+)
+from .analytics import (
+    SurrogateModel,
+    best_offer,
+    overall_summary,
+    process_results_files,
+    results_frame,
+    training_rows,
+)
+from .config import config
+from .models import AdOffer, Persona
+from .personas import load_all_personas
+from .queue import (
+    PRIORITIES,
+    PYTHON_QUEUE_NAME,
+    BullMQQueue,
+    CatalogResolver,
+    EvaluationWorker,
+    LocalJobQueue,
+    StoreSink,
+)
+from .storage import ResultsStore, result_record
+
+DEFAULT_OFFERS_FILE = Path("data/test_offers.json")
+DEFAULT_SURROGATE_FILE = Path("data/surrogate.npz")
+DEFAULT_DESIGN_FILE = Path("data/offer_design.json")
+
+Shard = Tuple[int, int]  # (index starting at 1, count)
+
+
+# --- inputs -----------------------------------------------------------------
+
+
+def load_offers(path: Path) -> List[AdOffer]:
+    """Offers from a JSON list (fields of data/test_offers.json)"""
+    with open(path, encoding="utf-8") as f:
+        offers_data = json.load(f)
+
+    return [
+        AdOffer(
+            test_id=offer["id"],
+            headline=offer["headline"],
+            body=offer["body"],
+            call_to_action=offer["call_to_action"],
+            price=offer.get("price"),
+            discount=offer.get("discount"),
+        )
+        for offer in offers_data
+    ]
+
+
+def load_design(path: Path) -> OfferDesign:
+    """
+    Offer design from JSON: base offer fields plus "factors" (field -> levels).
+
+    Required fields missing from the base take the first level of their factor.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    factors = data.pop("factors", {})
+    base = {field: levels[0] for field, levels in factors.items() if field not in data}
+    base.update(data)
+    base["test_id"] = base.pop("id", path.stem)
+    try:
+        return OfferDesign(AdOffer(**base), factors)
+    except ValueError as e:
+        raise SystemExit(f"❌ Invalid design {path}: {e}") from e
+
+
+def parse_shard(text: str) -> Shard:
+    """Parse "i/n" (1 <= i <= n)"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like i/n, got {text!r}") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard index must be in 1..{count}, got {index}")
+    return index, count
+
+
+def cell_shard(offer_id: str, persona_id: str, count: int) -> int:
+    """Shard (1..count) of an (offer, persona) cell, identical on every machine"""
+    digest = hashlib.sha1(f"{offer_id}\x00{persona_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def plan_cells(
+    offers: List[AdOffer], personas: List[Persona], shard: Shard | None = None
+) -> List[Tuple[AdOffer, List[Persona]]]:
+    """Offers with the personas this shard evaluates them on"""
+    plan = []
+    for offer in offers:
+        subset = [
+            persona
+            for persona in personas
+            if shard is None or cell_shard(offer.test_id, persona.id, shard[1]) == shard[0]
+        ]
+        if subset:
+            plan.append((offer, subset))
+    return plan
+
+
+# --- results files ----------------------------------------------------------
+
+
+def write_results(
+    path: Path, metadata: Dict[str, Any], results: List[Dict[str, Any]], fmt: str = "json"
+) -> None:
+    """Write a results file: "json" (batch file) or "jsonl" (metadata line, then records)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            f.write(json.dumps({"metadata": metadata}, ensure_ascii=False) + "\n")
+            for record in results:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            json.dump({"metadata": metadata, "results": results}, f, indent=2, ensure_ascii=False)
+
+    tmp_path.replace(path)
+
+
+T = TypeVar("T")
+
+
+async def closing(orchestrator: AgentOrchestrator, work: Awaitable[T]) -> T:
+    """Await `work`, then close the orchestrator's API client in the same event loop"""
+    try:
+        return await work
+    finally:
+        await orchestrator.aclose()
+
+
+# --- run --------------------------------------------------------------------
+
+
+async def run_grid(
+    orchestrator: AgentOrchestrator,
+    plan: List[Tuple[AdOffer, List[Persona]]],
+    sampler: ConsensusSampler | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate all planned cells; the orchestrator bounds concurrency and rate.
+
+    With a sampler, every cell is sampled until its samples agree and the
+    consensus response is recorded.
+    """
+
+    async def run_offer(offer: AdOffer, personas: List[Persona]) -> List[Dict[str, Any]]:
+        if sampler is not None:
+            estimates = await sampler.evaluate_batch(offer, personas)
+            responses = [estimate.response() for estimate in estimates]
+        else:
+            responses = await orchestrator.test_offer_batch(offer, personas, parallel=True)
+        print(f"   ✅ {offer.test_id}: {len(responses)}/{len(personas)} responses")
+        return [result_record(offer, response) for response in responses]
+
+    batches = await asyncio.gather(*(run_offer(offer, personas) for offer, personas in plan))
+    return [record for batch in batches for record in batch]
+
+
+async def run_adaptive(
+    orchestrator: AgentOrchestrator, offers: List[AdOffer], personas: List[Persona]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Sequential comparison: dominated offers stop consuming evaluations"""
+    comparison = SequentialComparison(orchestrator, personas)
+    result = await comparison.run(offers)
+
+    all_results = [
+        result_record(arm.offer, response) for arm in result.arms for response in arm.responses
+    ]
+
+    for arm in result.arms:
+        status = "✅ active" if arm.active else f"⏹  stopped after round {arm.eliminated_round}"
+        print(f"   {arm.offer.test_id}: {arm.evaluations} evals, {status}")
+
+    print(
+        f"\n   🏆 Winner after {result.rounds} rounds: {result.winner.offer.test_id} "
+        f"({result.evaluations}/{result.full_grid_evaluations} evaluations, "
+        f"{result.savings:.0%} saved)"
+    )
+
+    return all_results, {
+        "metric": result.metric,
+        "rounds": result.rounds,
+        "evaluations": result.evaluations,
+        "full_grid_evaluations": result.full_grid_evaluations,
+        "winner": result.winner.offer.test_id,
+    }
+
+
+async def run_listwise(
+    orchestrator: AgentOrchestrator, offers: List[AdOffer], personas: List[Persona]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Listwise comparison: every persona ranks all offers in one call"""
+    responses = await orchestrator.rank_offers(offers, personas)
+    by_id = {offer.test_id: offer for offer in offers}
+    all_results = [result_record(by_id[response.test_id], response) for response in responses]
+
+    ranks: Dict[str, List[int]] = {}
+    for response in responses:
+        ranks.setdefault(response.test_id, []).append(response.rank)
+    average_rank = {offer_id: sum(r) / len(r) for offer_id, r in ranks.items()}
+    for offer_id, rank in sorted(average_rank.items(), key=lambda item: item[1]):
+        print(f"   {offer_id}: average rank {rank:.1f} ({len(ranks[offer_id])} personas)")
+
+    stats = dict(orchestrator.listwise_stats)
+    print(
+        f"\n   📋 {stats['calls']} agent calls for {stats['evaluations']} evaluations "
+        f"(one call per persona instead of one per offer)"
+    )
+    return all_results, {**stats, "average_rank": average_rank}
+
+
+def _select(items: list, ids: List[str] | None, key, kind: str) -> list:
+    if not ids:
+        return items
+    unknown = set(ids) - {key(item) for item in items}
+    if unknown:
+        raise SystemExit(f"❌ Unknown {kind}: {', '.join(sorted(unknown))}")
+    return [item for item in items if key(item) in ids]
+
+
+def print_summary(results: List[Dict[str, Any]]) -> None:
+    df = results_frame(results)
+    summary = overall_summary(df)
+    print(f"   📊 Overall Conversion Rate: {summary['conversion_rate']:.1%}")
+    print(f"   💎 Average Perceived Value: {summary['avg_value']:.1f}/10")
+
+    best = best_offer(df)
+    if best is not None:
+        print(f"\n   🏆 Best Offer: {best.name}")
+        print(f"      {best['offer_headline'][:60]}")
+        print(f"      Avg Value: {best['avg_value']:.1f}/10")
+
+
+def store_run(output: Path, metadata: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    """Index a complete run in the results store next to the output file"""
+    store = ResultsStore.for_dir(output.parent)
+    # Only .json batch files are re-synced from disk, so only they are recorded as the source
+    source = output if output.suffix == ".json" else None
+    store.write_run(output.stem, metadata, results, source=source)
+
+
+def build_orchestrator(args: argparse.Namespace) -> AgentOrchestrator:
+    """Orchestrator from the shared agent options of `run` and `worker`"""
+    cascade = None
+    if args.cascade:
+        cascade = CascadePolicy(
+            cheap_model=args.cheap_model or config.CASCADE_MODEL,
+            confidence_threshold=(
+                args.escalate_below
+                if args.escalate_below is not None
+                else config.CASCADE_CONFIDENCE_THRESHOLD
+            ),
+        )
+    prescreen = None
+    if args.prescreen or args.agent == "heuristic":
+        prescreen = TriggerIndex(load_all_personas())
+    try:
+        surrogate = SurrogateModel.load(args.surrogate) if args.surrogate else None
+        return AgentOrchestrator(
+            model=args.model,
+            agent_type=args.agent,
+            max_concurrency=args.concurrency,
+            rate_limiter=RateLimiter(args.rate_limit) if args.rate_limit else None,
+            coalesce=args.coalesce,
+            cascade=cascade,
+            surrogate=surrogate,
+            surrogate_threshold=args.surrogate_threshold,
+            prescreen=prescreen,
+            prescreen_reject_below=args.reject_below,
+            stop_after=args.screen.split(",") if args.screen else None,
+        )
+    except (ValueError, OSError) as e:
+        raise SystemExit(f"❌ {e}") from e
+
+
+def print_surrogate(orchestrator: AgentOrchestrator) -> Dict[str, int] | None:
+    """Print and return how many pairs the surrogate answered (None without --surrogate)"""
+    if orchestrator.surrogate is None:
+        return None
+
+    stats = dict(orchestrator.surrogate_stats)
+    total = stats["surrogate"] + stats["agent"]
+    if total:
+        print(
+            f"   🔮 Surrogate answered {stats['surrogate']}/{total} pairs "
+            f"({stats['surrogate'] / total:.0%}); {stats['agent']} went to the agent"
+        )
+    return stats
+
+
+def print_prescreen(orchestrator: AgentOrchestrator) -> Dict[str, int] | None:
+    """Print and return how many pairs the pre-screen rejected (None without --prescreen)"""
+    if orchestrator.prescreen is None or orchestrator.agent_type == "heuristic":
+        return None
+
+    stats = dict(orchestrator.prescreen_stats)
+    total = stats["rejected"] + stats["evaluated"]
+    if total:
+        print(
+            f"   🔎 Pre-screen rejected {stats['rejected']}/{total} pairs "
+            f"({stats['rejected'] / total:.0%}) without an agent call"
+        )
+    return stats
+
+
+def print_consensus(sampler: ConsensusSampler | None) -> Dict[str, Any] | None:
+    """Print and return the sampling statistics (None without --samples)"""
+    if sampler is None:
+        return None
+
+    stats = sampler.stats.to_dict(sampler.policy)
+    if stats["pairs"]:
+        print(
+            f"   🎲 {stats['samples']} samples for {stats['pairs']} pairs "
+            f"({stats['samples_per_pair']:.1f} per pair, {_savings(stats['savings'])} vs "
+            f"{stats['max_samples_per_pair']} each); {stats['ambiguous_pairs']} ambiguous, "
+            f"mean value std {stats['mean_value_std']:.2f}"
+        )
+    return stats
+
+
+def _savings(fraction: float) -> str:
+    return f"{fraction:.0%} saved" if fraction >= 0 else f"{-fraction:.0%} more"
+
+
+def print_cascade(orchestrator: AgentOrchestrator) -> Dict[str, Any] | None:
+    """Print and return the cascade statistics (None without --cascade)"""
+    if orchestrator.cascade_stats is None:
+        return None
+
+    stats = orchestrator.cascade_stats.to_dict()
+    reasons = ", ".join(f"{n} {reason}" for reason, n in stats["escalations"].items())
+    print(
+        f"   🪜 Cascade: {stats['escalated']}/{stats['evaluations']} escalated "
+        f"({stats['escalation_rate']:.0%}{': ' + reasons if reasons else ''})"
+    )
+    if stats["cost_savings"] is not None:
+        print(
+            f"      Cost ${stats['cost_usd']:.4f} vs ${stats['baseline_cost_usd']:.4f} "
+            f"all-strong ({_savings(stats['cost_savings'])})"
+        )
+    if stats["latency_savings"] is not None:
+        print(
+            f"      Agent time {stats['latency_ms'] / 1000:.1f}s vs "
+            f"~{stats['baseline_latency_ms'] / 1000:.1f}s all-strong "
+            f"({_savings(stats['latency_savings'])})"
+        )
+    return stats
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    print("🧪 Ad Testing Agents — Batch Test\n")
+
+    personas = _select(load_all_personas(), args.persona, lambda p: p.id, "personas")
+    offers = _select(load_offers(args.offers), args.offer, lambda o: o.test_id, "offers")
+    print(f"1. Loaded {len(personas)} personas and {len(offers)} offers from {args.offers}")
+
+    if args.adaptive and args.shard:
+        raise SystemExit("❌ --adaptive cannot be combined with --shard")
+    if args.listwise and (args.adaptive or args.shard):
+        raise SystemExit("❌ --listwise cannot be combined with --adaptive or --shard")
+    if args.listwise and len(offers) < 2:
+        raise SystemExit("❌ --listwise needs at least two offers")
+    if args.samples > 1 and (args.adaptive or args.listwise):
+        raise SystemExit("❌ --samples cannot be combined with --adaptive or --listwise")
+
+    orchestrator = build_orchestrator(args)
+    sampler = None
+    if args.samples > 1:
+        try:
+            policy = AgreementPolicy(
+                min_samples=min(2, args.samples),
+                max_samples=args.samples,
+                decision_agreement=args.agreement,
+            )
+        except ValueError as e:
+            raise SystemExit(f"❌ {e}") from e
+        sampler = ConsensusSampler(orchestrator, policy)
+
+    plan = plan_cells(offers, personas, args.shard)
+    cells = sum(len(subset) for _, subset in plan)
+    shard_label = f", shard {args.shard[0]}/{args.shard[1]}" if args.shard else ""
+    print(
+        f"\n2. Running {cells} of {len(offers) * len(personas)} tests "
+        f"(agent: {args.agent}, concurrency: {args.concurrency}{shard_label})...\n"
+    )
+
+    adaptive_info = listwise_info = None
+    if args.adaptive:
+        print("   Adaptive mode: dominated offers are stopped early\n")
+        all_results, adaptive_info = asyncio.run(
+            closing(orchestrator, run_adaptive(orchestrator, offers, personas))
+        )
+    elif args.listwise:
+        print("   Listwise mode: each persona ranks all offers in one call\n")
+        all_results, listwise_info = asyncio.run(
+            closing(orchestrator, run_listwise(orchestrator, offers, personas))
+        )
+    else:
+        all_results = asyncio.run(closing(orchestrator, run_grid(orchestrator, plan, sampler)))
+    consensus_info = print_consensus(sampler)
+    cascade_info = print_cascade(orchestrator)
+    surrogate_info = print_surrogate(orchestrator)
+    prescreen_info = print_prescreen(orchestrator)
+
+    run_id = args.run_id or f"batch_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    suffix = ".jsonl" if args.format == "jsonl" else ".json"
+    if args.output:
+        output = args.output
+    elif args.shard:
+        index, count = args.shard
+        output = args.results_dir / "shards" / f"{run_id}.shard-{index}-of-{count}{suffix}"
+    else:
+        output = args.results_dir / f"{run_id}{suffix}"
+
+    metadata = {
+        "test_date": datetime.now().isoformat(),
+        "num_offers": len(offers),
+        "num_personas": len(personas),
+        "num_results": len(all_results),
+        "agent_type": args.agent,
+        "model": orchestrator.model if args.agent == "api" else None,
+        "adaptive": adaptive_info,
+        "listwise": listwise_info,
+        "consensus": consensus_info,
+        "cascade": cascade_info,
+        "surrogate": surrogate_info,
+        "prescreen": prescreen_info,
+        "shard": list(args.shard) if args.shard else None,
+        "offers": [offer.test_id for offer in offers],
+        "personas": [persona.id for persona in personas],
+    }
+
+    print("\n3. Saving results...")
+    write_results(output, metadata, all_results, args.format)
+    if not args.shard and not args.no_store:
+        store_run(output, metadata, all_results)
+    print(f"   ✅ Saved {len(all_results)} results to {output}")
+
+    if all_results:
+        print("\n4. Quick Statistics:")
+        print_summary(all_results)
+
+    if args.shard:
+        print("\n💡 Next: combine shards with `ad-testing merge <shard files>`")
+    print("\n✅ Batch test completed!")
+
+
+# --- design -----------------------------------------------------------------
+
+
+def print_effects(result: DesignResult) -> Dict[str, Any]:
+    """Print the fitted component effects and return them for run metadata"""
+    design = result.design
+    info = {}
+    for segment, effects in result.effects.items():
+        offer, predicted = result.best(segment)
+        info[segment] = {
+            "intercept": effects.intercept,
+            "effects": {
+                name: dict(zip(map(str, design.factors[name]), values))
+                for name, values in effects.effects.items()
+            },
+            "best": design.levels(effects.best_run()),
+            "predicted": predicted,
+            "observations": effects.observations,
+        }
+
+    overall = result.effects["all"]
+    print(f"   Component effects on {result.metric} (mean {overall.intercept:.2f}):")
+    for name, values in overall.effects.items():
+        print(f"   {name}:")
+        for level, value in sorted(
+            zip(design.factors[name], values), key=lambda item: item[1], reverse=True
+        ):
+            print(f"      {value:+.2f}  {level if level is not None else '(none)'}")
+
+    for segment, segment_info in info.items():
+        label = "all personas" if segment == "all" else f"segment {segment}"
+        print(f"\n   🏆 Best for {label} (predicted {segment_info['predicted']:.2f}):")
+        for name, level in segment_info["best"].items():
+            print(f"      {name}: {level}")
+    return info
+
+
+def cmd_design(args: argparse.Namespace) -> None:
+    print("🧪 Ad Testing Agents — Offer Design\n")
+
+    personas = _select(load_all_personas(), args.persona, lambda p: p.id, "personas")
+    design = load_design(args.spec)
+    print(
+        f"1. Loaded {len(personas)} personas and {len(design.factors)} components "
+        f"({design.full_size} combinations) from {args.spec}"
+    )
+
+    orchestrator = build_orchestrator(args)
+    experiment = FactorialExperiment(orchestrator, personas, metric=args.metric)
+    try:
+        runs = design.select(args.runs, args.seed)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}") from e
+    print(
+        f"\n2. Evaluating {len(runs)} of {design.full_size} combinations "
+        f"(D-efficiency {design.efficiency(runs):.2f}, agent: {args.agent})...\n"
+    )
+    result = asyncio.run(closing(orchestrator, experiment.run(design, fraction=runs)))
+    print(
+        f"   ✅ {result.evaluations}/{result.full_grid_evaluations} evaluations "
+        f"({1 - result.evaluations / result.full_grid_evaluations:.0%} of the full grid saved)\n"
+    )
+    effects = print_effects(result)
+
+    run_id = args.run_id or f"design_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    output = args.output or args.results_dir / f"{run_id}.json"
+    all_results = [
+        result_record(offer, response)
+        for offer, responses in zip(result.offers, result.responses)
+        for response in responses
+    ]
+    metadata = {
+        "test_date": datetime.now().isoformat(),
+        "num_offers": len(result.offers),
+        "num_personas": len(personas),
+        "num_results": len(all_results),
+        "agent_type": args.agent,
+        "model": orchestrator.model if args.agent == "api" else None,
+        "design": {
+            "spec": str(args.spec),
+            "metric": args.metric,
+            "full_size": design.full_size,
+            "runs": [design.levels(run) for run in result.runs],
+            "effects": effects,
+        },
+        "offers": [offer.test_id for offer in result.offers],
+        "personas": [persona.id for persona in personas],
+    }
+
+    write_results(output, metadata, all_results)
+    if not args.no_store:
+        store_run(output, metadata, all_results)
+    print(f"\n✅ Saved {len(all_results)} results to {output}")
+
+
+# --- merge ------------------------------------------------------------------
+
+
+def merge_shards(
+    paths: List[Path], workers: int | None = 1
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Combine shard files of one run.
+
+    Files are parsed and validated in worker processes; invalid records are
+    reported and dropped.
+
+    Raises:
+        ValueError: If the files come from runs with different shard counts or
+            duplicate a shard
+    """
+    pipeline = process_results_files(paths, workers=workers, keep_records=True)
+    if pipeline.invalid:
+        print(f"⚠️  Skipped {pipeline.invalid} invalid records")
+        for error in pipeline.errors:
+            print(f"   {error}")
+
+    seen: Dict[int, Path] = {}
+    count = None
+    metadata: Dict[str, Any] = {}
+    results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    for path in paths:
+        shard_metadata = pipeline.metadata.get(str(path), {})
+        shard = shard_metadata.get("shard")
+        if shard:
+            index, shard_count = shard
+            if count is not None and shard_count != count:
+                raise ValueError(f"{path} has {shard_count} shards, expected {count}")
+            if index in seen:
+                raise ValueError(f"Shard {index}/{shard_count} given twice: {seen[index]}, {path}")
+            count = shard_count
+            seen[index] = path
+
+        metadata = metadata or dict(shard_metadata)
+        if "test_date" in shard_metadata:
+            metadata["test_date"] = min(metadata["test_date"], shard_metadata["test_date"])
+
+    for record in pipeline.records():
+        results.setdefault((record["offer_id"], record["persona_id"]), record)
+
+    if count is not None:
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        if missing:
+            print(f"⚠️  Missing shards: {', '.join(f'{i}/{count}' for i in missing)}")
+
+    merged = list(results.values())
+    metadata.update(
+        num_results=len(merged),
+        num_offers=len({r["offer_id"] for r in merged}),
+        num_personas=len({r["persona_id"] for r in merged}),
+        shard=None,
+        merged_shards=sorted(seen),
+    )
+    return metadata, merged
+
+
+def cmd_merge(args: argparse.Namespace) -> None:
+    try:
+        metadata, results = merge_shards(args.files, workers=args.workers)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}") from e
+
+    output = args.output or (
+        args.results_dir / f"batch_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    write_results(output, metadata, results, "jsonl" if output.suffix == ".jsonl" else "json")
+    if not args.no_store:
+        store_run(output, metadata, results)
+
+    print(f"✅ Merged {len(args.files)} files ({len(results)} results) into {output}")
+    if results:
+        print_summary(results)
+
+
+# --- summarize --------------------------------------------------------------
+
+
+def cmd_summarize(args: argparse.Namespace) -> None:
+    pipeline = process_results_files(args.files, workers=args.workers)
+    aggregator = pipeline.aggregator
+
+    print(f"📊 {pipeline.valid} results from {len(args.files)} files ({pipeline.invalid} invalid)")
+    for error in pipeline.errors:
+        print(f"   ⚠️  {error}")
+    if not pipeline.valid:
+        return
+
+    overall = aggregator.overall()
+    print(f"   Conversion Rate: {overall['conversion_rate']:.1%}")
+    print(f"   Average Perceived Value: {overall['avg_value']:.1f}/10\n")
+
+    offers = aggregator.summary("offer").head(args.top)
+    for rank, (offer_id, row) in enumerate(offers.iterrows(), 1):
+        print(
+            f"   {rank:>2}. {offer_id}: value {row['avg_value']:.1f}/10, "
+            f"conversion {row['conversion_rate']:.0%} "
+            f"[{row['conversion_low']:.0%}–{row['conversion_high']:.0%}], n={row['count']}"
+        )
+
+    if args.save:
+        aggregator.save(args.save)
+        print(f"\n✅ Aggregates saved to {args.save}")
+
+
+# --- surrogate --------------------------------------------------------------
+
+
+def cmd_surrogate(args: argparse.Namespace) -> None:
+    store = ResultsStore.for_dir(args.results_dir)
+    store.sync_dir(args.results_dir)
+
+    personas = {persona.id: persona for persona in load_all_personas()}
+    offers = {offer.test_id: offer for offer in load_offers(args.offers)}
+    records = [
+        record
+        for run_id in store.run_ids()
+        for record in store.frame(run_id, ["model_used"]).to_dict("records")
+    ]
+    rows = training_rows(records, offers, personas)
+    print(f"🔮 Training on {len(rows)} results from {len(store.run_ids())} runs...")
+
+    try:
+        model, report = SurrogateModel.fit_with_report(rows)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}") from e
+
+    print(
+        f"   Hold-out ({report.test_size} results): decision accuracy {report.accuracy:.0%}, "
+        f"perceived value MAE {report.value_mae:.2f}"
+    )
+    for threshold, coverage in report.coverage.items():
+        print(
+            f"   threshold {threshold}: answers {coverage:.0%} of pairs, "
+            f"{report.confident_accuracy[threshold]:.0%} of them correct"
+        )
+
+    model.save(args.output)
+    print(f"✅ Saved to {args.output}; use it with `ad-testing run --surrogate {args.output}`")
+
+
+# --- worker -----------------------------------------------------------------
+
+
+async def run_worker(worker: EvaluationWorker, max_jobs: int | None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass  # e.g. Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    try:
+        await worker.run(stop, max_jobs)
+    finally:
+        await worker.queue.close()
+        await worker.orchestrator.aclose()
+
+
+def cmd_worker(args: argparse.Namespace) -> None:
+    if args.local:
+        queue = LocalJobQueue(args.local)
+    else:
+        try:
+            queue = BullMQQueue(args.queue, url=args.redis_url)
+        except (RuntimeError, ValueError) as e:
+            raise SystemExit(f"❌ {e}") from e
+
+    orchestrator = build_orchestrator(args)
+    worker = EvaluationWorker(
+        queue,
+        orchestrator,
+        CatalogResolver(load_all_personas(), load_offers(args.offers)),
+        StoreSink(ResultsStore.for_dir(args.results_dir)),
+        batch_size=args.batch_size,
+    )
+
+    print(
+        f"👷 Worker on {queue} (agent: {args.agent}, batch: {args.batch_size}, "
+        f"concurrency: {args.concurrency}); Ctrl+C to stop"
+    )
+    try:
+        asyncio.run(run_worker(worker, args.max_jobs))
+    except KeyboardInterrupt:
+        pass
+
+    stats = worker.stats
+    print(
+        f"✅ {stats.completed} jobs completed, {stats.failed} failed attempts "
+        f"in {stats.batches} batches ({stats.throughput:.1f} jobs/s)"
+    )
+    print_cascade(orchestrator)
+    print_surrogate(orchestrator)
+    print_prescreen(orchestrator)
+
+
+def cmd_enqueue(args: argparse.Namespace) -> None:
+    if not args.local:
+        raise SystemExit("❌ No queue database: pass --local or set JOB_QUEUE_PATH")
+
+    personas = _select(load_all_personas(), args.persona, lambda p: p.id, "personas")
+    offers = _select(load_offers(args.offers), args.offer, lambda o: o.test_id, "offers")
+    run_id = args.run_id or f"batch_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    queue = LocalJobQueue(args.local)
+    ids = queue.add_many(
+        [
+            {"personaId": persona.id, "offerId": offer.test_id, "testRunId": run_id}
+            for offer in offers
+            for persona in personas
+        ],
+        priority=args.priority,
+        tenant=args.tenant,
+    )
+    print(f"✅ Queued {len(ids)} {args.priority} jobs for run {run_id} (tenant: {args.tenant})")
+    for state, by_priority in sorted(queue.counts().items()):
+        print(f"   {state}: {', '.join(f'{n} {p}' for p, n in by_priority.items())}")
+
+
+# --- entry point ------------------------------------------------------------
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ad-testing", description="Ad Testing Agents batch CLI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run offers through personas")
+    run.add_argument("--offers", type=Path, default=DEFAULT_OFFERS_FILE, help="Offers JSON file")
+    run.add_argument("--offer", action="append", help="Only this offer id (repeatable)")
+    run.add_argument("--persona", action="append", help="Only this persona id (repeatable)")
+    run.add_argument("--shard", type=parse_shard, help="Run only shard i of n (e.g. 2/4)")
+    run.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Evaluate offers in rounds and stop spending on statistically dominated offers",
+    )
+    run.add_argument(
+        "--listwise",
+        action="store_true",
+        help="Each persona ranks all offers in one call instead of one call per offer",
+    )
+    run.add_argument(
+        "--samples",
+        type=int,
+        default=1,
+        help="Up to N samples per cell, stopping once they agree (default: 1, single sample)",
+    )
+    run.add_argument(
+        "--agreement",
+        type=float,
+        default=0.8,
+        help="Share of samples with the same decision that settles a cell (default: 0.8)",
+    )
+    run.add_argument("--format", choices=["json", "jsonl"], default="json")
+    run.add_argument("--run-id", help="Run id / output file stem (default: batch_test_<time>)")
+    run.add_argument("--output", type=Path, help="Output file (overrides --results-dir)")
+    run.set_defaults(handler=cmd_run)
+
+    design = commands.add_parser(
+        "design", help="Test a fraction of all component combinations and fit their effects"
+    )
+    design.add_argument(
+        "spec", type=Path, nargs="?", default=DEFAULT_DESIGN_FILE, help="Design JSON file"
+    )
+    design.add_argument("--runs", type=int, help="Combinations to evaluate (default: 2x model)")
+    design.add_argument(
+        "--metric", choices=["perceived_value", "conversion"], default="perceived_value"
+    )
+    design.add_argument("--persona", action="append", help="Only this persona id (repeatable)")
+    design.add_argument("--seed", type=int, default=42, help="Seed of the design search")
+    design.add_argument("--run-id", help="Run id / output file stem (default: design_<time>)")
+    design.add_argument("--output", type=Path, help="Output file (overrides --results-dir)")
+    design.set_defaults(handler=cmd_design)
+
+    merge = commands.add_parser("merge", help="Merge shard results into one run")
+    merge.add_argument("files", type=Path, nargs="+", help="Shard results files")
+    merge.add_argument("--output", type=Path, help="Merged results file")
+    merge.set_defaults(handler=cmd_merge)
+
+    summarize = commands.add_parser(
+        "summarize", help="Aggregate results files without loading them into one process"
+    )
+    summarize.add_argument("files", type=Path, nargs="+", help="Results files (.json/.jsonl)")
+    summarize.add_argument("--top", type=int, default=10, help="Offers to list (default: 10)")
+    summarize.add_argument("--save", type=Path, help="Save the merged aggregates as JSON")
+    summarize.set_defaults(handler=cmd_summarize)
+
+    worker = commands.add_parser(
+        "worker", help="Consume evaluation jobs from a Redis (BullMQ) queue or a local queue"
+    )
+    worker.add_argument("--redis-url", help="Redis URL (default: REDIS_URL)")
+    worker.add_argument("--local", type=Path, help="Consume a local SQLite queue instead of Redis")
+    worker.add_argument(
+        "--queue", default=PYTHON_QUEUE_NAME, help=f"Queue name (default: {PYTHON_QUEUE_NAME})"
+    )
+    worker.add_argument("--batch-size", type=int, default=16, help="Jobs leased per batch")
+    worker.add_argument("--max-jobs", type=int, help="Exit after this many jobs")
+    worker.add_argument(
+        "--offers", type=Path, default=DEFAULT_OFFERS_FILE, help="Offers for jobs with offerId"
+    )
+    worker.add_argument("--results-dir", type=Path, default=config.RESULTS_DIR)
+    worker.set_defaults(handler=cmd_worker)
+
+    surrogate = commands.add_parser(
+        "surrogate", help="Train the local decision model on stored results"
+    )
+    surrogate.add_argument("--results-dir", type=Path, default=config.RESULTS_DIR)
+    surrogate.add_argument(
+        "--offers", type=Path, default=DEFAULT_OFFERS_FILE, help="Offer texts for stored offer ids"
+    )
+    surrogate.add_argument("--output", type=Path, default=DEFAULT_SURROGATE_FILE)
+    surrogate.set_defaults(handler=cmd_surrogate)
+
+    enqueue = commands.add_parser("enqueue", help="Queue a test matrix in the local job queue")
+    enqueue.add_argument(
+        "--local",
+        type=Path,
+        default=Path(config.JOB_QUEUE_PATH) if config.JOB_QUEUE_PATH else None,
+        help="Queue database (default: JOB_QUEUE_PATH)",
+    )
+    enqueue.add_argument("--priority", choices=list(PRIORITIES), default="bulk")
+    enqueue.add_argument("--tenant", default="default", help="Fairness group (team, user, ...)")
+    enqueue.add_argument("--offers", type=Path, default=DEFAULT_OFFERS_FILE, help="Offers JSON file")
+    enqueue.add_argument("--offer", action="append", help="Only this offer id (repeatable)")
+    enqueue.add_argument("--persona", action="append", help="Only this persona id (repeatable)")
+    enqueue.add_argument("--run-id", help="Run the results are stored under")
+    enqueue.set_defaults(handler=cmd_enqueue)
+
+    for command in (run, design, worker):
+        command.add_argument(
+            "--agent", choices=["mock", "api", "claude-code", "heuristic"], default="mock"
+        )
+        command.add_argument("--model", help="Claude model for --agent api (default from config)")
+        command.add_argument(
+            "--concurrency", type=int, default=8, help="Maximum agent calls in flight (default: 8)"
+        )
+        command.add_argument("--rate-limit", type=float, help="Maximum agent calls per second")
+        command.add_argument(
+            "--coalesce",
+            action="store_true",
+            help="Share one agent call between identical requests in flight (SINGLE_FLIGHT_DIR "
+            "extends this to other processes); callers then share one sample",
+        )
+        command.add_argument(
+            "--cascade",
+            action="store_true",
+            help="Evaluate with a cheap model first; escalate uncertain results to --model",
+        )
+        command.add_argument("--cheap-model", help="First cascade tier (default: CASCADE_MODEL)")
+        command.add_argument(
+            "--surrogate",
+            type=Path,
+            help="Surrogate model file; pairs it predicts confidently skip the agent",
+        )
+        command.add_argument(
+            "--surrogate-threshold",
+            type=float,
+            default=0.9,
+            help="Minimum predicted probability to accept a surrogate answer (default: 0.9)",
+        )
+        command.add_argument(
+            "--escalate-below",
+            type=float,
+            help="Escalate when confidence is below this (default: CASCADE_CONFIDENCE_THRESHOLD)",
+        )
+        command.add_argument(
+            "--prescreen",
+            action="store_true",
+            help="Reject personas whose negative triggers match the offer before the agent call",
+        )
+        command.add_argument(
+            "--reject-below",
+            type=float,
+            default=-2.0,
+            help="Pre-screen keyword score that rejects a persona (default: -2.0)",
+        )
+        command.add_argument(
+            "--screen",
+            nargs="?",
+            const=",".join(SCREENING_FIELDS),
+            metavar="FIELDS",
+            help=(
+                "--agent api: stop generation once these comma-separated fields are parsed "
+                f"(default: {','.join(SCREENING_FIELDS)}); prose fields are left empty"
+            ),
+        )
+
+    for command in (merge, summarize):
+        command.add_argument(
+            "--workers", type=int, help="Worker processes for parsing (default: CPU count)"
+        )
+
+    for command in (run, design, merge):
+        command.add_argument("--results-dir", type=Path, default=config.RESULTS_DIR)
+        command.add_argument(
+            "--no-store", action="store_true", help="Don't index the run in the results store"
+        )
+
+    return parser
+
+
+def main(argv: List[str] | None = None) -> None:
+    """CLI entry point (console script `ad-testing`)"""
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,14 +21,28 @@ class Config:
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "claude-sonnet-4-5-20250929")
     AGENT_TIMEOUT_SECONDS: int = int(os.getenv("AGENT_TIMEOUT_SECONDS", "30"))
     BATCH_PARALLEL: bool = os.getenv("BATCH_PARALLEL", "true").lower() == "true"
+    # Model cascade: cheap model first, DEFAULT_MODEL for low-confidence evaluations
+    CASCADE_MODEL: str = os.getenv("CASCADE_MODEL", "claude-haiku-4-5-20251001")
+    CASCADE_CONFIDENCE_THRESHOLD: float = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.7"))
 
     # Streamlit
     STREAMLIT_THEME: str = os.getenv("STREAMLIT_THEME", "light")
     DASHBOARD_PORT: int = int(os.getenv("DASHBOARD_PORT", "8501"))
+    DASHBOARD_WORKERS: int = int(os.getenv("DASHBOARD_WORKERS", "4"))
+
+    # Job queue
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # Local SQLite job queue shared by the dashboard and workers (empty: evaluate in-process)
+    JOB_QUEUE_PATH: str = os.getenv("JOB_QUEUE_PATH", "")
+    # Lock-file directory for sharing identical in-flight calls between processes
+    SINGLE_FLIGHT_DIR: str = os.getenv("SINGLE_FLIGHT_DIR", "")
 
     # Data directories
     RESULTS_DIR: Path = Path(os.getenv("RESULTS_DIR", "./data/results"))
     CUSTOM_PERSONAS_DIR: Path = Path(os.getenv("CUSTOM_PERSONAS_DIR", "./data/custom_personas"))
+    PERSONA_BUNDLE: Path | None = (
+        Path(os.environ["PERSONA_BUNDLE"]) if os.getenv("PERSONA_BUNDLE") else None
+    )
 
     @classmethod
     def validate(cls) -> None:
@@ -6,6 +6,11 @@ from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
+# model_used of responses that were predicted locally instead of generated by an LLM
+SURROGATE_MODEL = "surrogate"
+HEURISTIC_MODEL = "heuristic"
+NON_LLM_MODELS = frozenset({SURROGATE_MODEL, HEURISTIC_MODEL})
+
 
 class EmotionType(str, Enum):
     """Emotional reactions to ads"""
@@ -82,10 +87,27 @@ class AgentResponse(BaseModel):
         None, description="Что убедило бы персону сказать 'да'?"
     )
 
+    # Listwise comparison
+    rank: Optional[int] = Field(
+        None, ge=1, description="Место оффера при сравнении нескольких офферов (1 = лучший)"
+    )
+
+    # Repeated sampling
+    samples: Optional[int] = Field(None, ge=1, description="Число выборок при многократной оценке")
+    decision_agreement: Optional[float] = Field(
+        None, ge=0.0, le=1.0, description="Доля выборок с итоговым решением"
+    )
+    value_std: Optional[float] = Field(
+        None, ge=0.0, description="Стандартное отклонение воспринимаемой ценности по выборкам"
+    )
+
     # Metadata
     timestamp: datetime = Field(default_factory=datetime.now)
     model_used: str = Field(default="claude-sonnet-4-5")
+    model_tier: Optional[str] = Field(None, description="Ступень каскада: cheap или strong")
     response_time_ms: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
 
     class Config:
         json_schema_extra = {
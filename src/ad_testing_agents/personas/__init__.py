@@ -1,5 +1,7 @@
 """Persona management"""
 
+from .bundle import compile_bundle, read_bundle, write_bundle
+from .generator import AudienceProfile, PersonaGenerator, persona_stratum, projection_weights
 from .loader import (
     PersonaLoader,
     get_default_loader,
@@ -10,6 +12,13 @@ from .loader import (
 
 __all__ = [
     "PersonaLoader",
+    "PersonaGenerator",
+    "AudienceProfile",
+    "persona_stratum",
+    "projection_weights",
+    "compile_bundle",
+    "read_bundle",
+    "write_bundle",
     "get_default_loader",
     "load_all_personas",
     "load_persona",
@@ -0,0 +1,139 @@
+"""Persona bundle - все персоны в одном файле для быстрого старта
+
+Формат файла: первая строка — JSON-заголовок (формат, версия, число персон,
+sha256 полезной нагрузки), дальше — JSON-массив записей персон.
+Загрузка = одно чтение файла + один json.loads, без валидации каждой персоны:
+записи уже провалидированы при компиляции и защищены контрольной суммой.
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from ..models import AgeGroup, IncomeLevel, Persona, PersonalityTrait
+
+BUNDLE_FORMAT = "ad-testing-personas"
+BUNDLE_VERSION = 1
+
+
+def write_bundle(records: Iterable[Dict[str, Any]], bundle_path: Path) -> int:
+    """
+    Записывает записи персон в bundle-файл.
+
+    Args:
+        records: JSON-совместимые записи персон (Persona.model_dump(mode="json"))
+        bundle_path: Куда записать bundle
+
+    Returns:
+        Количество записанных персон
+    """
+    records = list(records)
+    payload = json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    header = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "count": len(records),
+        "checksum": hashlib.sha256(payload).hexdigest(),
+    }
+
+    bundle_path = Path(bundle_path)
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Пишем во временный файл и переименовываем, чтобы читатели не увидели половину bundle
+    tmp_path = bundle_path.with_name(bundle_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8"))
+        f.write(b"\n")
+        f.write(payload)
+    tmp_path.replace(bundle_path)
+
+    return len(records)
+
+
+def read_bundle(bundle_path: Path) -> List[Dict[str, Any]]:
+    """
+    Читает записи персон из bundle-файла (одно чтение с диска).
+
+    Raises:
+        ValueError: Если формат не распознан или контрольная сумма не совпала
+    """
+    raw = Path(bundle_path).read_bytes()
+    header_line, _, payload = raw.partition(b"\n")
+
+    try:
+        header = json.loads(header_line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid persona bundle header in {bundle_path}: {e}") from e
+
+    if header.get("format") != BUNDLE_FORMAT or header.get("version") != BUNDLE_VERSION:
+        raise ValueError(
+            f"Unsupported persona bundle {bundle_path}: "
+            f"format={header.get('format')}, version={header.get('version')}"
+        )
+
+    if hashlib.sha256(payload).hexdigest() != header.get("checksum"):
+        raise ValueError(f"Persona bundle checksum mismatch: {bundle_path}")
+
+    records = json.loads(payload)
+
+    if len(records) != header.get("count"):
+        raise ValueError(f"Persona bundle record count mismatch: {bundle_path}")
+
+    return records
+
+
+def persona_from_record(record: Dict[str, Any]) -> Persona:
+    """
+    Собирает Persona из проверенной записи bundle без pydantic-валидации.
+
+    Enum-поля восстанавливаются явно, остальные поля берутся как есть.
+    """
+    data = dict(record)
+    data["age_group"] = AgeGroup(data["age_group"])
+    data["income_level"] = IncomeLevel(data["income_level"])
+    data["personality_traits"] = [PersonalityTrait(t) for t in data["personality_traits"]]
+    return Persona.model_construct(**data)
+
+
+def compile_bundle(personas_dirs: Iterable[Path], bundle_path: Path) -> int:
+    """
+    Компилирует одну или несколько директорий с JSON персонами в bundle.
+
+    Каждая персона валидируется один раз — здесь, при компиляции.
+    При совпадении ID побеждает персона из более поздней директории.
+
+    Args:
+        personas_dirs: Директории с JSON файлами (defaults, custom, ...)
+        bundle_path: Куда записать bundle
+
+    Returns:
+        Количество персон в bundle
+    """
+    from .loader import PersonaLoader
+
+    personas: Dict[str, Persona] = {}
+    for personas_dir in personas_dirs:
+        for persona in PersonaLoader(personas_dir).get_all_personas():
+            personas[persona.id] = persona
+
+    return write_bundle((p.model_dump(mode="json") for p in personas.values()), bundle_path)
+
+
+def main(argv: List[str] | None = None) -> None:
+    """CLI: python -m ad_testing_agents.personas.bundle OUT.bundle DIR [DIR ...]"""
+    args = sys.argv[1:] if argv is None else argv
+
+    if len(args) < 2:
+        print("Usage: python -m ad_testing_agents.personas.bundle OUT.bundle DIR [DIR ...]")
+        sys.exit(1)
+
+    bundle_path = Path(args[0])
+    count = compile_bundle([Path(d) for d in args[1:]], bundle_path)
+    print(f"✅ Compiled {count} personas into {bundle_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Генератор синтетической популяции персон
+
+Сэмплирует тысячи персон из распределений по AgeGroup, IncomeLevel и
+PersonalityTrait, пачками и с фиксированным seed. Результат пишется в
+bundle (см. bundle.py), который PersonaLoader читает одним чтением.
+
+Веса проекции (projection_weights) позволяют перенести результаты
+с протестированных персон на целевую аудиторию без оценки всех персон.
+"""
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Tuple
+
+from ..models import AgeGroup, IncomeLevel, Persona, PersonalityTrait
+from .bundle import write_bundle
+
+# Фиксированная дата создания: бандл зависит только от seed и профиля
+CREATED_AT = "2026-01-01T00:00:00"
+
+Stratum = Tuple[AgeGroup, IncomeLevel, PersonalityTrait]
+Gender = Literal["f", "m"]
+
+
+def _uniform(enum_cls) -> Dict[Any, float]:
+    return {member: 1.0 for member in enum_cls}
+
+
+def _normalize(weights: Dict[Any, float]) -> Dict[Any, float]:
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Distribution weights must sum to a positive number")
+    return {k: v / total for k, v in weights.items() if v > 0}
+
+
+@dataclass
+class AudienceProfile:
+    """Распределение аудитории по демографии (маргинальные веса, нормализуются)"""
+
+    age_groups: Dict[AgeGroup, float] = field(default_factory=lambda: _uniform(AgeGroup))
+    income_levels: Dict[IncomeLevel, float] = field(default_factory=lambda: _uniform(IncomeLevel))
+    traits: Dict[PersonalityTrait, float] = field(
+        default_factory=lambda: _uniform(PersonalityTrait)
+    )
+
+    def __post_init__(self) -> None:
+        self.age_groups = _normalize({AgeGroup(k): v for k, v in self.age_groups.items()})
+        self.income_levels = _normalize(
+            {IncomeLevel(k): v for k, v in self.income_levels.items()}
+        )
+        self.traits = _normalize({PersonalityTrait(k): v for k, v in self.traits.items()})
+
+    def share(self, stratum: Stratum) -> float:
+        """Доля страты в аудитории (маргинали считаются независимыми)"""
+        age_group, income_level, trait = stratum
+        return (
+            self.age_groups.get(age_group, 0.0)
+            * self.income_levels.get(income_level, 0.0)
+            * self.traits.get(trait, 0.0)
+        )
+
+
+def persona_stratum(persona: Persona) -> Stratum:
+    """Страта персоны: возрастная группа, доход и основная черта характера"""
+    return (persona.age_group, persona.income_level, persona.personality_traits[0])
+
+
+def projection_weights(personas: List[Persona], target: AudienceProfile) -> Dict[str, float]:
+    """
+    Веса персон для проекции результатов на целевую аудиторию.
+
+    Вес персоны = доля её страты в целевой аудитории / доля страты среди
+    переданных персон (post-stratification). Страты, которых нет в
+    выборке, не представлены — их доля перераспределяется.
+
+    Returns:
+        {persona_id: weight}, сумма весов равна 1
+    """
+    if not personas:
+        return {}
+
+    counts: Dict[Stratum, int] = {}
+    for persona in personas:
+        stratum = persona_stratum(persona)
+        counts[stratum] = counts.get(stratum, 0) + 1
+
+    raw = {p.id: target.share(persona_stratum(p)) / counts[persona_stratum(p)] for p in personas}
+    total = sum(raw.values())
+
+    if total <= 0:
+        raise ValueError("Target audience does not overlap with the given personas")
+
+    return {pid: w / total for pid, w in raw.items()}
+
+
+# Пулы для сборки персон (лазерная эпиляция, Москва).
+# Тексты с родом — пары (женский, мужской); вариант выбирается по роду имени.
+_FEMALE_NAMES = [
+    "Анна", "Мария", "Екатерина", "Ольга", "Наталья", "Ирина", "Дарья", "Елена",
+    "Татьяна", "Светлана", "Юлия", "Ксения", "Алина", "Виктория", "Полина", "Софья",
+]
+_MALE_NAMES = ["Алексей", "Дмитрий", "Максим", "Артём"]
+_NAMES: List[Tuple[str, Gender]] = [(name, "f") for name in _FEMALE_NAMES] + [
+    (name, "m") for name in _MALE_NAMES
+]
+
+_LOCATIONS = [
+    "Москва, центр", "Москва, спальный район", "Москва, метро Университет",
+    "Москва, Сити", "Подмосковье, Химки", "Москва, ЮАО", "Москва, САО",
+]
+
+_OCCUPATIONS: Dict[AgeGroup, List[str | Tuple[str, str]]] = {
+    AgeGroup.TEEN: [
+        ("Студентка", "Студент"), "Бариста", "Стажёр в агентстве", "Фриланс-дизайнер",
+    ],
+    AgeGroup.YOUNG_ADULT: ["Менеджер проектов", "SMM-специалист", "Фитнес-тренер", "Продавец"],
+    AgeGroup.ADULT: [
+        "Маркетолог", "Юрист", ("Мама в декрете", "Папа в декрете"), "Руководитель отдела",
+    ],
+    AgeGroup.MIDDLE_AGED: [
+        "Главный бухгалтер", "Врач", ("Владелица бизнеса", "Владелец бизнеса"), "Учитель",
+    ],
+    AgeGroup.SENIOR: [
+        ("Пенсионерка", "Пенсионер"), "Консультант", "Преподаватель вуза",
+        ("Домохозяйка", "Домохозяин"),
+    ],
+}
+
+_VALUES: Dict[PersonalityTrait, List[str]] = {
+    PersonalityTrait.ANALYTICAL: ["доказательность", "прозрачность", "качество"],
+    PersonalityTrait.EMOTIONAL: ["красота", "забота о себе", "эмоции"],
+    PersonalityTrait.SKEPTICAL: ["надёжность", "честность", "гарантии"],
+    PersonalityTrait.IMPULSIVE: ["новизна", "удовольствие", "скорость"],
+    PersonalityTrait.CAUTIOUS: ["безопасность", "здоровье", "репутация"],
+    PersonalityTrait.OPTIMISTIC: ["уверенность", "лёгкость", "мнение друзей"],
+    PersonalityTrait.PRACTICAL: ["экономия", "экономия времени", "удобство"],
+    PersonalityTrait.STATUS_SEEKING: ["статус", "премиальность", "эксклюзивность"],
+}
+
+_PAIN_POINTS = [
+    "Бритьё каждый день отнимает время",
+    "Раздражение кожи после бритья",
+    "Постоянные траты на бритвы и воск",
+    "Вросшие волосы",
+    "Стыдно раздеваться в бассейне",
+    "Летом проблемно — платья, шорты",
+    "Боюсь боли при процедуре",
+    "Плохой опыт в другом салоне",
+]
+
+_GOALS = [
+    "Выглядеть ухоженно без усилий",
+    "Сэкономить время",
+    "Уверенность на пляже",
+    "Решить проблему один раз и навсегда",
+    "Чувствовать себя моложе",
+    "Не тратить деньги на расходники",
+]
+
+_TRIGGERS: Dict[IncomeLevel, Dict[str, str]] = {
+    IncomeLevel.LOW: {
+        "positive": "скидки, рассрочка 0%, первая процедура со скидкой, акция",
+        "negative": "дорого, предоплата, скрытые платежи",
+    },
+    IncomeLevel.MEDIUM: {
+        "positive": "абонемент, отзывы, гарантия результата, удобная запись",
+        "negative": "навязывание, очереди, скрытые платежи",
+    },
+    IncomeLevel.HIGH: {
+        "positive": "премиум оборудование, опытные врачи, экономия времени, VIP",
+        "negative": "дёшево, массовый салон, очереди",
+    },
+    IncomeLevel.LUXURY: {
+        "positive": "эксклюзивность, персональный врач, VIP-зона, премиум",
+        "negative": "скидки, дёшево, массовый, акция",
+    },
+}
+
+_DECISION_FACTORS: Dict[IncomeLevel, List[str]] = {
+    IncomeLevel.LOW: ["Цена", "Рассрочка", "Локация рядом с метро"],
+    IncomeLevel.MEDIUM: ["Соотношение цены и качества", "Отзывы", "Локация"],
+    IncomeLevel.HIGH: ["Квалификация врачей", "Оборудование", "Экономия времени"],
+    IncomeLevel.LUXURY: ["Статус клиники", "Сервис", "Конфиденциальность"],
+}
+
+_INCOME_STORY: Dict[IncomeLevel, str | Tuple[str, str]] = {
+    IncomeLevel.LOW: "Денег в обрез, каждая трата на счету.",
+    IncomeLevel.MEDIUM: "Доход стабильный, но крупные траты планирует заранее.",
+    IncomeLevel.HIGH: "Может позволить себе качественные услуги, ценит своё время.",
+    IncomeLevel.LUXURY: (
+        "Привыкла к премиальному сервису и не экономит на себе.",
+        "Привык к премиальному сервису и не экономит на себе.",
+    ),
+}
+
+
+def _gendered(text: str | Tuple[str, str], gender: Gender) -> str:
+    """Вариант текста для рода персоны (текст без рода возвращается как есть)"""
+    if isinstance(text, str):
+        return text
+    return text[0] if gender == "f" else text[1]
+
+
+def _validated(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Записи, прошедшие валидацию Persona (ValidationError на первой невалидной)"""
+    for record in records:
+        Persona.model_validate(record)
+        yield record
+
+
+class PersonaGenerator:
+    """Генерирует синтетическую популяцию персон по заданному профилю аудитории"""
+
+    def __init__(self, profile: AudienceProfile | None = None, seed: int = 42):
+        """
+        Args:
+            profile: Распределение популяции (по умолчанию равномерное)
+            seed: Seed генератора — одинаковый seed даёт одинаковую популяцию
+        """
+        self.profile = profile or AudienceProfile()
+        self.seed = seed
+
+        self._age_groups = list(self.profile.age_groups)
+        self._age_weights = list(self.profile.age_groups.values())
+        self._incomes = list(self.profile.income_levels)
+        self._income_weights = list(self.profile.income_levels.values())
+        self._traits = list(self.profile.traits)
+        self._trait_weights = list(self.profile.traits.values())
+
+    def iter_records(self, count: int) -> Iterator[Dict[str, Any]]:
+        """Генерирует JSON-совместимые записи персон (без pydantic)"""
+        rng = random.Random(self.seed)
+
+        for i in range(count):
+            age_group = rng.choices(self._age_groups, self._age_weights)[0]
+            income_level = rng.choices(self._incomes, self._income_weights)[0]
+            traits = self._sample_traits(rng)
+
+            name, gender = rng.choice(_NAMES)
+            occupation = _gendered(rng.choice(_OCCUPATIONS[age_group]), gender)
+            values = list(dict.fromkeys(v for t in traits for v in _VALUES[t]))[:4]
+
+            yield {
+                "id": f"synthetic-{self.seed}-{i:06d}",
+                "name": name,
+                "description": f"{occupation}, {traits[0].value}",
+                "age_group": age_group.value,
+                "income_level": income_level.value,
+                "occupation": occupation,
+                "location": rng.choice(_LOCATIONS),
+                "personality_traits": [t.value for t in traits],
+                "values": values,
+                "pain_points": rng.sample(_PAIN_POINTS, 3),
+                "goals": rng.sample(_GOALS, 2),
+                "triggers": dict(_TRIGGERS[income_level]),
+                "decision_factors": list(_DECISION_FACTORS[income_level]),
+                "background_story": (
+                    f"{name}, {age_group.value} лет, {occupation.lower()}. "
+                    f"{_gendered(_INCOME_STORY[income_level], gender)}"
+                ),
+                "created_at": CREATED_AT,
+                "custom": True,
+            }
+
+    def _sample_traits(self, rng: random.Random) -> List[PersonalityTrait]:
+        """1-3 разные черты, первая — основная (определяет страту)"""
+        k = min(rng.randint(1, 3), len(self._traits))
+        traits: List[PersonalityTrait] = []
+        while len(traits) < k:
+            trait = rng.choices(self._traits, self._trait_weights)[0]
+            if trait not in traits:
+                traits.append(trait)
+        return traits
+
+    def iter_batches(self, count: int, batch_size: int = 1000) -> Iterator[List[Persona]]:
+        """
+        Генерирует популяцию пачками.
+
+        Разбиение на пачки не влияет на результат: при том же seed
+        персоны совпадают с generate(count).
+        """
+        batch: List[Persona] = []
+        for record in self.iter_records(count):
+            batch.append(Persona.model_validate(record))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def generate(self, count: int) -> List[Persona]:
+        """Сгенерировать всю популяцию целиком"""
+        return [Persona.model_validate(r) for r in self.iter_records(count)]
+
+    def write_bundle(self, count: int, bundle_path: Path) -> int:
+        """
+        Сгенерировать популяцию и записать её в bundle для PersonaLoader.
+
+        Каждая запись валидируется один раз — здесь, при записи: загрузка
+        bundle доверяет записям (см. persona_from_record).
+
+        Returns:
+            Количество записанных персон
+        """
+        return write_bundle(_validated(self.iter_records(count)), bundle_path)
+
+    def __repr__(self) -> str:
+        return f"PersonaGenerator(seed={self.seed})"
@@ -4,18 +4,31 @@ import json
 from pathlib import Path
 from typing import Dict, List
 
+from ..config import config
 from ..models import Persona
+from .bundle import compile_bundle, persona_from_record, read_bundle
 
 
 class PersonaLoader:
     """Загружает и управляет персонами"""
 
-    def __init__(self, personas_dir: Path | None = None):
+    def __init__(self, personas_dir: Path | None = None, bundle_path: Path | None = None):
         """
         Args:
             personas_dir: Директория с JSON файлами персон.
                          По умолчанию - defaults/ в текущей директории.
+            bundle_path: Скомпилированный bundle (см. bundle.py).
+                         Если указан, персоны читаются из него одним чтением,
+                         а personas_dir игнорируется.
         """
+        self._personas: Dict[str, Persona] = {}
+        self.bundle_path = Path(bundle_path) if bundle_path is not None else None
+
+        if self.bundle_path is not None:
+            self.personas_dir = None
+            self._load_bundle()
+            return
+
         if personas_dir is None:
             # По умолчанию используем defaults/
             personas_dir = Path(__file__).parent / "defaults"
@@ -25,9 +38,13 @@ class PersonaLoader:
         if not self.personas_dir.exists():
             raise FileNotFoundError(f"Personas directory not found: {self.personas_dir}")
 
-        self._personas: Dict[str, Persona] = {}
         self._load_all()
 
+    @classmethod
+    def from_bundle(cls, bundle_path: Path) -> "PersonaLoader":
+        """Создать loader из скомпилированного bundle"""
+        return cls(bundle_path=bundle_path)
+
     def _load_all(self) -> None:
         """Загружает все JSON файлы из директории"""
         json_files = list(self.personas_dir.glob("*.json"))
@@ -46,6 +63,30 @@ class PersonaLoader:
             except Exception as e:
                 print(f"Warning: Failed to load {json_file.name}: {e}")
 
+    def _load_bundle(self) -> None:
+        """Загружает все персоны из bundle-файла"""
+        if not self.bundle_path.exists():
+            raise FileNotFoundError(f"Persona bundle not found: {self.bundle_path}")
+
+        for record in read_bundle(self.bundle_path):
+            persona = persona_from_record(record)
+            self._personas[persona.id] = persona
+
+        if not self._personas:
+            raise ValueError(f"No personas found in bundle {self.bundle_path}")
+
+    def compile_bundle(self, bundle_path: Path) -> int:
+        """
+        Скомпилировать директорию этого loader в bundle.
+
+        Returns:
+            Количество персон в bundle
+        """
+        if self.personas_dir is None:
+            raise ValueError("Loader was created from a bundle, nothing to compile")
+
+        return compile_bundle([self.personas_dir], bundle_path)
+
     def get_persona(self, persona_id: str) -> Persona:
         """Получить персону по ID"""
         if persona_id not in self._personas:
@@ -73,7 +114,8 @@ class PersonaLoader:
         return len(self._personas)
 
     def __repr__(self) -> str:
-        return f"PersonaLoader({self.count()} personas loaded)"
+        source = f", bundle={self.bundle_path.name}" if self.bundle_path else ""
+        return f"PersonaLoader({self.count()} personas loaded{source})"
 
 
 # Singleton instance для удобства
@@ -81,11 +123,17 @@ _default_loader: PersonaLoader | None = None
 
 
 def get_default_loader() -> PersonaLoader:
-    """Получить default loader (singleton)"""
+    """Получить default loader (singleton)
+
+    Если в конфиге задан PERSONA_BUNDLE и файл существует, персоны читаются из него.
+    """
     global _default_loader
 
     if _default_loader is None:
-        _default_loader = PersonaLoader()
+        if config.PERSONA_BUNDLE is not None and config.PERSONA_BUNDLE.exists():
+            _default_loader = PersonaLoader.from_bundle(config.PERSONA_BUNDLE)
+        else:
+            _default_loader = PersonaLoader()
 
     return _default_loader
 
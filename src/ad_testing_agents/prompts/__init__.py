@@ -1,10 +1,11 @@
 """Prompt generation for agent simulation"""
 
-from .evaluation_prompts import generate_evaluation_prompt
+from .evaluation_prompts import generate_evaluation_prompt, generate_listwise_prompt
 from .system_prompts import generate_short_system_prompt, generate_system_prompt
 
 __all__ = [
     "generate_system_prompt",
     "generate_short_system_prompt",
     "generate_evaluation_prompt",
+    "generate_listwise_prompt",
 ]
@@ -1,15 +1,75 @@
 """Evaluation prompts для оценки рекламных офферов"""
 
+from typing import List, Sequence
+
 from ..models import AdOffer, Persona
 
 
-def generate_evaluation_prompt(offer: AdOffer, persona: Persona) -> str:
+# Поля ответа в порядке по умолчанию
+RESPONSE_FIELDS = (
+    "primary_emotion",
+    "emotion_intensity",
+    "emotional_reasoning",
+    "first_impression",
+    "detailed_reasoning",
+    "perceived_value",
+    "decision",
+    "confidence_score",
+    "alignment_with_values",
+    "pain_points_addressed",
+    "objections",
+    "what_would_convince",
+)
+
+
+def _response_template(persona: Persona, field_order: Sequence[str] | None = None) -> str:
+    """JSON-шаблон ответа; поля из field_order идут первыми"""
+    values = "\n".join(f'    "{v}": 0.0-1.0,' for v in persona.values)
+    templates = {
+        "primary_emotion": (
+            '"excited|interested|neutral|skeptical|annoyed|offended|curious|hopeful"'
+        ),
+        "emotion_intensity": "0.0-1.0",
+        "emotional_reasoning": '"Почему такая эмоция? 2-3 предложения от первого лица"',
+        "first_impression": '"Первое впечатление, 1-2 предложения"',
+        "detailed_reasoning": (
+            '"Детальный анализ оффера, 3-5 предложений. Что работает, что нет, почему"'
+        ),
+        "perceived_value": "0.0-10.0",
+        "decision": '"strong_yes|maybe_yes|neutral|probably_not|strong_no"',
+        "confidence_score": "0.0-1.0",
+        "alignment_with_values": "{\n" + values + "\n  }",
+        "pain_points_addressed": '["список болей которые решает оффер"]',
+        "objections": '["список возражений и сомнений"]',
+        "what_would_convince": '"Что убедило бы тебя? Опционально, можно null"',
+    }
+    if not field_order:
+        # Группы полей через пустую строку: эмоция, анализ, решение, сегментация
+        groups = (
+            RESPONSE_FIELDS[:3],
+            RESPONSE_FIELDS[3:6],
+            RESPONSE_FIELDS[6:8],
+            RESPONSE_FIELDS[8:11],
+        )
+        blocks = [[f'  "{name}": {templates[name]}' for name in group] for group in groups]
+        blocks.append([f'  "what_would_convince": {templates["what_would_convince"]}'])
+        return "{\n" + ",\n\n".join(",\n".join(block) for block in blocks) + "\n}"
+
+    order = list(field_order) + [name for name in RESPONSE_FIELDS if name not in field_order]
+    return "{\n" + ",\n".join(f'  "{name}": {templates[name]}' for name in order) + "\n}"
+
+
+def generate_evaluation_prompt(
+    offer: AdOffer, persona: Persona, field_order: Sequence[str] | None = None
+) -> str:
     """
     Генерирует prompt для оценки оффера персоной.
 
     Args:
         offer: Рекламный оффер
         persona: Персона которая оценивает
+        field_order: Поля, которые модель должна вывести первыми (для
+            потокового разбора с ранней остановкой)
 
     Returns:
         Evaluation prompt
@@ -18,8 +78,11 @@ def generate_evaluation_prompt(offer: AdOffer, persona: Persona) -> str:
     # Форматируем оффер для показа
     offer_text = offer.to_display_text()
 
-    # Извлекаем ценности для проверки alignment
-    values_list = ", ".join([f'"{v}"' for v in persona.values])
+    order_note = (
+        " (поля строго в указанном порядке, начиная с " + ", ".join(field_order) + ")"
+        if field_order
+        else ""
+    )
 
     evaluation_prompt = f"""Ты только что увидел(а) это рекламное объявление:
 
@@ -47,34 +110,84 @@ def generate_evaluation_prompt(offer: AdOffer, persona: Persona) -> str:
    - Насколько уверен(а) в своём решении?
    - Что могло бы убедить тебя сказать "да"?
 
-Верни ответ в формате JSON:
+Верни ответ в формате JSON{order_note}:
 
-{{
-  "primary_emotion": "excited|interested|neutral|skeptical|annoyed|offended|curious|hopeful",
-  "emotion_intensity": 0.0-1.0,
-  "emotional_reasoning": "Почему такая эмоция? 2-3 предложения от первого лица",
+{_response_template(persona, field_order)}
+
+ВАЖНО:
+- Говори от первого лица ("я", "мне", "хочу")
+- Будь честным — если не нравится, скажи почему
+- Ссылайся на свою ситуацию и опыт из твоей истории
+- JSON должен быть валидным (без trailing commas)
+"""
+
+    return evaluation_prompt
+
+
+def generate_listwise_prompt(offers: List[AdOffer], persona: Persona) -> str:
+    """
+    Генерирует prompt для сравнения нескольких офферов персоной за один вызов.
+
+    Офферы пронумерованы с 1 в переданном порядке; модель возвращает
+    ранжирование и оценку каждого оффера в тех же полях, что и
+    generate_evaluation_prompt().
 
-  "first_impression": "Первое впечатление, 1-2 предложения",
-  "detailed_reasoning": "Детальный анализ оффера, 3-5 предложений. Что работает, что нет, почему",
-  "perceived_value": 0.0-10.0,
+    Args:
+        offers: Рекламные офферы (2 и более)
+        persona: Персона которая оценивает
+
+    Returns:
+        Listwise evaluation prompt
+    """
+    offers_text = "\n\n".join(
+        f"### Оффер {number}\n{offer.to_display_text()}"
+        for number, offer in enumerate(offers, start=1)
+    )
+    values_template = "\n".join(f'        "{v}": 0.0-1.0,' for v in persona.values)
+
+    return f"""Ты только что увидел(а) {len(offers)} рекламных объявлений одной услуги:
+
+---
+{offers_text}
+---
+
+Ответь как {persona.name}, ИСКРЕННЕ и ЧЕСТНО. Оцени КАЖДОЕ объявление отдельно, как будто
+увидел(а) его само по себе, а потом сравни их между собой.
 
-  "decision": "strong_yes|maybe_yes|neutral|probably_not|strong_no",
-  "confidence_score": 0.0-1.0,
+Для каждого оффера подумай:
+- Какая первая эмоция и насколько она сильна?
+- Решает ли он твои боли: {', '.join(persona.pain_points[:2])}?
+- Соответствует ли твоим ценностям: {', '.join(persona.values[:3])}?
+- Запишешься ли ты и насколько уверен(а)?
 
-  "alignment_with_values": {{
-{chr(10).join([f'    "{v}": 0.0-1.0,' for v in persona.values])}
-  }},
-  "pain_points_addressed": ["список болей которые решает оффер"],
-  "objections": ["список возражений и сомнений"],
+Верни ответ в формате JSON:
 
-  "what_would_convince": "Что убедило бы тебя? Опционально, можно null"
+{{
+  "ranking": [номера офферов от лучшего для тебя к худшему, все {len(offers)}],
+  "evaluations": [
+    {{
+      "offer": номер оффера,
+      "primary_emotion": "excited|interested|neutral|skeptical|annoyed|offended|curious|hopeful",
+      "emotion_intensity": 0.0-1.0,
+      "emotional_reasoning": "Почему такая эмоция? 1-2 предложения от первого лица",
+      "first_impression": "Первое впечатление, 1 предложение",
+      "detailed_reasoning": "Что работает, что нет и чем отличается от других офферов, 2-3 предложения",
+      "perceived_value": 0.0-10.0,
+      "decision": "strong_yes|maybe_yes|neutral|probably_not|strong_no",
+      "confidence_score": 0.0-1.0,
+      "alignment_with_values": {{
+{values_template}
+      }},
+      "pain_points_addressed": ["список болей которые решает оффер"],
+      "objections": ["список возражений и сомнений"],
+      "what_would_convince": "Что убедило бы тебя? Опционально, можно null"
+    }}
+  ]
 }}
 
 ВАЖНО:
+- В "evaluations" ровно {len(offers)} объектов, по одному на каждый оффер
+- Оценки должны согласовываться с ранжированием
 - Говори от первого лица ("я", "мне", "хочу")
-- Будь честным — если не нравится, скажи почему
-- Ссылайся на свою ситуацию и опыт из твоей истории
 - JSON должен быть валидным (без trailing commas)
 """
-
-    return evaluation_prompt
@@ -0,0 +1,21 @@
+"""Job queue consumers for distributed evaluation"""
+
+from .base import PYTHON_QUEUE_NAME, QUEUE_NAME, InMemoryQueue, JobQueue, QueueJob
+from .bullmq import BullMQQueue
+from .local import PRIORITIES, LocalJobQueue
+from .worker import CatalogResolver, EvaluationWorker, StoreSink, WorkerStats
+
+__all__ = [
+    "JobQueue",
+    "QueueJob",
+    "InMemoryQueue",
+    "BullMQQueue",
+    "LocalJobQueue",
+    "PRIORITIES",
+    "QUEUE_NAME",
+    "PYTHON_QUEUE_NAME",
+    "EvaluationWorker",
+    "CatalogResolver",
+    "StoreSink",
+    "WorkerStats",
+]
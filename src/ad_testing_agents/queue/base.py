@@ -0,0 +1,141 @@
+"""Job queue contract shared by all queue backends
+
+Python workers consume jobs of the form {"personaId", "offerId" or "offer"},
+which they resolve without the SaaS database. The SaaS 'test-evaluation'
+queue carries {"personaResponseId", "testRunId"} jobs that only the TypeScript
+worker can process, so Python jobs go to a queue of their own.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Protocol, Tuple
+
+QUEUE_NAME = "test-evaluation"  # saas/lib/queue/test-queue.ts
+PYTHON_QUEUE_NAME = "test-evaluation-python"
+JOB_NAME = "evaluate"
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 2.0  # exponential: 2s, 4s, 8s, ...
+
+
+@dataclass
+class QueueJob:
+    """A job leased to a worker"""
+
+    id: str
+    data: Dict[str, Any]
+    attempts_made: int = 0
+    max_attempts: int = DEFAULT_ATTEMPTS
+    token: str | None = None  # lease token of the fetching worker
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+class JobQueue(Protocol):
+    """What EvaluationWorker needs from a queue backend"""
+
+    async def add(self, data: Dict[str, Any], job_id: str | None = None, **options: Any) -> str:
+        """Enqueue a job and return its id"""
+        ...
+
+    async def fetch(self, count: int, timeout: float = 1.0) -> List[QueueJob]:
+        """Lease up to `count` jobs, waiting at most `timeout` seconds for the first one"""
+        ...
+
+    async def complete(self, job: QueueJob, result: Any = None) -> None:
+        """Mark a leased job as done"""
+        ...
+
+    async def fail(self, job: QueueJob, error: str) -> None:
+        """Retry a leased job with backoff, or mark it failed after its last attempt"""
+        ...
+
+    async def extend(self, jobs: List[QueueJob]) -> None:
+        """Renew the leases of jobs that are still being processed"""
+        ...
+
+    async def close(self) -> None: ...
+
+
+def backoff_delay(attempts_made: int, base: float = DEFAULT_BACKOFF_SECONDS) -> float:
+    """Exponential backoff before retry number `attempts_made` (1-based)"""
+    return base * 2 ** max(attempts_made - 1, 0)
+
+
+class InMemoryQueue:
+    """Process-local queue with the JobQueue contract, for tests and single-process use"""
+
+    def __init__(self, backoff_seconds: float = DEFAULT_BACKOFF_SECONDS):
+        self.backoff_seconds = backoff_seconds
+        self._waiting: Deque[QueueJob] = deque()
+        self._delayed: List[Tuple[float, QueueJob]] = []
+        self._active: Dict[str, QueueJob] = {}
+        self.completed: Dict[str, Any] = {}
+        self.failed: Dict[str, str] = {}
+        self._available = asyncio.Event()
+
+    async def add(self, data: Dict[str, Any], job_id: str | None = None, **options: Any) -> str:
+        job = QueueJob(
+            id=job_id or uuid.uuid4().hex,
+            data=dict(data),
+            max_attempts=options.get("attempts", DEFAULT_ATTEMPTS),
+            options=options,
+        )
+        self._waiting.append(job)
+        self._available.set()
+        return job.id
+
+    def _promote_delayed(self) -> None:
+        now = time.monotonic()
+        ready = [job for ready_at, job in self._delayed if ready_at <= now]
+        self._delayed = [(t, job) for t, job in self._delayed if t > now]
+        self._waiting.extend(ready)
+
+    async def fetch(self, count: int, timeout: float = 1.0) -> List[QueueJob]:
+        deadline = time.monotonic() + timeout
+        while True:
+            self._promote_delayed()
+            if self._waiting:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            self._available.clear()
+            wait = remaining
+            if self._delayed:
+                wait = min(wait, max(0.0, min(t for t, _ in self._delayed) - time.monotonic()))
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+        jobs = []
+        while self._waiting and len(jobs) < count:
+            job = self._waiting.popleft()
+            job.token = uuid.uuid4().hex
+            self._active[job.id] = job
+            jobs.append(job)
+        return jobs
+
+    async def complete(self, job: QueueJob, result: Any = None) -> None:
+        self._active.pop(job.id, None)
+        self.completed[job.id] = result
+
+    async def fail(self, job: QueueJob, error: str) -> None:
+        self._active.pop(job.id, None)
+        job.attempts_made += 1
+        if job.attempts_made < job.max_attempts:
+            delay = backoff_delay(job.attempts_made, self.backoff_seconds)
+            self._delayed.append((time.monotonic() + delay, job))
+        else:
+            self.failed[job.id] = error
+
+    async def extend(self, jobs: List[QueueJob]) -> None:
+        return None  # leases never expire in process
+
+    async def close(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return len(self._waiting) + len(self._delayed) + len(self._active)
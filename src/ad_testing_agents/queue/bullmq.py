@@ -0,0 +1,292 @@
+"""Redis queue in BullMQ's key layout for Python evaluation jobs
+
+Python workers consume their own queue (PYTHON_QUEUE_NAME), never the SaaS
+'test-evaluation' queue: SaaS jobs carry only {"personaResponseId",
+"testRunId"} and need the SaaS database, and the TypeScript worker would
+complete Python payloads as no-ops. BullMQQueue refuses the SaaS queue name.
+
+Keys follow BullMQ, so its tooling can inspect the queue:
+- job hashes at `bull:<queue>:<id>`;
+- the `wait`, `active` and `delayed` lists;
+- the `completed` and `failed` sets;
+- per-job lock keys;
+- the `events` stream.
+State transitions that must be atomic run as Lua scripts, like BullMQ's own:
+fetch moves jobs to `active` and takes their locks in one step, extend()
+renews the locks of jobs still in progress, and completing or failing a job
+first checks that the lock is still held. A job whose lock expired (its
+worker died or stalled) is moved back to `wait` by the next fetch as a failed
+attempt, as BullMQ's stalled-job checker does. Repeatable jobs, flows and
+rate limit groups are not supported.
+
+Requires the optional `redis` package (pip install "ad-testing-agents[queue]").
+"""
+
+import json
+import time
+import uuid
+from typing import Any, Dict, List
+
+from ..config import config
+from .base import (
+    DEFAULT_ATTEMPTS,
+    DEFAULT_BACKOFF_SECONDS,
+    JOB_NAME,
+    PYTHON_QUEUE_NAME,
+    QUEUE_NAME,
+    QueueJob,
+)
+
+DEFAULT_PREFIX = "bull"
+LOCK_DURATION_MS = 30_000
+POLL_SECONDS = 0.2
+
+# KEYS: wait, active; ARGV: key prefix, count, token, lock ms, now ms
+_FETCH_SCRIPT = """
+local ids = {}
+for _ = 1, tonumber(ARGV[2]) do
+  local id = redis.call("LMOVE", KEYS[1], KEYS[2], "RIGHT", "LEFT")
+  if not id then break end
+  redis.call("SET", ARGV[1] .. id .. ":lock", ARGV[3], "PX", ARGV[4])
+  redis.call("HSET", ARGV[1] .. id, "processedOn", ARGV[5])
+  redis.call("XADD", ARGV[1] .. "events", "*", "event", "active", "jobId", id)
+  ids[#ids + 1] = id
+end
+return ids
+"""
+
+# KEYS: lock keys; ARGV: token, lock ms
+_EXTEND_SCRIPT = """
+local extended = 0
+for _, key in ipairs(KEYS) do
+  if redis.call("GET", key) == ARGV[1] then
+    redis.call("PEXPIRE", key, ARGV[2])
+    extended = extended + 1
+  end
+end
+return extended
+"""
+
+# KEYS: lock key, active; ARGV: token, job id -> 1 if the caller still held the job
+_CLAIM_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then return 0 end
+redis.call("DEL", KEYS[1])
+redis.call("LREM", KEYS[2], 1, ARGV[2])
+return 1
+"""
+
+# KEYS: active, wait, failed; ARGV: key prefix, now ms, default attempts
+_STALLED_SCRIPT = """
+local recovered = 0
+for _, id in ipairs(redis.call("LRANGE", KEYS[1], 0, -1)) do
+  local key = ARGV[1] .. id
+  if redis.call("EXISTS", key .. ":lock") == 0 then
+    redis.call("LREM", KEYS[1], 1, id)
+    local attempts = redis.call("HINCRBY", key, "attemptsMade", 1)
+    local opts = cjson.decode(redis.call("HGET", key, "opts") or "{}")
+    redis.call("HSET", key, "failedReason", "job stalled: lock expired")
+    if attempts >= (tonumber(opts["attempts"]) or tonumber(ARGV[3])) then
+      redis.call("ZADD", KEYS[3], ARGV[2], id)
+      redis.call("HSET", key, "finishedOn", ARGV[2])
+      redis.call("XADD", ARGV[1] .. "events", "*", "event", "failed", "jobId", id,
+        "failedReason", "job stalled: lock expired")
+    else
+      redis.call("RPUSH", KEYS[2], id)
+      redis.call("XADD", ARGV[1] .. "events", "*", "event", "waiting", "jobId", id)
+    end
+    recovered = recovered + 1
+  end
+end
+return recovered
+"""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class BullMQQueue:
+    """JobQueue backed by Redis in BullMQ's format"""
+
+    def __init__(
+        self,
+        name: str = PYTHON_QUEUE_NAME,
+        url: str | None = None,
+        prefix: str = DEFAULT_PREFIX,
+        lock_duration_ms: int = LOCK_DURATION_MS,
+        client: Any = None,
+    ):
+        """
+        Args:
+            name: Queue name (not the SaaS "test-evaluation" queue)
+            url: Redis URL (default from config.REDIS_URL)
+            prefix: BullMQ key prefix
+            lock_duration_ms: Lease duration of fetched jobs (renewed by extend())
+            client: Existing redis.asyncio client (e.g. fakeredis in tests)
+        """
+        if name == QUEUE_NAME:
+            raise ValueError(
+                f"{QUEUE_NAME!r} is the SaaS queue, whose jobs only the TypeScript worker "
+                f"can process; use a queue of Python jobs (default: {PYTHON_QUEUE_NAME!r})"
+            )
+        if client is None:
+            try:
+                from redis import asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError(
+                    "BullMQQueue requires the 'redis' package: "
+                    "pip install 'ad-testing-agents[queue]'"
+                ) from e
+            client = aioredis.from_url(url or config.REDIS_URL, decode_responses=True)
+
+        self.name = name
+        self.redis = client
+        self.prefix = f"{prefix}:{name}"
+        self.lock_duration_ms = lock_duration_ms
+        self._fetch = client.register_script(_FETCH_SCRIPT)
+        self._extend = client.register_script(_EXTEND_SCRIPT)
+        self._claim = client.register_script(_CLAIM_SCRIPT)
+        self._stalled = client.register_script(_STALLED_SCRIPT)
+        self._next_stalled_check = 0.0
+
+    @property
+    def lease_seconds(self) -> float:
+        return self.lock_duration_ms / 1000
+
+    def _key(self, suffix: str) -> str:
+        return f"{self.prefix}:{suffix}"
+
+    async def add(self, data: Dict[str, Any], job_id: str | None = None, **options: Any) -> str:
+        job_id = job_id or str(await self.redis.incr(self._key("id")))
+        opts = {
+            "attempts": options.get("attempts", DEFAULT_ATTEMPTS),
+            "backoff": {
+                "type": "exponential",
+                "delay": int(options.get("backoff_seconds", DEFAULT_BACKOFF_SECONDS) * 1000),
+            },
+        }
+
+        pipe = self.redis.pipeline()
+        pipe.hset(
+            self._key(job_id),
+            mapping={
+                "name": options.get("name", JOB_NAME),
+                "data": json.dumps(data, ensure_ascii=False),
+                "opts": json.dumps(opts),
+                "timestamp": _now_ms(),
+                "delay": 0,
+                "priority": 0,
+                "attemptsMade": 0,
+            },
+        )
+        pipe.lpush(self._key("wait"), job_id)
+        pipe.zadd(self._key("marker"), {"0": 0})
+        pipe.xadd(self._key("events"), {"event": "waiting", "jobId": job_id})
+        await pipe.execute()
+        return job_id
+
+    async def _promote_delayed(self) -> None:
+        # BullMQ scores delayed jobs as timestamp * 0x1000 + counter
+        due = await self.redis.zrangebyscore(self._key("delayed"), 0, (_now_ms() + 1) * 0x1000)
+        for job_id in due:
+            if await self.redis.zrem(self._key("delayed"), job_id):
+                await self.redis.lpush(self._key("wait"), job_id)
+
+    async def _recover_stalled(self) -> None:
+        # At most twice per lock duration, like BullMQ's stalled-job checker
+        if time.monotonic() < self._next_stalled_check:
+            return
+        self._next_stalled_check = time.monotonic() + self.lease_seconds / 2
+        await self._stalled(
+            keys=[self._key("active"), self._key("wait"), self._key("failed")],
+            args=[f"{self.prefix}:", _now_ms(), DEFAULT_ATTEMPTS],
+        )
+
+    async def fetch(self, count: int, timeout: float = 1.0) -> List[QueueJob]:
+        deadline = time.monotonic() + timeout
+        token = uuid.uuid4().hex
+
+        while True:
+            await self._recover_stalled()
+            await self._promote_delayed()
+            ids = await self._fetch(
+                keys=[self._key("wait"), self._key("active")],
+                args=[f"{self.prefix}:", count, token, self.lock_duration_ms, _now_ms()],
+            )
+            if ids or time.monotonic() >= deadline:
+                break
+            await self.redis.bzpopmin(self._key("marker"), timeout=POLL_SECONDS)
+
+        pipe = self.redis.pipeline()
+        for job_id in ids:
+            pipe.hgetall(self._key(job_id))
+        jobs = []
+        for job_id, fields in zip(ids, await pipe.execute()):
+            opts = json.loads(fields.get("opts") or "{}")
+            jobs.append(
+                QueueJob(
+                    id=job_id,
+                    data=json.loads(fields.get("data") or "{}"),
+                    attempts_made=int(fields.get("attemptsMade") or 0),
+                    max_attempts=int(opts.get("attempts", DEFAULT_ATTEMPTS)),
+                    token=token,
+                    options=opts,
+                )
+            )
+        return jobs
+
+    async def extend(self, jobs: List[QueueJob]) -> None:
+        for token in {job.token for job in jobs}:
+            locks = [self._key(f"{job.id}:lock") for job in jobs if job.token == token]
+            await self._extend(keys=locks, args=[token, self.lock_duration_ms])
+
+    async def _owns(self, job: QueueJob) -> bool:
+        """Release the lock and leave `active` if the lock is still ours"""
+        owned = await self._claim(
+            keys=[self._key(f"{job.id}:lock"), self._key("active")], args=[job.token, job.id]
+        )
+        if not owned:
+            print(f"⚠️  Lease of job {job.id} expired before it finished; result discarded")
+        return bool(owned)
+
+    async def complete(self, job: QueueJob, result: Any = None) -> None:
+        if not await self._owns(job):
+            return
+        now = _now_ms()
+        pipe = self.redis.pipeline()
+        pipe.zadd(self._key("completed"), {job.id: now})
+        pipe.hset(
+            self._key(job.id),
+            mapping={"returnvalue": json.dumps(result, default=str), "finishedOn": now},
+        )
+        pipe.xadd(self._key("events"), {"event": "completed", "jobId": job.id})
+        await pipe.execute()
+
+    async def fail(self, job: QueueJob, error: str) -> None:
+        if not await self._owns(job):
+            return
+        job.attempts_made = await self.redis.hincrby(self._key(job.id), "attemptsMade", 1)
+        now = _now_ms()
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(job.id), "failedReason", error)
+
+        if job.attempts_made < job.max_attempts:
+            base_ms = job.options.get("backoff", {}).get("delay", DEFAULT_BACKOFF_SECONDS * 1000)
+            delay_ms = int(base_ms * 2 ** (job.attempts_made - 1))
+            pipe.zadd(self._key("delayed"), {job.id: (now + delay_ms) * 0x1000})
+            pipe.xadd(self._key("events"), {"event": "delayed", "jobId": job.id})
+        else:
+            pipe.zadd(self._key("failed"), {job.id: now})
+            pipe.hset(self._key(job.id), "finishedOn", now)
+            pipe.xadd(
+                self._key("events"),
+                {"event": "failed", "jobId": job.id, "failedReason": error},
+            )
+        await pipe.execute()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+    def __repr__(self) -> str:
+        return f"BullMQQueue({self.prefix})"
@@ -0,0 +1,372 @@
+"""Embedded persistent job queue in SQLite
+
+A JobQueue for machines without Redis. Jobs have a priority class and a
+tenant:
+- a fetch fills the batch from the most urgent class first, so interactive
+  evaluations (dashboard) jump ahead of queued bulk matrices;
+- within a class, tenants are served round-robin (least recently served
+  first), so one tenant's overnight matrix cannot starve another's;
+- fetched jobs are leased for `visibility_timeout` seconds; a job whose
+  worker died before completing it becomes visible again as a failed attempt.
+
+Any number of worker processes can drain the same database file. On one host
+the default WAL mode applies; for several hosts sharing the file over a
+network filesystem, use wal=False (WAL needs shared memory) and a filesystem
+with working POSIX locks.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+from .base import DEFAULT_ATTEMPTS, DEFAULT_BACKOFF_SECONDS, QueueJob, backoff_delay
+
+PRIORITIES = {"interactive": 0, "bulk": 10}
+DEFAULT_TENANT = "default"
+VISIBILITY_TIMEOUT = 300.0
+POLL_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    tenant TEXT NOT NULL,
+    state TEXT NOT NULL,  -- waiting, delayed, active, completed, failed
+    attempts_made INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_token TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_waiting ON jobs (state, priority, tenant, enqueued_at);
+CREATE INDEX IF NOT EXISTS jobs_timers ON jobs (state, available_at);
+CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (state, lease_expires);
+
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant TEXT PRIMARY KEY,
+    served_at REAL NOT NULL
+);
+"""
+
+
+def priority_value(priority: str | int) -> int:
+    """Numeric priority (lower is more urgent) of a class name or number"""
+    if isinstance(priority, int):
+        return priority
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {priority!r} (use {', '.join(PRIORITIES)})")
+    return PRIORITIES[priority]
+
+
+class LocalJobQueue:
+    """JobQueue in a SQLite file with priorities, tenant fairness and leases"""
+
+    def __init__(
+        self,
+        path: Path,
+        visibility_timeout: float = VISIBILITY_TIMEOUT,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        wal: bool = True,
+    ):
+        """
+        Args:
+            path: Database file (created on first use)
+            visibility_timeout: Lease duration of fetched jobs in seconds
+            backoff_seconds: Base delay of the exponential retry backoff
+            wal: Use WAL journaling (only when all workers share one host)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.visibility_timeout = visibility_timeout
+        self.backoff_seconds = backoff_seconds
+        self.wal = wal
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if self.wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- producers ----------------------------------------------------------
+
+    def add_many(
+        self,
+        items: Sequence[Dict[str, Any]],
+        priority: str | int = "bulk",
+        tenant: str = DEFAULT_TENANT,
+        attempts: int = DEFAULT_ATTEMPTS,
+    ) -> List[str]:
+        """
+        Enqueue job payloads in one transaction.
+
+        Returns:
+            Job ids in the order of `items`
+        """
+        now = time.time()
+        level = priority_value(priority)
+        ids = [uuid.uuid4().hex for _ in items]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO jobs (id, data, priority, tenant, state, max_attempts, available_at, "
+                "enqueued_at) VALUES (?, ?, ?, ?, 'waiting', ?, ?, ?)",
+                [
+                    (
+                        job_id,
+                        json.dumps(data, ensure_ascii=False),
+                        level,
+                        tenant,
+                        attempts,
+                        now,
+                        now,
+                    )
+                    for job_id, data in zip(ids, items)
+                ],
+            )
+        return ids
+
+    async def add(self, data: Dict[str, Any], job_id: str | None = None, **options: Any) -> str:
+        """Enqueue one job (options: priority, tenant, attempts)"""
+        if job_id is not None:
+            raise ValueError("LocalJobQueue assigns job ids itself")
+        ids = await asyncio.to_thread(
+            self.add_many,
+            [data],
+            options.get("priority", "bulk"),
+            options.get("tenant", DEFAULT_TENANT),
+            options.get("attempts", DEFAULT_ATTEMPTS),
+        )
+        return ids[0]
+
+    def results(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """State, result and error of jobs (unknown ids are omitted)"""
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, state, attempts_made, result, error FROM jobs "
+                f"WHERE id IN ({placeholders})",
+                list(job_ids),
+            ).fetchall()
+        return {
+            row["id"]: {
+                "state": row["state"],
+                "attempts_made": row["attempts_made"],
+                "result": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+            }
+            for row in rows
+        }
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per state and priority class"""
+        names = {value: name for name, value in PRIORITIES.items()}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, priority, COUNT(*) AS n FROM jobs GROUP BY state, priority"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            label = names.get(row["priority"], str(row["priority"]))
+            counts.setdefault(row["state"], {})[label] = row["n"]
+        return counts
+
+    def prune(self, older_than: float) -> int:
+        """Delete jobs that finished more than `older_than` seconds ago"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE state IN ('completed', 'failed') AND finished_at < ?",
+                (time.time() - older_than,),
+            )
+        return cursor.rowcount
+
+    # --- workers ------------------------------------------------------------
+
+    def _recover(self, conn: sqlite3.Connection, now: float) -> None:
+        # Expired leases count as a failed attempt, like a stalled BullMQ job
+        conn.execute(
+            "UPDATE jobs SET attempts_made = attempts_made + 1, lease_token = NULL, "
+            "error = 'lease expired', "
+            "state = CASE WHEN attempts_made + 1 >= max_attempts THEN 'failed' ELSE 'waiting' END, "
+            "finished_at = CASE WHEN attempts_made + 1 >= max_attempts THEN ? END "
+            "WHERE state = 'active' AND lease_expires < ?",
+            (now, now),
+        )
+        conn.execute(
+            "UPDATE jobs SET state = 'waiting' WHERE state = 'delayed' AND available_at <= ?",
+            (now,),
+        )
+
+    def _select(self, conn: sqlite3.Connection, count: int) -> List[str]:
+        selected: List[str] = []
+        served: List[str] = []
+        levels = conn.execute(
+            "SELECT DISTINCT priority FROM jobs WHERE state = 'waiting' ORDER BY priority"
+        ).fetchall()
+
+        for level in (row["priority"] for row in levels):
+            tenants = conn.execute(
+                "SELECT w.tenant FROM (SELECT DISTINCT tenant FROM jobs "
+                "WHERE state = 'waiting' AND priority = ?) AS w "
+                "LEFT JOIN tenants t ON t.tenant = w.tenant "
+                "ORDER BY COALESCE(t.served_at, 0), w.tenant",
+                (level,),
+            ).fetchall()
+            queues = [
+                [
+                    row["id"]
+                    for row in conn.execute(
+                        "SELECT id FROM jobs WHERE state = 'waiting' AND priority = ? "
+                        "AND tenant = ? ORDER BY enqueued_at LIMIT ?",
+                        (level, tenant["tenant"], count - len(selected)),
+                    )
+                ]
+                for tenant in tenants
+            ]
+
+            # Round-robin over tenants, least recently served first
+            for turn in range(max(map(len, queues), default=0)):
+                for tenant, queue in zip(tenants, queues):
+                    if turn < len(queue) and len(selected) < count:
+                        selected.append(queue[turn])
+                        served.append(tenant["tenant"])
+            if len(selected) >= count:
+                break
+
+        # The tenant picked last is served last next time
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO tenants VALUES (?, ?) "
+            "ON CONFLICT (tenant) DO UPDATE SET served_at = excluded.served_at",
+            [(tenant, now + index * 1e-6) for index, tenant in enumerate(served)],
+        )
+        return selected
+
+    def _lease(self, count: int) -> List[QueueJob]:
+        now = time.time()
+        with self._connect() as conn:
+            # Take the write lock before selecting, so workers never lease the same job
+            conn.execute("BEGIN IMMEDIATE")
+            self._recover(conn, now)
+            ids = self._select(conn, count)
+            if not ids:
+                return []
+
+            token = uuid.uuid4().hex
+            placeholders = ", ".join("?" * len(ids))
+            conn.execute(
+                f"UPDATE jobs SET state = 'active', lease_token = ?, lease_expires = ? "
+                f"WHERE id IN ({placeholders})",
+                [token, now + self.visibility_timeout, *ids],
+            )
+            rows = conn.execute(
+                f"SELECT id, data, attempts_made, max_attempts, priority, tenant FROM jobs "
+                f"WHERE id IN ({placeholders})",
+                ids,
+            ).fetchall()
+
+        by_id = {row["id"]: row for row in rows}
+        return [
+            QueueJob(
+                id=job_id,
+                data=json.loads(by_id[job_id]["data"]),
+                attempts_made=by_id[job_id]["attempts_made"],
+                max_attempts=by_id[job_id]["max_attempts"],
+                token=token,
+                options={
+                    "priority": by_id[job_id]["priority"],
+                    "tenant": by_id[job_id]["tenant"],
+                },
+            )
+            for job_id in ids
+        ]
+
+    async def fetch(self, count: int, timeout: float = 1.0) -> List[QueueJob]:
+        deadline = time.monotonic() + timeout
+        while True:
+            jobs = await asyncio.to_thread(self._lease, count)
+            remaining = deadline - time.monotonic()
+            if jobs or remaining <= 0:
+                return jobs
+            await asyncio.sleep(min(POLL_SECONDS, remaining))
+
+    def _finish(self, job: QueueJob, result: Any = None, error: str | None = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            if error is None:
+                cursor = conn.execute(
+                    "UPDATE jobs SET state = 'completed', result = ?, finished_at = ?, "
+                    "lease_token = NULL WHERE id = ? AND lease_token = ?",
+                    (json.dumps(result, ensure_ascii=False, default=str), now, job.id, job.token),
+                )
+            else:
+                attempts = job.attempts_made + 1
+                retry = attempts < job.max_attempts
+                cursor = conn.execute(
+                    "UPDATE jobs SET state = ?, attempts_made = ?, error = ?, available_at = ?, "
+                    "finished_at = ?, lease_token = NULL WHERE id = ? AND lease_token = ?",
+                    (
+                        "delayed" if retry else "failed",
+                        attempts,
+                        error,
+                        now + backoff_delay(attempts, self.backoff_seconds),
+                        None if retry else now,
+                        job.id,
+                        job.token,
+                    ),
+                )
+                job.attempts_made = attempts
+
+        if cursor.rowcount == 0:
+            print(f"⚠️  Lease of job {job.id} expired before it finished; result discarded")
+
+    async def complete(self, job: QueueJob, result: Any = None) -> None:
+        await asyncio.to_thread(self._finish, job, result)
+
+    async def fail(self, job: QueueJob, error: str) -> None:
+        await asyncio.to_thread(self._finish, job, None, error)
+
+    def _extend(self, jobs: List[QueueJob]) -> None:
+        expires = time.time() + self.visibility_timeout
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND lease_token = ? AND state = 'active'",
+                [(expires, job.id, job.token) for job in jobs],
+            )
+
+    async def extend(self, jobs: List[QueueJob]) -> None:
+        await asyncio.to_thread(self._extend, jobs)
+
+    @property
+    def lease_seconds(self) -> float:
+        return self.visibility_timeout
+
+    async def close(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        """Unfinished jobs"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state IN ('waiting', 'delayed', 'active')"
+            ).fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"LocalJobQueue({self.path})"
@@ -0,0 +1,223 @@
+"""Batching evaluation worker for queues of Python evaluation jobs
+
+The Python counterpart of saas/workers/evaluation-worker.ts. Instead of one
+job at a time, it leases a batch of jobs, evaluates them concurrently through
+AgentOrchestrator (whose semaphore and RateLimiter are shared by every job of
+the process), writes all successful results in one store transaction, and
+only then acknowledges the jobs. Leases are renewed while a batch is
+evaluated, so long batches are not recovered as stalled. Several worker processes can consume the
+same queue to scale evaluation horizontally. Delivery is at-least-once: a
+job whose acknowledgement is lost is evaluated again.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Protocol, Sequence, Tuple
+
+from ..agents import AgentOrchestrator
+from ..models import AdOffer, AgentResponse, Persona
+from ..storage import ResultsStore, result_record
+from .base import JobQueue, QueueJob
+
+DEFAULT_BATCH_SIZE = 16
+
+
+class CatalogResolver:
+    """
+    Resolve job payloads to (offer, persona) pairs from local catalogs.
+
+    Jobs carry "personaId" and "offerId" (or a full "offer" object with the
+    data/test_offers.json fields). SaaS jobs ({"personaResponseId",
+    "testRunId"}) need the SaaS database and never reach Python workers,
+    which consume their own queue (see BullMQQueue).
+    """
+
+    def __init__(self, personas: Sequence[Persona], offers: Sequence[AdOffer] = ()):
+        self.personas = {persona.id: persona for persona in personas}
+        self.offers = {offer.test_id: offer for offer in offers}
+
+    def resolve(self, data: Dict[str, Any]) -> Tuple[AdOffer, Persona]:
+        """
+        Raises:
+            KeyError: If the persona or offer is unknown or missing from the payload
+        """
+        if "personaId" not in data:
+            raise KeyError(f"No personaId in job payload: {sorted(data)}")
+        persona_id = data["personaId"]
+        if persona_id not in self.personas:
+            raise KeyError(f"Unknown persona: {persona_id!r}")
+
+        if "offer" in data:
+            offer_data = data["offer"]
+            offer = AdOffer(
+                test_id=offer_data["id"],
+                headline=offer_data["headline"],
+                body=offer_data["body"],
+                call_to_action=offer_data["call_to_action"],
+                price=offer_data.get("price"),
+                discount=offer_data.get("discount"),
+            )
+        else:
+            offer_id = data.get("offerId")
+            if offer_id not in self.offers:
+                raise KeyError(f"Unknown offer: {offer_id!r}")
+            offer = self.offers[offer_id]
+
+        return offer, self.personas[persona_id]
+
+
+class ResultSink(Protocol):
+    """Where a worker writes the results of a batch"""
+
+    async def write(self, items: List[Tuple[QueueJob, AdOffer, AgentResponse]]) -> None: ...
+
+
+class StoreSink:
+    """
+    Writes batch results to a ResultsStore, one run per testRunId.
+
+    Jobs without a testRunId (interactive evaluations) are not stored; their
+    producer reads the response from the job result.
+    """
+
+    def __init__(self, store: ResultsStore):
+        self.store = store
+
+    async def write(self, items: List[Tuple[QueueJob, AdOffer, AgentResponse]]) -> None:
+        runs: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for job, offer, response in items:
+            if job.data.get("testRunId"):
+                runs[job.data["testRunId"]].append(result_record(offer, response))
+
+        def write_all() -> None:
+            for run_id, records in runs.items():
+                self.store.append_results(run_id, records)
+
+        await asyncio.to_thread(write_all)
+
+
+@dataclass
+class WorkerStats:
+    """Counters of one EvaluationWorker"""
+
+    batches: int = 0
+    completed: int = 0
+    failed: int = 0  # failed attempts (the queue may retry them)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def throughput(self) -> float:
+        """Completed jobs per second since the worker started"""
+        elapsed = time.monotonic() - self.started_at
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+
+class EvaluationWorker:
+    """Consumes evaluation jobs in batches"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        orchestrator: AgentOrchestrator,
+        resolver: CatalogResolver,
+        sink: ResultSink,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        idle_timeout: float = 1.0,
+        renew_every: float | None = None,
+    ):
+        """
+        Args:
+            queue: Queue backend (BullMQQueue, InMemoryQueue, ...)
+            orchestrator: Evaluates pairs; its max_concurrency and rate_limiter
+                bound the whole worker
+            resolver: Maps job payloads to (offer, persona)
+            sink: Bulk result writer
+            batch_size: Jobs leased per fetch
+            idle_timeout: Seconds to wait for jobs before fetch returns empty
+            renew_every: Seconds between lease renewals of a batch in progress
+                (default: a third of the queue's lease duration)
+        """
+        self.queue = queue
+        self.orchestrator = orchestrator
+        self.resolver = resolver
+        self.sink = sink
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        lease_seconds = getattr(queue, "lease_seconds", None)
+        self.renew_every = renew_every or (lease_seconds / 3 if lease_seconds else None)
+        self.stats = WorkerStats()
+
+    async def _evaluate(self, job: QueueJob) -> Tuple[AdOffer, AgentResponse]:
+        offer, persona = self.resolver.resolve(job.data)
+        return offer, await self.orchestrator.evaluate(offer, persona)
+
+    async def _renew(self, jobs: List[QueueJob]) -> None:
+        while True:
+            await asyncio.sleep(self.renew_every)
+            try:
+                await self.queue.extend(jobs)
+            except Exception as e:
+                print(f"⚠️  Failed to renew the leases of {len(jobs)} jobs: {e}")
+
+    async def run_once(self) -> int:
+        """
+        Lease, evaluate and acknowledge one batch.
+
+        Returns:
+            Number of jobs leased (0 if the queue stayed empty)
+        """
+        jobs = await self.queue.fetch(self.batch_size, timeout=self.idle_timeout)
+        if not jobs:
+            return 0
+
+        renewal = asyncio.create_task(self._renew(jobs)) if self.renew_every else None
+        try:
+            outcomes = await asyncio.gather(
+                *(self._evaluate(job) for job in jobs), return_exceptions=True
+            )
+        finally:
+            if renewal:
+                renewal.cancel()
+        succeeded = []
+        failures = []
+        for job, outcome in zip(jobs, outcomes):
+            if isinstance(outcome, BaseException):
+                failures.append((job, f"{type(outcome).__name__}: {outcome}"))
+            else:
+                succeeded.append((job, *outcome))
+
+        if succeeded:
+            try:
+                await self.sink.write(succeeded)
+            except Exception as e:
+                # Nothing was stored: let the queue retry the whole batch
+                print(f"⚠️  Failed to write {len(succeeded)} results: {e}")
+                failures.extend((job, f"write failed: {e}") for job, _, _ in succeeded)
+                succeeded = []
+
+        await asyncio.gather(
+            *(
+                self.queue.complete(job, response.model_dump(mode="json"))
+                for job, _, response in succeeded
+            ),
+            *(self.queue.fail(job, error) for job, error in failures),
+        )
+        for job, error in failures:
+            print(f"⚠️  Job {job.id} failed (attempt {job.attempts_made}): {error}")
+
+        self.stats.batches += 1
+        self.stats.completed += len(succeeded)
+        self.stats.failed += len(failures)
+        return len(jobs)
+
+    async def run(self, stop: asyncio.Event | None = None, max_jobs: int | None = None) -> None:
+        """
+        Process batches until `stop` is set or `max_jobs` jobs were leased.
+        """
+        leased = 0
+        while not (stop and stop.is_set()):
+            if max_jobs is not None and leased >= max_jobs:
+                break
+            leased += await self.run_once()
@@ -0,0 +1,5 @@
+"""Static reports of batch runs"""
+
+from .builder import FragmentCache, ReportData, build_report, collect_report_data, content_hash
+
+__all__ = ["build_report", "collect_report_data", "ReportData", "FragmentCache", "content_hash"]
@@ -0,0 +1,414 @@
+"""Static HTML / Markdown reports built from the results store
+
+Reports are meant for runs too large for the dashboard. Aggregates are
+computed from the store in one pass. Rendered fragments (Plotly figures,
+objection clusters) are cached on disk under a hash of their input data, so
+rebuilding a report after adding an offer only re-renders the fragments whose
+inputs changed.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal
+
+import pandas as pd
+import plotly.express as px
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from ..analytics import (
+    SignatureCache,
+    cluster_field,
+    emotion_distribution,
+    offer_summary,
+    persona_offer_matrix,
+    persona_summary,
+)
+from ..config import config
+from ..storage import ResultsStore
+
+REPORT_VERSION = 1  # part of every cache key: bump when fragment rendering changes
+# The bundle the installed plotly package renders figures for
+PLOTLY_CDN = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+ReportFormat = Literal["html", "markdown"]
+
+
+def content_hash(*parts: pd.DataFrame | pd.Series | str) -> str:
+    """Stable hash of DataFrames/Series (values, index and labels) and strings"""
+    digest = hashlib.sha256(str(REPORT_VERSION).encode())
+    for part in parts:
+        if isinstance(part, str):
+            digest.update(part.encode("utf-8"))
+            continue
+        if isinstance(part, pd.DataFrame):
+            digest.update(json.dumps([str(c) for c in part.columns]).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+class FragmentCache:
+    """Rendered report fragments on disk, keyed by kind and content hash"""
+
+    def __init__(self, directory: Path | None = None):
+        self.directory = Path(directory) if directory else None
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, kind: str, key: str, build: Callable[[], str]) -> str:
+        path = self.directory / f"{kind}-{key}.txt" if self.directory else None
+        if path is not None and path.exists():
+            self.hits += 1
+            return path.read_text(encoding="utf-8")
+
+        self.misses += 1
+        fragment = build()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_text(fragment, encoding="utf-8")
+            tmp_path.replace(path)
+        return fragment
+
+
+@dataclass
+class ReportData:
+    """Aggregates of one run that a report is rendered from"""
+
+    run: Dict[str, Any]
+    offers: pd.DataFrame
+    personas: pd.DataFrame
+    persona_values: pd.DataFrame
+    emotions: pd.DataFrame
+    objections: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+
+def collect_report_data(
+    store: ResultsStore,
+    run_id: str,
+    top_objections: int = 5,
+    max_personas: int = 40,
+    cache: FragmentCache | None = None,
+    signature_cache: SignatureCache | None = None,
+) -> ReportData:
+    """
+    Compute everything a report shows for one run.
+
+    Args:
+        store: Results store
+        run_id: Run to report on
+        top_objections: Objection clusters shown per offer
+        max_personas: Personas in the heatmap (those with the most evaluations)
+        cache: Fragment cache for objection clusters
+        signature_cache: MinHash signature cache for clustering
+
+    Returns:
+        Report aggregates
+    """
+    runs = {run["run_id"]: run for run in store.manifest()}
+    if run_id not in runs:
+        raise KeyError(f"Run not found: {run_id}")
+
+    cache = cache or FragmentCache()
+    df = store.frame(run_id, columns=["objections"])
+    offers = offer_summary(df)
+    personas = persona_summary(df)
+
+    top_ids = personas.sort_values("count", ascending=False).index[:max_personas]
+    persona_values = persona_offer_matrix(df[df["persona_id"].isin(top_ids)])
+
+    objections = {}
+    for offer_id, group in df.groupby("offer_id", observed=True, sort=False):
+        texts = group["objections"].explode().dropna().astype(str).reset_index(drop=True)
+        objections[offer_id] = json.loads(
+            cache.get_or_build(
+                "objections",
+                content_hash(texts, str(top_objections)),
+                lambda group=group: cluster_field(group, "objections", cache=signature_cache)
+                .head(top_objections)
+                .to_json(orient="records", force_ascii=False),
+            )
+        )
+
+    return ReportData(
+        run=runs[run_id],
+        offers=offers,
+        personas=personas,
+        persona_values=persona_values,
+        emotions=emotion_distribution(df),
+        objections=objections,
+    )
+
+
+# --- figures ----------------------------------------------------------------
+
+
+def _figure_html(fig) -> str:
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def leaderboard_figure(offers: pd.DataFrame) -> str:
+    fig = px.bar(
+        offers,
+        x="offer_headline",
+        y="avg_value",
+        color="conversion_rate",
+        error_y=offers["value_high"] - offers["avg_value"],
+        error_y_minus=offers["avg_value"] - offers["value_low"],
+        color_continuous_scale="RdYlGn",
+        labels={
+            "offer_headline": "Оффер",
+            "avg_value": "Средняя ценность (0-10)",
+            "conversion_rate": "Конверсия",
+        },
+        height=500,
+    )
+    fig.update_xaxes(tickangle=-45)
+    return _figure_html(fig)
+
+
+def heatmap_figure(matrix: pd.DataFrame, x: str, y: str, color: str, scale: str) -> str:
+    fig = px.imshow(
+        matrix,
+        labels=dict(x=x, y=y, color=color),
+        color_continuous_scale=scale,
+        aspect="auto",
+        height=max(400, 22 * len(matrix)),
+    )
+    fig.update_xaxes(tickangle=-45)
+    return _figure_html(fig)
+
+
+# --- rendering --------------------------------------------------------------
+
+LEADERBOARD_COLUMNS = {
+    "offer_headline": "Оффер",
+    "count": "Тестов",
+    "avg_value": "Ср. ценность",
+    "conversion_rate": "Конверсия",
+    "conversion_low": "Конверсия (мин.)",
+    "conversion_high": "Конверсия (макс.)",
+    "avg_confidence": "Ср. уверенность",
+}
+
+
+def _leaderboard_table(offers: pd.DataFrame) -> pd.DataFrame:
+    table = offers[list(LEADERBOARD_COLUMNS)].rename(columns=LEADERBOARD_COLUMNS)
+    table.insert(0, "Место", range(1, len(table) + 1))
+    return table.round(2)
+
+
+def _markdown_table(df: pd.DataFrame, index: bool = False) -> str:
+    if index:
+        df = df.reset_index()
+    cells = [[str(c) for c in df.columns]] + [
+        [f"{v:.2f}" if isinstance(v, float) else str(v) for v in row]
+        for row in df.itertuples(index=False)
+    ]
+    cells = [[c.replace("|", "\\|").replace("\n", " ") for c in row] for row in cells]
+    lines = ["| " + " | ".join(cells[0]) + " |", "|" + "---|" * len(cells[0])]
+    lines += ["| " + " | ".join(row) + " |" for row in cells[1:]]
+    return "\n".join(lines)
+
+
+def _run_title(run: Dict[str, Any]) -> str:
+    return f"Отчёт по запуску {run['run_id']}"
+
+
+def _run_facts(run: Dict[str, Any]) -> List[str]:
+    return [
+        f"Дата теста: {(run['test_date'] or '')[:19]}",
+        f"Агент: {run['agent_type']}",
+        f"Офферов: {run['num_offers']}, персон: {run['num_personas']}, "
+        f"тестов: {run['num_results']}",
+        f"Конверсия: {run['conversion_rate']:.1%}, средняя ценность: {run['avg_value']:.1f}/10",
+    ]
+
+
+def render_markdown(data: ReportData) -> str:
+    """Markdown report (tables only)"""
+    parts = [f"# {_run_title(data.run)}", ""]
+    parts += [f"- {fact}" for fact in _run_facts(data.run)]
+
+    parts += ["", "## 🏆 Рейтинг офферов", "", _markdown_table(_leaderboard_table(data.offers))]
+
+    parts += ["", "## 👥 Ценность по персонам", ""]
+    parts.append(_markdown_table(data.persona_values.round(1), index=True))
+
+    parts += ["", "## 😊 Распределение эмоций", ""]
+    parts.append(_markdown_table((data.emotions * 100).round(0), index=True))
+
+    parts += ["", "## ⚠️ Частые возражения", ""]
+    for offer_id, row in data.offers.iterrows():
+        clusters = data.objections.get(offer_id) or []
+        parts += [f"### {row['offer_headline']}", ""]
+        parts += [f"- {c['label']} — {c['count']} ({c['share']:.0%})" for c in clusters] or [
+            "- нет возражений"
+        ]
+        parts.append("")
+
+    parts.append(f"_Сформировано {datetime.now():%Y-%m-%d %H:%M}_")
+    return "\n".join(parts) + "\n"
+
+
+def render_html(
+    data: ReportData, cache: FragmentCache | None = None, plotly_js: str | None = None
+) -> str:
+    """
+    HTML report with interactive Plotly figures.
+
+    Args:
+        data: Report data
+        cache: Fragment cache
+        plotly_js: URL to load plotly.js from (e.g. PLOTLY_CDN); by default the
+            library is inlined once, so the report also opens offline (~4.5 MB)
+    """
+    cache = cache or FragmentCache()
+    if plotly_js is None:
+        plotly_script = f"<script type=\"text/javascript\">{get_plotlyjs()}</script>\n"
+    else:
+        plotly_script = f"<script src=\"{plotly_js}\"></script>\n"
+
+    def figure(kind: str, frame: pd.DataFrame, build: Callable[[], str]) -> str:
+        return cache.get_or_build(kind, content_hash(frame), build)
+
+    offers = data.offers[
+        ["offer_headline", "avg_value", "value_low", "value_high", "conversion_rate"]
+    ]
+    sections = [
+        f"<h1>{html.escape(_run_title(data.run))}</h1>",
+        "<ul>" + "".join(f"<li>{html.escape(f)}</li>" for f in _run_facts(data.run)) + "</ul>",
+        "<h2>🏆 Рейтинг офферов</h2>",
+        _leaderboard_table(data.offers).to_html(index=False, border=0),
+        figure("leaderboard", offers, lambda: leaderboard_figure(offers)),
+        "<h2>👥 Ценность по персонам</h2>",
+        figure(
+            "persona-heatmap",
+            data.persona_values,
+            lambda: heatmap_figure(
+                data.persona_values.T, "Персона", "Оффер", "Ценность", "RdYlGn"
+            ),
+        ),
+        "<h2>😊 Распределение эмоций</h2>",
+        figure(
+            "emotions",
+            data.emotions,
+            lambda: heatmap_figure(
+                (data.emotions * 100).T, "Оффер", "Эмоция", "Процент (%)", "YlGnBu"
+            ),
+        ),
+        "<h2>⚠️ Частые возражения</h2>",
+    ]
+
+    for offer_id, row in data.offers.iterrows():
+        clusters = data.objections.get(offer_id) or []
+        items = "".join(
+            f"<li>{html.escape(c['label'])} — {c['count']} ({c['share']:.0%})</li>"
+            for c in clusters
+        )
+        sections.append(
+            f"<h3>{html.escape(row['offer_headline'])}</h3>"
+            + (f"<ol>{items}</ol>" if items else "<p>Нет возражений</p>")
+        )
+
+    sections.append(f"<p><em>Сформировано {datetime.now():%Y-%m-%d %H:%M}</em></p>")
+
+    return (
+        "<!DOCTYPE html>\n<html lang=\"ru\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{html.escape(_run_title(data.run))}</title>\n"
+        + plotly_script
+        + "<style>body{font-family:sans-serif;max-width:1200px;margin:auto;padding:1em}"
+        "table{border-collapse:collapse}td,th{padding:4px 8px;border-bottom:1px solid #ddd}"
+        "</style>\n</head>\n<body>\n" + "\n".join(sections) + "\n</body>\n</html>\n"
+    )
+
+
+def build_report(
+    store: ResultsStore,
+    run_id: str | None = None,
+    fmt: ReportFormat = "html",
+    cache_dir: Path | None = None,
+    top_objections: int = 5,
+    plotly_js: str | None = None,
+) -> str:
+    """
+    Build a report for a run of the store.
+
+    Args:
+        store: Results store
+        run_id: Run to report on (default: latest run)
+        fmt: "html" or "markdown"
+        cache_dir: Fragment/signature cache directory (no caching if None)
+        top_objections: Objection clusters shown per offer
+        plotly_js: URL of plotly.js for HTML reports (default: inlined)
+
+    Returns:
+        Report text
+    """
+    if run_id is None:
+        manifest = store.manifest()
+        if not manifest:
+            raise ValueError(f"No runs in {store.path}")
+        run_id = manifest[0]["run_id"]
+
+    cache = FragmentCache(cache_dir / "fragments" if cache_dir else None)
+    signature_cache = SignatureCache(cache_dir / "text_signatures.npz" if cache_dir else None)
+    data = collect_report_data(
+        store,
+        run_id,
+        top_objections=top_objections,
+        cache=cache,
+        signature_cache=signature_cache,
+    )
+
+    if fmt == "markdown":
+        return render_markdown(data)
+    return render_html(data, cache, plotly_js)
+
+
+def main(argv: List[str] | None = None) -> None:
+    """CLI: python -m ad_testing_agents.reports [--run RUN] [--format html|markdown]"""
+    parser = argparse.ArgumentParser(
+        prog="python -m ad_testing_agents.reports",
+        description="Build a static report of a batch run from the results store",
+    )
+    parser.add_argument("--results-dir", type=Path, default=config.RESULTS_DIR)
+    parser.add_argument("--run", help="Run id (default: latest run)")
+    parser.add_argument("--format", choices=["html", "markdown"], default="html")
+    parser.add_argument("--output", type=Path, help="Output file (default: next to the results)")
+    parser.add_argument("--top-objections", type=int, default=5)
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild every fragment")
+    parser.add_argument(
+        "--plotly-cdn",
+        action="store_true",
+        help="Load plotly.js from its CDN instead of inlining it (smaller file, needs internet)",
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    store = ResultsStore.for_dir(args.results_dir)
+    store.sync_dir(args.results_dir)
+
+    run_id = args.run or next((run["run_id"] for run in store.manifest()), None)
+    if run_id is None:
+        print(f"❌ No results in {args.results_dir}")
+        sys.exit(1)
+
+    report = build_report(
+        store,
+        run_id,
+        fmt=args.format,
+        cache_dir=None if args.no_cache else args.results_dir / ".cache",
+        top_objections=args.top_objections,
+        plotly_js=PLOTLY_CDN if args.plotly_cdn else None,
+    )
+
+    suffix = ".html" if args.format == "html" else ".md"
+    output = args.output or args.results_dir / "reports" / f"{run_id}{suffix}"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(report, encoding="utf-8")
+    print(f"✅ Report for {run_id} saved to {output}")
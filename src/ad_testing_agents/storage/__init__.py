@@ -0,0 +1,5 @@
+"""Persistent storage of test results"""
+
+from .results_store import DB_FILENAME, ResultFilter, ResultPage, ResultsStore, result_record
+
+__all__ = ["ResultsStore", "ResultFilter", "ResultPage", "result_record", "DB_FILENAME"]
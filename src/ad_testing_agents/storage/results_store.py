@@ -0,0 +1,579 @@
+"""SQLite store for batch test results
+
+Results files stay the exchange format; the store indexes them so pages can
+count, filter and page through results of a run without loading the file.
+Pages are read by keyset (results after the last id of the previous page),
+so browsing costs the same on the first and the last page, and readers
+select only the columns they show.
+
+Every write also refreshes the run manifest (one row per run) and per-offer
+run summaries, so run lists and cross-run trends are read from a few small
+tables instead of the raw results.
+"""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+import pandas as pd
+
+from ..analytics.engine import CATEGORY_COLUMNS, NUMERIC_COLUMNS, results_frame
+from ..analytics.stats import POSITIVE_DECISIONS
+from ..models import AdOffer, AgentResponse
+
+DB_FILENAME = "results.db"
+RESULT_FILE_PATTERN = "batch_test_*.json"
+
+RESULT_COLUMNS = [
+    "offer_id",
+    "offer_headline",
+    "persona_id",
+    "persona_name",
+    "primary_emotion",
+    "emotion_intensity",
+    "decision",
+    "confidence_score",
+    "perceived_value",
+    "first_impression",
+    "detailed_reasoning",
+    "pain_points_addressed",
+    "objections",
+    "what_would_convince",
+    "timestamp",
+    "model_used",
+    "model_tier",
+    "rank",
+    "samples",
+    "decision_agreement",
+    "value_std",
+]
+LIST_COLUMNS = ("pain_points_addressed", "objections")
+# Result columns added after the first schema, created in older databases on open
+ADDED_COLUMNS = {
+    "model_used": "TEXT",
+    "model_tier": "TEXT",
+    "rank": "INTEGER",
+    "samples": "INTEGER",
+    "decision_agreement": "REAL",
+    "value_std": "REAL",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    source TEXT,
+    source_mtime_ns INTEGER,
+    source_size INTEGER,
+    metadata TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    offer_id TEXT NOT NULL,
+    offer_headline TEXT NOT NULL,
+    persona_id TEXT NOT NULL,
+    persona_name TEXT,
+    primary_emotion TEXT,
+    emotion_intensity REAL,
+    decision TEXT,
+    confidence_score REAL,
+    perceived_value REAL,
+    first_impression TEXT,
+    detailed_reasoning TEXT,
+    pain_points_addressed TEXT,
+    objections TEXT,
+    what_would_convince TEXT,
+    timestamp TEXT,
+    model_used TEXT,
+    model_tier TEXT,
+    rank INTEGER,
+    samples INTEGER,
+    decision_agreement REAL,
+    value_std REAL
+);
+
+CREATE INDEX IF NOT EXISTS results_run_offer ON results (run_id, offer_id, id);
+CREATE INDEX IF NOT EXISTS results_run_offer_decision
+    ON results (run_id, offer_id, decision, id);
+
+CREATE TABLE IF NOT EXISTS run_manifest (
+    run_id TEXT PRIMARY KEY REFERENCES runs(run_id) ON DELETE CASCADE,
+    test_date TEXT,
+    agent_type TEXT,
+    num_offers INTEGER,
+    num_personas INTEGER,
+    num_results INTEGER,
+    conversion_rate REAL,
+    avg_value REAL,
+    avg_confidence REAL,
+    avg_emotion_intensity REAL
+);
+
+CREATE TABLE IF NOT EXISTS run_offers (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    offer_id TEXT NOT NULL,
+    offer_headline TEXT NOT NULL,
+    count INTEGER,
+    conversion_rate REAL,
+    avg_value REAL,
+    avg_confidence REAL,
+    avg_emotion_intensity REAL,
+    PRIMARY KEY (run_id, offer_id)
+);
+"""
+
+SUMMARY_METRICS = f"""
+    COUNT(*),
+    AVG(decision IN ({", ".join(repr(d) for d in POSITIVE_DECISIONS)})),
+    AVG(perceived_value),
+    AVG(confidence_score),
+    AVG(emotion_intensity)
+"""
+
+MANIFEST_COLUMNS = [
+    "run_id",
+    "test_date",
+    "agent_type",
+    "num_offers",
+    "num_personas",
+    "num_results",
+    "conversion_rate",
+    "avg_value",
+    "avg_confidence",
+    "avg_emotion_intensity",
+]
+
+
+@dataclass
+class ResultFilter:
+    """Server-side filter of a result page (empty fields match everything)"""
+
+    offer_id: str | None = None
+    decisions: Sequence[str] = ()
+    persona_ids: Sequence[str] = ()
+    emotions: Sequence[str] = ()
+    min_value: float | None = None
+    search: str | None = None
+
+    def where(self, run_id: str) -> tuple[str, List[Any]]:
+        clauses = ["run_id = ?"]
+        params: List[Any] = [run_id]
+
+        if self.offer_id is not None:
+            clauses.append("offer_id = ?")
+            params.append(self.offer_id)
+        for column, values in (
+            ("decision", self.decisions),
+            ("persona_id", self.persona_ids),
+            ("primary_emotion", self.emotions),
+        ):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if self.min_value is not None:
+            clauses.append("perceived_value >= ?")
+            params.append(self.min_value)
+        if self.search:
+            clauses.append(
+                "(first_impression LIKE ? OR detailed_reasoning LIKE ? OR objections LIKE ?)"
+            )
+            params.extend([f"%{self.search}%"] * 3)
+
+        return " AND ".join(clauses), params
+
+
+@dataclass
+class ResultPage:
+    """One page of results and the cursor of the next page"""
+
+    records: List[Dict[str, Any]]
+    cursor: int | None  # pass as `after` for the next page; None on the last page
+
+
+def _result_columns(columns: Sequence[str] | None) -> List[str]:
+    columns = RESULT_COLUMNS if columns is None else list(columns)
+    unknown = set(columns) - set(RESULT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown result columns: {sorted(unknown)}")
+    return columns
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def result_record(offer: AdOffer, response: AgentResponse) -> Dict[str, Any]:
+    """Flatten an agent response into a results-file record"""
+    return {
+        "offer_id": offer.test_id,
+        "offer_headline": offer.headline,
+        "persona_id": response.persona_id,
+        "persona_name": response.persona_name,
+        "primary_emotion": _plain(response.primary_emotion),
+        "emotion_intensity": response.emotion_intensity,
+        "decision": _plain(response.decision),
+        "confidence_score": response.confidence_score,
+        "perceived_value": response.perceived_value,
+        "first_impression": response.first_impression,
+        "detailed_reasoning": response.detailed_reasoning,
+        "pain_points_addressed": response.pain_points_addressed,
+        "objections": response.objections,
+        "what_would_convince": response.what_would_convince,
+        "timestamp": response.timestamp.isoformat(),
+        "model_used": response.model_used,
+        "model_tier": response.model_tier,
+        "rank": response.rank,
+        "samples": response.samples,
+        "decision_agreement": response.decision_agreement,
+        "value_std": response.value_std,
+    }
+
+
+class ResultsStore:
+    """Results of all batch runs in one SQLite database"""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Database file (created on first use)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(results)")}
+            for column, sql_type in ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {column} {sql_type}")
+            # Runs stored before the manifest existed
+            missing = conn.execute(
+                "SELECT run_id FROM runs WHERE run_id NOT IN (SELECT run_id FROM run_manifest)"
+            ).fetchall()
+            for row in missing:
+                self._summarise(conn, row["run_id"])
+
+    @classmethod
+    def for_dir(cls, results_dir: Path) -> "ResultsStore":
+        """Store kept next to the results files of a directory"""
+        return cls(Path(results_dir) / DB_FILENAME)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation keeps the store thread-safe
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- writing ------------------------------------------------------------
+
+    def write_run(
+        self,
+        run_id: str,
+        metadata: Dict[str, Any],
+        results: List[Dict[str, Any]],
+        source: Path | None = None,
+    ) -> int:
+        """
+        Store (or replace) all results of a run in one transaction.
+
+        Args:
+            run_id: Run identifier (results file stem for file imports)
+            metadata: Run metadata as saved in the results file
+            results: Results-file records
+            source: Results file the run was imported from
+
+        Returns:
+            Number of stored results
+        """
+        stat = Path(source).stat() if source else None
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    str(Path(source).resolve()) if source else None,
+                    stat.st_mtime_ns if stat else None,
+                    stat.st_size if stat else None,
+                    json.dumps(metadata, ensure_ascii=False, default=str),
+                ),
+            )
+            count = self._insert_results(conn, run_id, results)
+            self._summarise(conn, run_id)
+        return count
+
+    def append_results(
+        self,
+        run_id: str,
+        results: List[Dict[str, Any]],
+        metadata: Dict[str, Any] | None = None,
+    ) -> int:
+        """
+        Add results to a run, creating the run on first use (e.g. queue workers).
+
+        Args:
+            run_id: Run identifier
+            results: Results-file records
+            metadata: Metadata for a new run (ignored if the run exists)
+
+        Returns:
+            Number of stored results
+        """
+        metadata = metadata or {"test_date": datetime.now().isoformat()}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, metadata) VALUES (?, ?)",
+                (run_id, json.dumps(metadata, ensure_ascii=False, default=str)),
+            )
+            count = self._insert_results(conn, run_id, results)
+            self._summarise(conn, run_id)
+        return count
+
+    @staticmethod
+    def _insert_results(
+        conn: sqlite3.Connection, run_id: str, results: List[Dict[str, Any]]
+    ) -> int:
+        rows = [
+            [run_id]
+            + [
+                json.dumps(record.get(column) or [], ensure_ascii=False)
+                if column in LIST_COLUMNS
+                else _plain(record.get(column))
+                for column in RESULT_COLUMNS
+            ]
+            for record in results
+        ]
+        for row, record in zip(rows, results):
+            # offer_id falls back to the headline, as in analytics.results_frame()
+            row[1] = row[1] or record.get("test_id") or record["offer_headline"]
+
+        conn.executemany(
+            f"INSERT INTO results (run_id, {', '.join(RESULT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(RESULT_COLUMNS) + 1))})",
+            rows,
+        )
+        return len(rows)
+
+    @staticmethod
+    def _summarise(conn: sqlite3.Connection, run_id: str) -> None:
+        """Refresh manifest row and per-offer summaries of a run"""
+        metadata = json.loads(
+            conn.execute("SELECT metadata FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+        )
+        conn.execute("DELETE FROM run_offers WHERE run_id = ?", (run_id,))
+        conn.execute(
+            f"INSERT INTO run_offers SELECT run_id, offer_id, MIN(offer_headline), "
+            f"{SUMMARY_METRICS} FROM results WHERE run_id = ? GROUP BY offer_id",
+            (run_id,),
+        )
+        conn.execute(
+            f"INSERT OR REPLACE INTO run_manifest SELECT ?, ?, ?, "
+            f"COUNT(DISTINCT offer_id), COUNT(DISTINCT persona_id), {SUMMARY_METRICS} "
+            f"FROM results WHERE run_id = ?",
+            (run_id, metadata.get("test_date"), metadata.get("agent_type"), run_id),
+        )
+
+    def import_file(self, path: Path) -> str:
+        """Import a batch results file (run id = file stem)"""
+        path = Path(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.write_run(path.stem, data["metadata"], data["results"], source=path)
+        return path.stem
+
+    def sync_dir(self, results_dir: Path) -> List[str]:
+        """
+        Import results files that are new or changed since their last import
+        and drop runs whose source file no longer exists.
+
+        Returns:
+            Run ids that were (re)imported
+        """
+        results_dir = Path(results_dir).resolve()
+        with self._connect() as conn:
+            known = {
+                row["source"]: (row["run_id"], row["source_mtime_ns"], row["source_size"])
+                for row in conn.execute(
+                    "SELECT run_id, source, source_mtime_ns, source_size FROM runs"
+                )
+            }
+
+        imported = []
+        present = set()
+        for path in sorted(results_dir.glob(RESULT_FILE_PATTERN)):
+            stat = path.stat()
+            present.add(str(path))
+            previous = known.get(str(path))
+            if previous is None or previous[1:] != (stat.st_mtime_ns, stat.st_size):
+                imported.append(self.import_file(path))
+
+        # Runs imported from other files (design runs, custom --run-id names) stay
+        # until their own file is gone
+        for source, (run_id, _, _) in known.items():
+            if source and source not in present and not Path(source).exists():
+                self.delete_run(run_id)
+        return imported
+
+    def delete_run(self, run_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    # --- reading ------------------------------------------------------------
+
+    def run_ids(self) -> List[str]:
+        """Stored runs, newest id first"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT run_id FROM runs ORDER BY run_id DESC")]
+
+    def manifest(self) -> List[Dict[str, Any]]:
+        """Summary of every stored run, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM run_manifest "
+                f"ORDER BY test_date DESC, run_id DESC"
+            )
+            return [dict(row) for row in rows]
+
+    def offer_history(self, offer_ids: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Per-offer metrics of every run, oldest run first.
+
+        Args:
+            offer_ids: Offers to include (all offers if empty)
+
+        Returns:
+            Rows with run_id, test_date, offer_id, offer_headline, count,
+            conversion_rate, avg_value, avg_confidence, avg_emotion_intensity
+        """
+        query = (
+            "SELECT o.*, m.test_date FROM run_offers o "
+            "JOIN run_manifest m ON m.run_id = o.run_id"
+        )
+        params: List[Any] = list(offer_ids)
+        if offer_ids:
+            query += f" WHERE o.offer_id IN ({', '.join('?' * len(offer_ids))})"
+        query += " ORDER BY m.test_date, o.run_id, o.offer_id"
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def metadata(self, run_id: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT metadata FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Run not found: {run_id}")
+        return json.loads(row["metadata"])
+
+    def count(self, run_id: str, filters: ResultFilter | None = None) -> int:
+        where, params = (filters or ResultFilter()).where(run_id)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+
+    def page(
+        self,
+        run_id: str,
+        filters: ResultFilter | None = None,
+        after: int | None = None,
+        limit: int = 20,
+        columns: Sequence[str] | None = None,
+    ) -> ResultPage:
+        """
+        One page of results as results-file records.
+
+        Args:
+            run_id: Run to read
+            filters: Server-side filter
+            after: Cursor of the previous page (None for the first page)
+            limit: Page size
+            columns: Result columns to read (default: all); records always carry "id"
+
+        Returns:
+            Records in insertion order and the cursor of the next page
+        """
+        columns = _result_columns(columns)
+        where, params = (filters or ResultFilter()).where(run_id)
+        if after is not None:
+            where += " AND id > ?"
+            params.append(after)
+        query = (
+            f"SELECT {', '.join(['id', *columns])} FROM results WHERE {where} "
+            f"ORDER BY id LIMIT ?"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(query, [*params, limit + 1]).fetchall()
+        records = [self._record(row) for row in rows[:limit]]
+        cursor = records[-1]["id"] if len(rows) > limit else None
+        return ResultPage(records, cursor)
+
+    def iter_records(
+        self,
+        run_id: str,
+        columns: Sequence[str] | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """All results of a run, read page by page (e.g. for exports)"""
+        cursor = None
+        while True:
+            result_page = self.page(run_id, after=cursor, limit=batch_size, columns=columns)
+            yield from result_page.records
+            cursor = result_page.cursor
+            if cursor is None:
+                return
+
+    def frame(self, run_id: str, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        """
+        Columnar result set of a run (see analytics.results_frame()).
+
+        Args:
+            run_id: Run to read
+            columns: Extra result columns to read besides the key and metric
+                columns, so long text can be left out for large runs (default: all)
+        """
+        required = [*CATEGORY_COLUMNS, *NUMERIC_COLUMNS]
+        columns = list(dict.fromkeys(required + _result_columns(columns)))
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(columns)} FROM results WHERE run_id = ? ORDER BY id",
+                conn,
+                params=(run_id,),
+            )
+        for column in LIST_COLUMNS:
+            if column in df.columns:
+                df[column] = [json.loads(value) if value else [] for value in df[column]]
+        return results_frame(df)
+
+    def distinct(self, run_id: str, column: str, offer_id: str | None = None) -> List[str]:
+        """Distinct values of a categorical column, e.g. for filter widgets"""
+        if column not in ("decision", "persona_id", "persona_name", "primary_emotion"):
+            raise ValueError(f"Unsupported filter column: {column}")
+        where, params = ResultFilter(offer_id=offer_id).where(run_id)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT {column} FROM results WHERE {where} ORDER BY {column}", params
+            )
+            return [row[0] for row in rows]
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for column in LIST_COLUMNS:
+            if column in record:
+                record[column] = json.loads(record[column]) if record[column] else []
+        return record
+
+    def __repr__(self) -> str:
+        return f"ResultsStore({self.path})"
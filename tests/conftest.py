@@ -0,0 +1,20 @@
+import pytest
+
+from ad_testing_agents.models import AdOffer
+from ad_testing_agents.personas.generator import PersonaGenerator
+
+
+@pytest.fixture
+def personas():
+    return PersonaGenerator(seed=7).generate(20)
+
+
+@pytest.fixture
+def offer():
+    return AdOffer(
+        headline="Лазерная эпиляция со скидкой",
+        body="Безболезненная процедура на диодном лазере, первая зона бесплатно.",
+        call_to_action="Записаться",
+        price="990₽",
+        test_id="offer-a",
+    )
@@ -0,0 +1,52 @@
+"""Test doubles shared by the agent tests"""
+
+from typing import Callable, List
+
+from ad_testing_agents.models import AdOffer, AgentResponse, Persona
+
+
+def agent_response(
+    persona: Persona,
+    offer: AdOffer,
+    decision: str = "neutral",
+    value: float = 5.0,
+    confidence: float = 0.8,
+    **fields,
+) -> AgentResponse:
+    """A valid AgentResponse with the given decision, value and confidence"""
+    data = {
+        "persona_id": persona.id,
+        "persona_name": persona.name,
+        "test_id": offer.test_id,
+        "offer_headline": offer.headline,
+        "primary_emotion": "neutral",
+        "emotion_intensity": 0.5,
+        "emotional_reasoning": "-",
+        "first_impression": "-",
+        "detailed_reasoning": "-",
+        "perceived_value": value,
+        "decision": decision,
+        "confidence_score": confidence,
+        "alignment_with_values": {},
+        **fields,
+    }
+    return AgentResponse(**data)
+
+
+class ScriptedOrchestrator:
+    """Orchestrator stand-in that answers from a function of (offer, persona)"""
+
+    def __init__(self, answer: Callable[[AdOffer, Persona], AgentResponse]):
+        self.answer = answer
+        self.calls = 0
+
+    async def evaluate(self, offer: AdOffer, persona: Persona) -> AgentResponse:
+        self.calls += 1
+        return self.answer(offer, persona)
+
+    sample = evaluate
+
+    async def test_offer_batch(
+        self, offer: AdOffer, personas: List[Persona]
+    ) -> List[AgentResponse]:
+        return [await self.evaluate(offer, persona) for persona in personas]
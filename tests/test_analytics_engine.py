@@ -0,0 +1,85 @@
+import pytest
+
+from ad_testing_agents.analytics import (
+    bootstrap_ci,
+    offer_summary,
+    overall_summary,
+    persona_summary,
+    results_frame,
+)
+from ad_testing_agents.analytics.stats import wilson_interval
+
+from .helpers import agent_response
+
+
+def _record(offer_id, persona_id, decision, value):
+    return {
+        "offer_id": offer_id,
+        "offer_headline": f"Заголовок {offer_id}",
+        "persona_id": persona_id,
+        "persona_name": persona_id.title(),
+        "primary_emotion": "interested",
+        "emotion_intensity": 0.5,
+        "decision": decision,
+        "confidence_score": 0.8,
+        "perceived_value": value,
+    }
+
+
+RECORDS = [
+    _record("a", "p1", "strong_yes", 8.0),
+    _record("a", "p2", "maybe_yes", 6.0),
+    _record("a", "p3", "strong_no", 4.0),
+    _record("b", "p1", "neutral", 3.0),
+    _record("b", "p2", "strong_no", 2.0),
+]
+
+
+def test_offer_summary_matches_hand_computed_metrics():
+    summary = offer_summary(results_frame(RECORDS))
+
+    assert list(summary.index) == ["a", "b"]  # best average value first
+    a = summary.loc["a"]
+    assert a["count"] == 3
+    assert a["offer_headline"] == "Заголовок a"
+    assert a["conversion_rate"] == pytest.approx(2 / 3)
+    assert a["avg_value"] == pytest.approx(6.0)
+    assert (a["conversion_low"], a["conversion_high"]) == pytest.approx(wilson_interval(2, 3))
+    assert a["value_low"] < 6.0 < a["value_high"]
+
+
+def test_responses_and_records_give_the_same_frame(personas, offer):
+    responses = [
+        agent_response(persona, offer, "maybe_yes" if i % 2 else "strong_no", float(i))
+        for i, persona in enumerate(personas[:6])
+    ]
+    from_responses = results_frame(responses)
+    from_records = results_frame([r.model_dump(mode="json") for r in responses])
+
+    assert list(from_responses["offer_id"].unique()) == [offer.test_id]
+    assert list(from_records["offer_id"].unique()) == [offer.test_id]  # from test_id
+    assert overall_summary(from_responses) == overall_summary(from_records)
+    assert overall_summary(from_responses)["conversion_rate"] == pytest.approx(0.5)
+    assert persona_summary(from_responses).iloc[0]["conversion_rate"] == 1.0
+
+
+def test_offer_id_falls_back_to_the_headline():
+    record = {key: value for key, value in RECORDS[0].items() if key != "offer_id"}
+    assert list(results_frame([record])["offer_id"]) == ["Заголовок a"]
+
+
+def test_empty_results_summarise_to_zeros():
+    assert overall_summary(results_frame([]))["count"] == 0
+
+
+@pytest.mark.parametrize("values", [[1.0, 2.0] * 20, [float(i) / 7 for i in range(40)]])
+def test_bootstrap_interval_covers_the_mean_and_is_seeded(values):
+    df = results_frame([_record("a", f"p{i}", "neutral", v) for i, v in enumerate(values)])
+
+    first = bootstrap_ci(df, "offer_id", n_boot=200, seed=1)
+    second = bootstrap_ci(df, "offer_id", n_boot=200, seed=1)
+
+    row = first.loc["a"]
+    assert row["low"] <= row["mean"] <= row["high"]
+    assert row["mean"] == pytest.approx(sum(values) / len(values))
+    assert first.equals(second)
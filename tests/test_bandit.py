@@ -0,0 +1,54 @@
+from ad_testing_agents.agents.bandit import BanditScheduler
+from ad_testing_agents.agents.orchestrator import AgentOrchestrator
+
+
+def _scheduler(offer, personas, strategy, offers=4, batch_size=8):
+    variants = [offer.model_copy(update={"test_id": f"v{i}"}) for i in range(offers)]
+    return BanditScheduler(
+        AgentOrchestrator(agent_type="mock"),
+        variants,
+        personas,
+        budget=100,
+        strategy=strategy,
+        batch_size=batch_size,
+    )
+
+
+def _pull(scheduler, arm_index, pulls, conversions):
+    arm = scheduler.arms[arm_index]
+    arm.pulls = arm.cursor = pulls
+    arm.conversions = conversions
+    arm.value_sum = 5.0 * pulls
+    arm.value_sq_sum = 25.0 * pulls
+
+
+def test_ucb_first_batch_spreads_over_all_arms(offer, personas):
+    scheduler = _scheduler(offer, personas, "ucb")
+    assert scheduler._select(8) == {0: 2, 1: 2, 2: 2, 3: 2}
+
+
+def test_ucb_favours_the_leading_arm_without_starving_others(offer, personas):
+    scheduler = _scheduler(offer, personas, "ucb")
+    for arm_index, conversions in enumerate([6, 4, 4, 4]):
+        _pull(scheduler, arm_index, 10, conversions)
+
+    picks = scheduler._select(8)
+    assert sum(picks.values()) == 8
+    assert picks[0] == max(picks.values())
+    assert len(picks) > 1
+
+
+def test_thompson_batch_is_not_one_arm(offer, personas):
+    scheduler = _scheduler(offer, personas, "thompson")
+    for arm_index in range(4):
+        _pull(scheduler, arm_index, 10, 5)
+    assert len(scheduler._select(8)) > 1
+
+
+def test_select_respects_exhausted_persona_orders(offer, personas):
+    scheduler = _scheduler(offer, personas, "ucb", offers=2)
+    _pull(scheduler, 0, len(personas) - 1, 0)
+
+    picks = scheduler._select(8)
+    assert picks.get(0, 0) <= 1
+    assert sum(picks.values()) == 8
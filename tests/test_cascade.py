@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.agents.cascade import CascadePolicy
+
+from .helpers import agent_response
+
+CHEAP, STRONG = "claude-haiku-4-5", "claude-sonnet-4-5"
+
+
+def _orchestrator(answers):
+    """Cascade whose cheap answers come from `answers` by persona index"""
+    orchestrator = AgentOrchestrator(
+        model=STRONG,
+        agent_type="mock",
+        cascade=CascadePolicy(cheap_model=CHEAP, confidence_threshold=0.6),
+    )
+    calls = []
+
+    async def run_agent(offer, persona, model=None):
+        calls.append(model)
+        if model == STRONG:
+            decision, confidence = "strong_yes", 0.9
+        else:
+            decision, confidence = answers[int(persona.id[-1]) % len(answers)]
+        return agent_response(
+            persona, offer, decision, 5.0, confidence, input_tokens=1000, output_tokens=200
+        )
+
+    orchestrator._run_agent = run_agent
+    return orchestrator, calls
+
+
+def test_confident_cheap_answers_are_kept(personas, offer):
+    orchestrator, calls = _orchestrator([("strong_no", 0.9)])
+    responses = asyncio.run(orchestrator.test_offer_batch(offer, personas[:4]))
+
+    assert calls == [CHEAP] * 4
+    assert {(r.model_tier, r.decision.value) for r in responses} == {("cheap", "strong_no")}
+    stats = orchestrator.cascade_stats.to_dict()
+    assert (stats["escalated"], stats["calls"]) == (0, {"cheap": 4, "strong": 0})
+    assert stats["cost_savings"] == pytest.approx(1 - 1 / 3)
+
+
+def test_unsure_and_boundary_answers_escalate_to_the_strong_model(personas, offer):
+    orchestrator, calls = _orchestrator([("strong_no", 0.9), ("strong_no", 0.3), ("neutral", 0.9)])
+    responses = asyncio.run(orchestrator.test_offer_batch(offer, personas[:3]))
+
+    tiers = {r.persona_id: r.model_tier for r in responses}
+    assert sorted(tiers.values()) == ["cheap", "strong", "strong"]
+    assert calls.count(STRONG) == 2
+    stats = orchestrator.cascade_stats.to_dict()
+    assert stats["escalations"] == {"low_confidence": 1, "boundary_decision": 1}
+    assert stats["escalation_rate"] == pytest.approx(2 / 3)
+
+
+def test_unparseable_cheap_answers_escalate(personas, offer):
+    orchestrator, _ = _orchestrator([])
+
+    async def run_agent(offer, persona, model=None):
+        if model == CHEAP:
+            raise RuntimeError("bad response") from ValueError("not JSON")
+        return agent_response(persona, offer, "strong_yes", 7.0, 0.9)
+
+    orchestrator._run_agent = run_agent
+    response = asyncio.run(orchestrator.evaluate(offer, personas[0]))
+
+    assert response.model_tier == "strong"
+    assert orchestrator.cascade_stats.escalations == {"parse_failure": 1}
@@ -0,0 +1,53 @@
+import asyncio
+from itertools import cycle
+
+import pytest
+
+from ad_testing_agents.agents import AgreementPolicy, ConsensusSampler
+
+from .helpers import ScriptedOrchestrator, agent_response
+
+
+def _sampler(personas, answers):
+    """Sampler whose n-th sample for the i-th persona is answers[i][n] (cycled)"""
+    streams = {persona.id: cycle(script) for persona, script in zip(personas, answers)}
+
+    def answer(offer, persona):
+        decision, value = next(streams[persona.id])
+        return agent_response(persona, offer, decision, value)
+
+    orchestrator = ScriptedOrchestrator(answer)
+    return ConsensusSampler(orchestrator, AgreementPolicy(min_samples=2, max_samples=5))
+
+
+def test_agreeing_samples_stop_at_the_minimum(personas, offer):
+    sampler = _sampler(personas, [[("strong_yes", 8.0), ("strong_yes", 8.5)]])
+    estimate = asyncio.run(sampler.evaluate(offer, personas[0]))
+
+    response = estimate.response()
+    assert sampler.orchestrator.calls == 2
+    assert (response.samples, response.decision_agreement) == (2, 1.0)
+    assert response.perceived_value == pytest.approx(8.25)
+    assert response.value_std == pytest.approx(0.3536, abs=1e-4)
+
+
+def test_disagreeing_samples_continue_to_the_maximum(personas, offer):
+    sampler = _sampler(personas, [[("strong_yes", 8.0), ("strong_no", 2.0)]])
+    estimate = asyncio.run(sampler.evaluate(offer, personas[0]))
+
+    response = estimate.response()
+    assert (response.samples, response.decision.value) == (5, "strong_yes")
+    assert response.decision_agreement == pytest.approx(0.6)
+    assert response.value_std > 1.0
+    assert sampler.stats.ambiguous == 1
+
+
+def test_stats_report_savings_against_fixed_sampling(personas, offer):
+    clear = [("strong_no", 2.0)]
+    split = [("maybe_yes", 6.0), ("probably_not", 4.0), ("maybe_yes", 6.0)]
+    sampler = _sampler(personas, [clear, clear, split])
+    asyncio.run(sampler.evaluate_batch(offer, personas[:3]))
+
+    stats = sampler.stats.to_dict(sampler.policy)
+    assert (stats["pairs"], stats["samples"], stats["ambiguous_pairs"]) == (3, 9, 1)
+    assert stats["savings"] == pytest.approx(1 - 9 / 15)
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+st = pytest.importorskip("streamlit")
+
+from ad_testing_agents.storage import ResultsStore  # noqa: E402
+from dashboard.components.cache import (  # noqa: E402
+    load_frame,
+    load_manifest,
+    load_summaries,
+    run_key,
+)
+
+
+def _record(persona_id, decision="maybe_yes", value=6.0):
+    return {
+        "offer_id": "offer-a",
+        "offer_headline": "Заголовок",
+        "persona_id": persona_id,
+        "persona_name": persona_id,
+        "primary_emotion": "interested",
+        "emotion_intensity": 0.5,
+        "decision": decision,
+        "confidence_score": 0.7,
+        "perceived_value": value,
+        "first_impression": "Длинный текст",
+        "objections": [],
+    }
+
+
+def _write(results_dir, name, results, mtime_ns):
+    path = results_dir / name
+    metadata = {"test_date": "2026-01-01T00:00:00", "agent_type": "mock"}
+    path.write_text(json.dumps({"metadata": metadata, "results": results}), encoding="utf-8")
+    os.utime(results_dir, ns=(mtime_ns, mtime_ns))
+    return results_dir.stat().st_mtime_ns
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def test_summaries_are_computed_once_per_run_version(tmp_path, monkeypatch):
+    results_dir = str(tmp_path)
+    mtime = _write(tmp_path, "batch_test_1.json", [_record("p1"), _record("p2")], 10**18)
+    [run] = load_manifest(results_dir, mtime)
+
+    reads = []
+    frame = ResultsStore.frame
+    monkeypatch.setattr(
+        ResultsStore, "frame", lambda self, *a, **kw: reads.append(a) or frame(self, *a, **kw)
+    )
+    key = run_key(results_dir, run, mtime)
+    assert load_summaries(key)["overall"]["count"] == 2
+    load_summaries(key)
+    assert len(reads) == 1
+
+    # A rewritten results file changes the key and is read again
+    mtime = _write(tmp_path, "batch_test_1.json", [_record("p1")] * 3, 2 * 10**18)
+    [run] = load_manifest(results_dir, mtime)
+    assert load_summaries(run_key(results_dir, run, mtime))["overall"]["count"] == 3
+    assert len(reads) == 2
+
+
+def test_cached_frame_leaves_out_free_text(tmp_path):
+    mtime = _write(tmp_path, "batch_test_1.json", [_record("p1")], 10**18)
+    [run] = load_manifest(str(tmp_path), mtime)
+
+    df = load_frame(run_key(str(tmp_path), run, mtime))
+    assert "first_impression" not in df.columns
+    assert df["perceived_value"].tolist() == [6.0]
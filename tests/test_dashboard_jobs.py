@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from ad_testing_agents.agents import AgentOrchestrator  # noqa: E402
+from ad_testing_agents.config import config  # noqa: E402
+from ad_testing_agents.queue import (  # noqa: E402
+    CatalogResolver,
+    EvaluationWorker,
+    LocalJobQueue,
+    StoreSink,
+)
+from ad_testing_agents.storage import ResultsStore  # noqa: E402
+from dashboard.components.jobs import JobManager  # noqa: E402
+
+
+def _wait(manager, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_jobs_run_in_the_background_and_aggregate_responses(personas, offer):
+    manager = JobManager(max_workers=2)
+    job_id = manager.submit(offer, personas[:5], "mock")
+
+    job = _wait(manager, job_id)
+    assert (job.status, job.progress, job.failed) == ("done", 1.0, 0)
+    assert len(job.aggregate) == 5
+    assert job.aggregate.overall()["avg_value"] == pytest.approx(
+        sum(r.perceived_value for r in job.responses) / 5
+    )
+
+    # Snapshots do not share state with the running job
+    job.responses.clear()
+    assert len(manager.get(job_id).responses) == 5
+
+
+def test_agent_errors_end_the_job_with_an_error(monkeypatch, personas, offer):
+    async def broken(self, offer, personas):
+        raise RuntimeError("no API key")
+        yield
+
+    monkeypatch.setattr(AgentOrchestrator, "stream_offer_batch", broken)
+    manager = JobManager(max_workers=1)
+
+    job = _wait(manager, manager.submit(offer, personas[:2], "mock"))
+    assert (job.status, job.error) == ("error", "no API key")
+
+
+def test_queued_jobs_are_collected_from_queue_workers(tmp_path, monkeypatch, personas, offer):
+    monkeypatch.setattr(config, "JOB_QUEUE_PATH", str(tmp_path / "queue.db"))
+    manager = JobManager(max_workers=1)
+    job_id = manager.submit(offer, personas[:3], "mock")
+
+    worker = EvaluationWorker(
+        LocalJobQueue(tmp_path / "queue.db"),
+        AgentOrchestrator(agent_type="mock"),
+        CatalogResolver(personas),
+        StoreSink(ResultsStore(tmp_path / "results.db")),
+        idle_timeout=0.05,
+    )
+    asyncio.run(worker.run(max_jobs=3))
+
+    job = _wait(manager, job_id)
+    assert job.status == "done"
+    assert sorted(r.persona_id for r in job.responses) == sorted(p.id for p in personas[:3])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ad_testing_agents.agents.factorial import OfferDesign, fit_effects
+
+
+def _design(offer, factors=5):
+    fields = ["headline", "body", "call_to_action", "price", "discount"][:factors]
+    levels = {
+        "headline": ["Лазерная эпиляция", "Гладкая кожа навсегда"],
+        "body": ["Диодный лазер, без боли и раздражения.", "Первая зона бесплатно, запись онлайн."],
+        "call_to_action": ["Записаться", "Узнать цену"],
+        "price": ["990₽", "1490₽"],
+        "discount": [None, "30%"],
+    }
+    return OfferDesign(offer, {name: levels[name] for name in fields})
+
+
+def test_select_recovers_an_orthogonal_half_fraction(offer):
+    design = _design(offer)
+    fraction = design.select(runs=16)
+
+    assert fraction.shape == (16, 5)
+    assert len({tuple(run) for run in fraction}) == 16
+    x = design.model_matrix(fraction)
+    np.testing.assert_allclose(x.T @ x, 16 * np.eye(6))
+    assert design.efficiency(fraction) == pytest.approx(1.0)
+
+
+def test_select_rejects_runs_below_model_size(offer):
+    with pytest.raises(ValueError):
+        _design(offer).select(runs=5)
+
+
+def test_fit_effects_recovers_additive_main_effects(offer):
+    design = _design(offer, factors=3)
+    fraction = design.select(runs=4)
+    true_effects = np.array([0.5, -1.0, 2.0])
+    x = design.model_matrix(fraction)
+    outcomes = 5.0 + x[:, 1:] @ true_effects
+
+    effects = fit_effects(design, fraction, list(enumerate(outcomes)))
+    assert effects.intercept == pytest.approx(5.0)
+    assert effects.effects["body"] == pytest.approx([-1.0, 1.0])
+    assert effects.best_run() == (0, 1, 0)
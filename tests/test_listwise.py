@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.agents.claude_agent import ClaudeAgent
+from ad_testing_agents.config import config
+
+from .helpers import agent_response
+
+
+def _offers(offer, count=3):
+    return [
+        offer.model_copy(update={"test_id": f"offer-{i}", "headline": f"Оффер {i}"})
+        for i in range(count)
+    ]
+
+
+def _listwise_text(ranking, values):
+    evaluations = [
+        {
+            "offer": number,
+            "primary_emotion": "neutral",
+            "emotion_intensity": 0.5,
+            "emotional_reasoning": "-",
+            "first_impression": "-",
+            "detailed_reasoning": "-",
+            "perceived_value": value,
+            "decision": "neutral",
+            "confidence_score": 0.8,
+            "alignment_with_values": {},
+        }
+        for number, value in enumerate(values, start=1)
+    ]
+    return json.dumps({"ranking": ranking, "evaluations": evaluations})
+
+
+def test_ranking_maps_back_to_the_offers_as_shown(monkeypatch, personas, offer):
+    monkeypatch.setattr(config, "ANTHROPIC_API_KEY", "test-key")
+    agent, offers = ClaudeAgent(personas[0]), _offers(offer)
+
+    items = agent._parse_listwise(_listwise_text([2, 3, 1], [5.0, 9.0, 7.0]), offers)
+    assert [(item["offer_headline"], item["rank"]) for item in items] == [
+        ("Оффер 0", 3),
+        ("Оффер 1", 1),
+        ("Оффер 2", 2),
+    ]
+
+    # A malformed ranking falls back to the perceived values
+    items = agent._parse_listwise(_listwise_text([1, 1, 2], [5.0, 9.0, 7.0]), offers)
+    assert [item["rank"] for item in items] == [3, 1, 2]
+
+
+def test_rotated_offers_come_back_in_the_callers_order(personas, offer):
+    offers = _offers(offer)
+    shown_first = set()
+
+    class FavouriteAgent:
+        """Ranks "Оффер 1" first whatever position it is shown in"""
+
+        def __init__(self, persona, model=None):
+            self.persona = persona
+
+        async def evaluate_offers(self, shown):
+            shown_first.add(shown[0].headline)
+            ranks = {"Оффер 1": 1, "Оффер 2": 2, "Оффер 0": 3}
+            return [
+                agent_response(self.persona, item, rank=ranks[item.headline], test_id="shown")
+                for item in shown
+            ]
+
+    orchestrator = AgentOrchestrator(agent_type="mock")
+    orchestrator._make_agent = FavouriteAgent
+    responses = asyncio.run(orchestrator.rank_offers(offers, personas[:9]))
+
+    assert len(shown_first) > 1  # personas see different rotations
+    assert orchestrator.listwise_stats == {"calls": 9, "evaluations": 27}
+    for i in range(0, len(responses), 3):
+        per_persona = responses[i : i + 3]
+        assert [r.test_id for r in per_persona] == ["offer-0", "offer-1", "offer-2"]
+        assert [r.offer_headline for r in per_persona] == ["Оффер 0", "Оффер 1", "Оффер 2"]
+        assert [r.rank for r in per_persona] == [3, 1, 2]
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from ad_testing_agents.queue import LocalJobQueue
+
+
+def _fetch(queue, count):
+    return asyncio.run(queue.fetch(count, timeout=0))
+
+
+def test_expired_lease_returns_job_as_failed_attempt(tmp_path):
+    queue = LocalJobQueue(tmp_path / "queue.db", visibility_timeout=0.05)
+    (job_id,) = queue.add_many([{"n": 1}], attempts=2)
+
+    (job,) = _fetch(queue, 1)
+    assert _fetch(queue, 1) == []  # leased, not visible
+    time.sleep(0.1)
+
+    (retry,) = _fetch(queue, 1)
+    assert retry.id == job_id and retry.attempts_made == 1
+    time.sleep(0.1)
+
+    assert _fetch(queue, 1) == []
+    assert queue.results([job_id])[job_id]["state"] == "failed"
+    assert queue.results([job_id])[job_id]["error"] == "lease expired"
+
+
+def test_completion_after_lease_expiry_is_discarded(tmp_path):
+    queue = LocalJobQueue(tmp_path / "queue.db", visibility_timeout=0.05)
+    (job_id,) = queue.add_many([{"n": 1}])
+    (stale,) = _fetch(queue, 1)
+    time.sleep(0.1)
+    (fresh,) = _fetch(queue, 1)
+
+    asyncio.run(queue.complete(stale, "stale"))
+    assert queue.results([job_id])[job_id]["state"] == "active"
+    asyncio.run(queue.complete(fresh, "fresh"))
+    assert queue.results([job_id])[job_id]["result"] == "fresh"
+
+
+def test_tenants_are_served_round_robin(tmp_path):
+    queue = LocalJobQueue(tmp_path / "queue.db")
+    queue.add_many([{"tenant": "a", "n": n} for n in range(4)], tenant="a")
+    queue.add_many([{"tenant": "b", "n": n} for n in range(4)], tenant="b")
+
+    first = [job.data["tenant"] for job in _fetch(queue, 3)]
+    assert first == ["a", "b", "a"]
+    # The tenant served last waits for the other one
+    assert [job.data["tenant"] for job in _fetch(queue, 2)] == ["b", "a"]
+
+
+def test_interactive_jobs_jump_ahead_of_bulk(tmp_path):
+    queue = LocalJobQueue(tmp_path / "queue.db")
+    queue.add_many([{"n": n} for n in range(3)], priority="bulk")
+    queue.add_many([{"n": "urgent"}], priority="interactive", tenant="dashboard")
+
+    assert _fetch(queue, 2)[0].data == {"n": "urgent"}
+
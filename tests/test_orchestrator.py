@@ -0,0 +1,28 @@
+import asyncio
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.config import config
+
+
+def test_api_agents_share_one_client_closed_by_aclose(monkeypatch, personas):
+    monkeypatch.setattr(config, "ANTHROPIC_API_KEY", "test-key")
+    orchestrator = AgentOrchestrator(agent_type="api")
+
+    async def run():
+        first = orchestrator._make_agent(personas[0])
+        second = orchestrator._make_agent(personas[1], model="claude-haiku-4-5")
+        assert first.client is second.client
+        client = first.client
+        await orchestrator.aclose()
+        assert client.is_closed()
+        assert orchestrator._make_agent(personas[0]).client is not client
+        await orchestrator.aclose()
+
+    asyncio.run(run())
+
+
+def test_mock_batch_needs_no_client(personas, offer):
+    orchestrator = AgentOrchestrator(agent_type="mock")
+    responses = asyncio.run(orchestrator.test_offer_batch(offer, personas[:3]))
+    assert len(responses) == 3
+    asyncio.run(orchestrator.aclose())
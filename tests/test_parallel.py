@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from ad_testing_agents.analytics.parallel import plan_tasks, process_results_files
+
+from .helpers import agent_response
+
+
+def _write_results(path, personas, offer):
+    records = [
+        agent_response(persona, offer, value=float(i % 11)).model_dump(mode="json")
+        for i, persona in enumerate(personas)
+    ]
+    records[3]["decision"] = "maybe"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"metadata": {"run_id": "r1"}}) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return records
+
+
+def test_chunks_cover_every_line_exactly_once(tmp_path, personas, offer):
+    path = tmp_path / "results.jsonl"
+    records = _write_results(path, personas, offer)
+
+    assert len(plan_tasks([path], chunk_bytes=700)) > 3
+    result = process_results_files([path], workers=1, keep_records=True, chunk_bytes=700)
+
+    assert (result.valid, result.invalid) == (len(records) - 1, 1)
+    assert "invalid decision: 'maybe'" in result.errors[0]
+    assert result.metadata == {str(path): {"run_id": "r1"}}
+    kept = sorted(record["persona_id"] for record in result.records())
+    assert kept == sorted(r["persona_id"] for i, r in enumerate(records) if i != 3)
+
+
+def test_worker_processes_merge_to_the_in_process_result(tmp_path, personas, offer):
+    path = tmp_path / "results.jsonl"
+    _write_results(path, personas, offer)
+
+    serial = process_results_files([path], workers=1, chunk_bytes=700)
+    parallel = process_results_files([path], workers=2, chunk_bytes=700)
+
+    assert parallel.valid == serial.valid
+    assert parallel.aggregator.overall() == pytest.approx(serial.aggregator.overall())
+    assert parallel.columns is None
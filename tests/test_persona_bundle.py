@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from ad_testing_agents.personas import PersonaLoader
+from ad_testing_agents.personas.bundle import compile_bundle, read_bundle, write_bundle
+
+
+def test_compiled_bundle_loads_the_same_personas(tmp_path):
+    bundle = tmp_path / "personas.bundle"
+    source = PersonaLoader()
+    count = compile_bundle([source.personas_dir], bundle)
+
+    loaded = PersonaLoader.from_bundle(bundle)
+    assert count == len(source.get_all_personas())
+    assert sorted(loaded.list_persona_ids()) == sorted(source.list_persona_ids())
+    for persona in source.get_all_personas():
+        assert loaded.get_persona(persona.id) == persona
+
+
+def test_header_records_count_and_payload_checksum(tmp_path, personas):
+    bundle = tmp_path / "personas.bundle"
+    write_bundle((p.model_dump(mode="json") for p in personas), bundle)
+
+    header = json.loads(bundle.read_bytes().partition(b"\n")[0])
+    assert header["count"] == len(personas)
+    assert len(header["checksum"]) == 64
+    assert [record["id"] for record in read_bundle(bundle)] == [p.id for p in personas]
+
+
+def test_corrupted_bundle_is_rejected(tmp_path, personas):
+    bundle = tmp_path / "personas.bundle"
+    write_bundle((p.model_dump(mode="json") for p in personas), bundle)
+    raw = bundle.read_bytes()
+    bundle.write_bytes(raw.replace(personas[0].name.encode("utf-8"), "Ошибка".encode("utf-8"), 1))
+
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        PersonaLoader.from_bundle(bundle)
+
+
+def test_bundle_of_another_format_is_rejected(tmp_path):
+    bundle = tmp_path / "personas.bundle"
+    bundle.write_bytes(b'{"format": "other", "version": 1}\n[]')
+
+    with pytest.raises(ValueError, match="Unsupported persona bundle"):
+        read_bundle(bundle)
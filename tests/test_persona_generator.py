@@ -0,0 +1,37 @@
+import pytest
+from pydantic import ValidationError
+
+from ad_testing_agents.personas.generator import _MALE_NAMES, PersonaGenerator
+
+
+def test_same_seed_writes_identical_bundles(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    PersonaGenerator(seed=3).write_bundle(50, first)
+    PersonaGenerator(seed=3).write_bundle(50, second)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_batches_do_not_change_the_population():
+    generator = PersonaGenerator(seed=3)
+    batched = [persona for batch in generator.iter_batches(25, batch_size=7) for persona in batch]
+    assert batched == generator.generate(25)
+
+
+def test_text_agrees_with_the_gender_of_the_name():
+    female_only = {"Студентка", "Мама в декрете", "Владелица бизнеса", "Пенсионерка", "Домохозяйка"}
+    men = [p for p in PersonaGenerator(seed=5).generate(300) if p.name in _MALE_NAMES]
+
+    assert men
+    assert not any(p.occupation in female_only for p in men)
+    assert not any("Привыкла" in p.background_story for p in men)
+
+
+def test_invalid_records_are_not_written_to_bundles(tmp_path, monkeypatch):
+    generator = PersonaGenerator(seed=3)
+    records = list(generator.iter_records(3))
+    records[1]["values"] = []  # Persona requires at least two values
+    monkeypatch.setattr(generator, "iter_records", lambda count: iter(records))
+
+    with pytest.raises(ValidationError):
+        generator.write_bundle(3, tmp_path / "bundle.jsonl")
+    assert not (tmp_path / "bundle.jsonl").exists()
@@ -0,0 +1,128 @@
+import json
+import sqlite3
+
+from ad_testing_agents.storage import ResultFilter, ResultsStore
+from ad_testing_agents.storage.results_store import ADDED_COLUMNS, RESULT_COLUMNS
+
+
+def _record(offer_id="offer-a", persona_id="p1", decision="maybe_yes"):
+    return {
+        "offer_id": offer_id,
+        "offer_headline": "Заголовок",
+        "persona_id": persona_id,
+        "persona_name": "Персона",
+        "primary_emotion": "interested",
+        "emotion_intensity": 0.5,
+        "decision": decision,
+        "confidence_score": 0.7,
+        "perceived_value": 6.0,
+        "objections": [],
+    }
+
+
+def _write(path, results):
+    metadata = {"test_date": "2026-01-01T00:00:00", "agent_type": "mock"}
+    path.write_text(json.dumps({"metadata": metadata, "results": results}), encoding="utf-8")
+
+
+def test_sync_dir_keeps_runs_with_other_file_names(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    _write(tmp_path / "batch_test_1.json", [_record()])
+    _write(tmp_path / "myrun.json", [_record(), _record(persona_id="p2")])
+    store.import_file(tmp_path / "myrun.json")
+    store.append_results("worker-run", [_record()])
+
+    assert store.sync_dir(tmp_path) == ["batch_test_1"]
+    assert set(store.run_ids()) == {"batch_test_1", "myrun", "worker-run"}
+    assert store.count("myrun") == 2
+
+
+def test_sync_dir_drops_runs_whose_file_was_deleted(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    _write(tmp_path / "batch_test_1.json", [_record()])
+    _write(tmp_path / "myrun.json", [_record()])
+    store.sync_dir(tmp_path)
+    store.import_file(tmp_path / "myrun.json")
+
+    (tmp_path / "batch_test_1.json").unlink()
+    (tmp_path / "myrun.json").unlink()
+    store.sync_dir(tmp_path)
+    assert store.run_ids() == []
+
+
+def test_sync_dir_reimports_changed_files(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    path = tmp_path / "batch_test_1.json"
+    _write(path, [_record()])
+    store.sync_dir(tmp_path)
+    assert store.sync_dir(tmp_path) == []
+
+    _write(path, [_record(), _record(persona_id="p2")])
+    assert store.sync_dir(tmp_path) == ["batch_test_1"]
+    assert store.count("batch_test_1") == 2
+
+
+def test_result_records_round_trip_with_evaluation_details(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    record = {
+        **_record(),
+        "model_used": "claude-haiku",
+        "model_tier": "cheap",
+        "rank": 2,
+        "samples": 3,
+        "decision_agreement": 1.0,
+        "value_std": 0.5,
+    }
+    store.append_results("run", [record])
+
+    [stored] = store.page("run").records
+    assert {column: stored[column] for column in record} == record
+
+
+def test_older_databases_gain_new_result_columns(tmp_path):
+    path = tmp_path / "results.db"
+    original = [column for column in RESULT_COLUMNS if column not in ADDED_COLUMNS]
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            f"CREATE TABLE results (id INTEGER PRIMARY KEY, run_id TEXT, {', '.join(original)})"
+        )
+    conn.close()
+
+    ResultsStore(path)
+    with sqlite3.connect(path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    conn.close()
+    assert {"model_used", "model_tier", "rank", "samples", "value_std"} <= columns
+
+
+def test_pages_follow_the_cursor_through_filtered_results(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    decisions = ["maybe_yes", "no"] * 5
+    store.append_results(
+        "run", [_record(persona_id=f"p{i}", decision=d) for i, d in enumerate(decisions)]
+    )
+    only_yes = ResultFilter(decisions=["maybe_yes"])
+
+    seen = []
+    cursor = None
+    while True:
+        result_page = store.page("run", only_yes, after=cursor, limit=2)
+        seen.extend(record["persona_id"] for record in result_page.records)
+        cursor = result_page.cursor
+        if cursor is None:
+            break
+    assert seen == ["p0", "p2", "p4", "p6", "p8"]
+    assert store.count("run", only_yes) == 5
+
+    # An exact multiple of the page size ends without an empty extra page
+    assert store.page("run", only_yes, limit=5).cursor is None
+
+
+def test_pages_and_frames_read_only_the_requested_columns(tmp_path):
+    store = ResultsStore.for_dir(tmp_path)
+    store.append_results("run", [_record(), _record(persona_id="p2")])
+
+    [record, _] = store.page("run", columns=["persona_id", "objections"]).records
+    assert set(record) == {"id", "persona_id", "objections"}
+    assert "detailed_reasoning" not in store.frame("run", columns=[]).columns
+    assert len(list(store.iter_records("run", batch_size=1))) == 2
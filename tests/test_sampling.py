@@ -0,0 +1,42 @@
+import asyncio
+
+from ad_testing_agents.agents import StratifiedSampler
+from ad_testing_agents.models import IncomeLevel
+from ad_testing_agents.personas.generator import PersonaGenerator
+
+from .helpers import ScriptedOrchestrator, agent_response
+
+
+def _converts_on_low_income(offer, persona):
+    decision = "strong_yes" if persona.income_level == IncomeLevel.LOW else "strong_no"
+    return agent_response(persona, offer, decision)
+
+
+def test_stratified_estimate_matches_the_population_with_fewer_evaluations(offer):
+    population = PersonaGenerator(seed=11).generate(400)
+    orchestrator = ScriptedOrchestrator(_converts_on_low_income)
+    sampler = StratifiedSampler(orchestrator, population, stratum_key=lambda p: p.income_level)
+
+    estimate = asyncio.run(sampler.estimate(offer, target_half_width=0.05, batch_size=10))
+
+    low_share = sum(p.income_level == IncomeLevel.LOW for p in population) / len(population)
+    assert estimate.conversion_rate == low_share  # homogeneous strata reweight exactly
+    assert estimate.personas_evaluated == orchestrator.calls < len(population) / 2
+    assert estimate.population_size == len(population)
+
+
+def test_projection_weights_shift_the_estimate(offer):
+    population = PersonaGenerator(seed=11).generate(200)
+    weights = {p.id: 3.0 if p.income_level == IncomeLevel.LOW else 1.0 for p in population}
+    sampler = StratifiedSampler(
+        ScriptedOrchestrator(_converts_on_low_income),
+        population,
+        stratum_key=lambda p: p.income_level,
+        weights=weights,
+    )
+
+    estimate = asyncio.run(sampler.estimate(offer, max_evaluations=40))
+
+    low_mass = sum(w for p_id, w in weights.items() if w == 3.0)
+    assert abs(estimate.conversion_rate - low_mass / sum(weights.values())) < 1e-9
+    assert estimate.personas_evaluated <= 40
@@ -0,0 +1,60 @@
+import asyncio
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.agents.sequential import OfferArm, SequentialComparison, default_schedule
+
+from .helpers import ScriptedOrchestrator, agent_response
+
+
+def _arm(offer, conversions, values):
+    arm = OfferArm(offer=offer)
+    arm.evaluations = len(values)
+    arm.conversions = conversions
+    arm.value_sum = sum(values)
+    arm.value_sq_sum = sum(value**2 for value in values)
+    return arm
+
+
+def _comparison(personas):
+    return SequentialComparison(AgentOrchestrator(agent_type="mock"), personas)
+
+
+def test_arm_dominated_on_both_metrics_is_eliminated(personas, offer):
+    strong = _arm(offer, 38, [8.0, 9.0] * 20)
+    weak = _arm(offer, 2, [2.0, 3.0] * 20)
+    _comparison(personas)._eliminate([strong, weak], 3)
+
+    assert strong.active
+    assert weak.eliminated_round == 3
+
+
+def test_arm_better_on_one_metric_keeps_running(personas, offer):
+    converts = _arm(offer, 38, [2.0, 3.0] * 20)
+    valued = _arm(offer, 2, [8.0, 9.0] * 20)
+    _comparison(personas)._eliminate([converts, valued], 3)
+
+    assert converts.active and valued.active
+
+
+def test_default_schedule_checks_by_half_the_population():
+    assert default_schedule(8) == (1, 4)
+    assert default_schedule(20) == (3, 2)
+    assert default_schedule(200) == (25, 1)
+    assert default_schedule(3) == (1, 2)
+
+
+def test_defaults_eliminate_a_clearly_worse_offer_early(personas, offer):
+    weak = offer.model_copy(update={"test_id": "offer-b"})
+    answers = {"offer-a": ("strong_yes", 8.0), "offer-b": ("strong_no", 2.0)}
+
+    def answer(offer, persona):
+        decision, value = answers[offer.test_id]
+        return agent_response(persona, offer, decision, value + 0.5 * (int(persona.id[-1]) % 2))
+
+    comparison = SequentialComparison(ScriptedOrchestrator(answer), personas[:8])
+    result = asyncio.run(comparison.run([offer, weak]))
+
+    assert result.winner.offer.test_id == "offer-a"
+    assert result.arms[1].eliminated_round == 4
+    assert result.evaluations == 8
+    assert result.savings == 0.5
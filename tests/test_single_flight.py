@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from ad_testing_agents.agents import AgentOrchestrator, SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def call(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", lambda: call(1)),
+            flight.do("a", lambda: call(2)),
+            flight.do("b", lambda: call(3)),
+        )
+
+    assert asyncio.run(run()) == [1, 1, 3]
+    assert calls == [1, 3]
+    assert (flight.calls, flight.coalesced, flight.in_flight) == (2, 1, 0)
+
+
+def test_errors_reach_every_waiting_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+        )
+
+    assert [str(e) for e in asyncio.run(run())] == ["boom", "boom"]
+    assert flight.calls == 1
+
+
+@pytest.mark.parametrize("coalesce", [False, True])
+def test_orchestrator_coalesces_only_when_asked(monkeypatch, personas, offer, coalesce):
+    orchestrator = AgentOrchestrator(agent_type="mock", coalesce=coalesce)
+    if coalesce:
+        monkeypatch.setattr(orchestrator, "single_flight", SingleFlight())
+    calls = []
+    call_agent = orchestrator._call_agent
+
+    async def counted(*args):
+        calls.append(args)
+        await asyncio.sleep(0.05)
+        return await call_agent(*args)
+
+    monkeypatch.setattr(orchestrator, "_call_agent", counted)
+
+    async def run():
+        twins = await asyncio.gather(*(orchestrator.evaluate(offer, personas[0]) for _ in range(3)))
+        await orchestrator.aclose()
+        return twins
+
+    twins = asyncio.run(run())
+    assert len(calls) == (1 if coalesce else 3)
+    assert len({id(response) for response in twins}) == 3  # each caller owns its copy
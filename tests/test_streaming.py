@@ -0,0 +1,68 @@
+import json
+import random
+
+import pytest
+
+from ad_testing_agents.agents.streaming import IncrementalJSONParser, required_fields
+
+ANSWER = {
+    "primary_emotion": "interested",
+    "emotion_intensity": 0.7,
+    "decision": "maybe_yes",
+    "perceived_value": 7.5,
+    "first_impression": "Звучит {неплохо}, но \"цена\" смущает",
+    "objections": ["дорого", "далеко, [метро]"],
+    "alignment_with_values": {"экономия": 0.4, "качество": 0.9},
+    "what_would_convince": None,
+    "is_new": True,
+}
+TEXT = "```json\n" + json.dumps(ANSWER, ensure_ascii=False, indent=2) + "\n```\nГотово."
+
+
+def _chunks(text, sizes):
+    position = 0
+    for size in sizes:
+        yield text[position : position + size]
+        position += size
+    yield text[position:]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+def test_fixed_chunk_sizes(size):
+    parser = IncrementalJSONParser()
+    for start in range(0, len(TEXT), size):
+        parser.feed(TEXT[start : start + size])
+    assert parser.complete
+    assert parser.fields == ANSWER
+
+
+def test_random_chunkings():
+    rng = random.Random(0)
+    for _ in range(200):
+        parser = IncrementalJSONParser()
+        for chunk in _chunks(TEXT, [rng.randint(1, 40) for _ in range(len(TEXT))]):
+            parser.feed(chunk)
+        assert parser.fields == ANSWER
+
+
+def test_fields_are_available_before_the_object_closes():
+    parser = IncrementalJSONParser()
+    cut = TEXT.index('"first_impression"')
+    parser.feed(TEXT[:cut])
+    assert not parser.complete
+    assert parser.has(["decision", "perceived_value", "primary_emotion"])
+    assert "first_impression" not in parser.fields
+
+
+def test_last_scalar_is_decoded_at_the_closing_brace():
+    parser = IncrementalJSONParser()
+    parser.feed('{"decision": "neutral", "perceived_value": 4')
+    assert "perceived_value" not in parser.fields
+    parser.feed("}")
+    assert parser.fields == {"decision": "neutral", "perceived_value": 4}
+
+
+def test_required_fields_adds_mandatory_numbers_and_rejects_unknown():
+    assert required_fields(["decision"]) == ("decision", "emotion_intensity", "confidence_score")
+    with pytest.raises(ValueError):
+        required_fields(["mood"])
@@ -0,0 +1,63 @@
+import asyncio
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.analytics import SurrogateModel, training_rows
+from ad_testing_agents.analytics.surrogate import offer_fields
+from ad_testing_agents.models.response import HEURISTIC_MODEL, SURROGATE_MODEL
+
+from .helpers import agent_response
+
+
+def test_training_rows_skip_non_llm_predictions(personas, offer):
+    persona = personas[0]
+    records = [
+        {
+            "persona_id": persona.id,
+            "offer_id": offer.test_id,
+            "offer_headline": offer.headline,
+            "decision": "maybe_yes",
+            "model_used": model,
+        }
+        for model in ("claude-sonnet-4-5", SURROGATE_MODEL, HEURISTIC_MODEL, "mock")
+    ]
+    rows = training_rows(records, {offer.test_id: offer}, {persona.id: persona})
+    assert [record["model_used"] for _, _, record in rows] == ["claude-sonnet-4-5", "mock"]
+
+
+def _scripted_rows(personas, offer):
+    """Every persona takes the cheap offer and turns down the expensive one"""
+    pricey = offer.model_copy(
+        update={"test_id": "offer-b", "headline": "Премиум уход", "price": "25 000₽"}
+    )
+    rows = []
+    for current, decision, value in ((offer, "strong_yes", 8.0), (pricey, "strong_no", 2.0)):
+        for persona in personas:
+            record = agent_response(persona, current, decision, value).model_dump(mode="json")
+            rows.append((offer_fields(current), persona, record))
+    return rows, pricey
+
+
+def test_surrogate_learns_a_consistent_pattern(tmp_path, personas, offer):
+    rows, pricey = _scripted_rows(personas, offer)
+    model = SurrogateModel.fit(rows)
+
+    liked, disliked = model.predict(offer, personas[0]), model.predict(pricey, personas[0])
+    assert (liked.decision.value, disliked.decision.value) == ("strong_yes", "strong_no")
+    assert liked.confident() and disliked.confident()
+    assert liked.perceived_value > 7 > 3 > disliked.perceived_value
+
+    model.save(tmp_path / "surrogate.npz")
+    loaded = SurrogateModel.load(tmp_path / "surrogate.npz")
+    assert loaded.predict(pricey, personas[0]) == disliked
+
+
+def test_confident_predictions_skip_the_agent(personas, offer):
+    rows, pricey = _scripted_rows(personas, offer)
+    orchestrator = AgentOrchestrator(agent_type="mock", surrogate=SurrogateModel.fit(rows))
+
+    responses = asyncio.run(orchestrator.test_offer_batch(pricey, personas[:5]))
+
+    assert orchestrator.surrogate_stats == {"surrogate": 5, "agent": 0}
+    assert {(r.model_used, r.decision.value) for r in responses} == {
+        (SURROGATE_MODEL, "strong_no")
+    }
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from ad_testing_agents.analytics import SignatureCache, cluster_field
+from ad_testing_agents.analytics.text_clusters import MinHasher, cluster_texts
+
+
+def test_inflected_variants_share_a_cluster():
+    clusters = cluster_texts(
+        [
+            "Слишком дорого",
+            "слишком дорого!",
+            "Слишком дорогой",
+            "Боюсь, что будет больно",
+            "Боюсь что будет больно.",
+            "",
+            None,
+        ]
+    )
+
+    assert [cluster.count for cluster in clusters] == [3, 2]
+    assert clusters[0].label == "Слишком дорого"
+    assert "Слишком дорогой" in clusters[0].variants
+
+
+def test_signature_cache_persists_and_ignores_other_parameters(tmp_path):
+    path = tmp_path / "signatures.npz"
+    cache = SignatureCache(path)
+    cluster_texts(["Нет отзывов", "Далеко от метро"], cache=cache)
+
+    reloaded = SignatureCache(path)
+    assert len(reloaded) == 2
+    assert len(SignatureCache(path, hasher=MinHasher(seed=2))) == 0
+
+
+def test_cluster_field_explodes_list_columns():
+    df = pd.DataFrame(
+        {"objections": [["Слишком дорого", "Нет отзывов"], ["слишком дорого"], []]}
+    )
+    clusters = cluster_field(df, "objections")
+
+    assert list(clusters["count"]) == [2, 1]
+    assert clusters["share"].sum() == 1.0
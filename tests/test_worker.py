@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from ad_testing_agents.agents import AgentOrchestrator
+from ad_testing_agents.queue import (
+    QUEUE_NAME,
+    BullMQQueue,
+    CatalogResolver,
+    EvaluationWorker,
+    InMemoryQueue,
+    LocalJobQueue,
+    StoreSink,
+)
+from ad_testing_agents.storage import ResultsStore
+
+
+def make_worker(queue, tmp_path, personas, offer, **kwargs):
+    return EvaluationWorker(
+        queue,
+        AgentOrchestrator(agent_type="mock"),
+        CatalogResolver(personas, [offer]),
+        StoreSink(ResultsStore(tmp_path / "results.db")),
+        idle_timeout=0.01,
+        **kwargs,
+    )
+
+
+def test_jobs_without_persona_fail_instead_of_cycling(tmp_path, personas, offer):
+    queue = InMemoryQueue()
+    worker = make_worker(queue, tmp_path, personas, offer)
+
+    async def run():
+        bad_id = await queue.add({"personaResponseId": "resp-1"}, attempts=1)
+        good_id = await queue.add({"personaId": personas[0].id, "offerId": offer.test_id})
+        await worker.run(max_jobs=2)
+        return bad_id, good_id
+
+    bad_id, good_id = asyncio.run(run())
+    assert good_id in queue.completed
+    assert "No personaId" in queue.failed[bad_id]
+    assert len(queue) == 0
+
+
+def test_leases_are_renewed_while_a_batch_runs(tmp_path, personas, offer):
+    queue = LocalJobQueue(tmp_path / "queue.db", visibility_timeout=0.2)
+    worker = make_worker(queue, tmp_path, personas, offer, renew_every=0.05)
+    evaluate = worker.orchestrator.evaluate
+
+    async def slow_evaluate(*args, **kwargs):
+        await asyncio.sleep(0.5)  # longer than the lease
+        return await evaluate(*args, **kwargs)
+
+    worker.orchestrator.evaluate = slow_evaluate
+
+    async def run():
+        job_id = await queue.add({"personaId": personas[0].id, "offerId": offer.test_id})
+        await worker.run_once()
+        return job_id
+
+    job_id = asyncio.run(run())
+    assert queue.results([job_id])[job_id]["state"] == "completed"
+    assert worker.stats.completed == 1
+
+
+def test_bullmq_refuses_the_saas_queue():
+    with pytest.raises(ValueError, match="SaaS queue"):
+        BullMQQueue(QUEUE_NAME, client=object())
+
+
+def test_bullmq_fetch_locks_and_extends_jobs():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        queue = BullMQQueue(client=redis, lock_duration_ms=1000)
+        ids = [await queue.add({"personaId": f"p{i}"}) for i in range(3)]
+
+        jobs = await queue.fetch(2, timeout=0)
+        assert [job.id for job in jobs] == ids[:2]  # FIFO
+        assert await redis.lrange(queue._key("active"), 0, -1) == ids[1::-1]
+        lock = queue._key(f"{ids[0]}:lock")
+        assert await redis.get(lock) == jobs[0].token
+
+        await redis.pexpire(lock, 100)
+        await queue.extend(jobs)
+        assert await redis.pttl(lock) > 100
+
+        await queue.complete(jobs[0], {"ok": True})
+        assert await redis.zscore(queue._key("completed"), ids[0]) is not None
+        assert not await redis.exists(lock)
+
+    asyncio.run(run())
+
+
+def test_bullmq_recovers_stalled_jobs_and_discards_their_late_results():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        queue = BullMQQueue(client=redis)
+        first, second = await queue.add({"n": 1}), await queue.add({"n": 2})
+        [stalled] = await queue.fetch(1, timeout=0)
+        await redis.delete(queue._key(f"{first}:lock"))  # the worker died
+
+        queue._next_stalled_check = 0.0
+        [job] = await queue.fetch(1, timeout=0)
+        assert job.id == first  # back at the front of the queue
+        assert job.attempts_made == 1
+
+        await queue.complete(stalled, {"late": True})  # lost its lock
+        assert await redis.zscore(queue._key("completed"), first) is None
+        assert await redis.lrange(queue._key("wait"), 0, -1) == [second]
+
+    asyncio.run(run())